@@ -2,26 +2,36 @@
 API routes for the Assistant Service.
 """
 
+import json
 import logging
-from fastapi import APIRouter, HTTPException, status
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import APIRouter, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
 from src.api.schemas import (
     AskRequest,
     AskResponse,
+    AskBatchRequest,
+    AskBatchItem,
+    AskBatchResponse,
     SummarizeRequest,
     SummarizeResponse,
     ExpertRequest,
     ExpertResponse,
     SimilarThreadsRequest,
     SimilarThreadsResponse,
+    SimilarThreadsBatchRequest,
+    SimilarThreadsBatchItem,
+    SimilarThreadsBatchResponse,
 )
 from src.services.rag_service import RAGService
 from src.services.summarization_service import SummarizationService
 from src.services.expert_service import ExpertService
 from src.services.search_service import SearchService
 from src.core.langchain_adapter import LangChainAdapter
-from src.vector.qdrant_adapter import QdrantAdapter
-from src.embeddings.openai_embeddings import OpenAIEmbeddings
+from src.vector.factory import create_vector_store
+from src.embeddings.factory import create_embedding_service
 from src.utils.community_client import CommunityClient
 
 # Import shared types routes
@@ -37,8 +47,8 @@ router.include_router(shared_types_router)
 
 # Initialize components (singleton pattern for MVP)
 orchestrator = LangChainAdapter()
-vector_store = QdrantAdapter()
-embeddings = OpenAIEmbeddings()
+vector_store = create_vector_store()
+embeddings = create_embedding_service()
 community_client = CommunityClient()
 
 # Initialize services
@@ -72,15 +82,21 @@ search_service = SearchService(
     summary="Ask the AI Assistant",
     description="Query the assistant with a question and receive an AI-generated answer with sources",
 )
-async def ask_question(request: AskRequest) -> AskResponse:
+async def ask_question(request: AskRequest, response: Response) -> AskResponse:
     """
     Ask the Community Brain assistant a question.
     
     Uses RAG (Retrieval-Augmented Generation) to provide accurate answers
-    based on indexed community threads.
+    based on indexed community threads. ``X-Answer-Cache`` reports whether
+    the answer was served from the semantic answer cache.
     """
     try:
-        return await rag_service.ask(request)
+        answer, similarity = await rag_service.ask_with_cache_status(request)
+        if rag_service.cache is not None:
+            response.headers["X-Answer-Cache"] = "HIT" if similarity is not None else "MISS"
+            if similarity is not None:
+                response.headers["X-Answer-Cache-Similarity"] = f"{similarity:.4f}"
+        return answer
     except Exception as e:
         logger.error(f"Error in ask endpoint: {e}", exc_info=True)
         raise HTTPException(
@@ -89,6 +105,71 @@ async def ask_question(request: AskRequest) -> AskResponse:
         )
 
 
+@router.post(
+    "/ask/batch",
+    response_model=AskBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Ask the AI Assistant (batch)",
+    description="Answer several questions at once, with a result or error per question",
+)
+async def ask_questions_batch(request: AskBatchRequest) -> AskBatchResponse:
+    """
+    Answer several questions in one request.
+    
+    Questions are embedded together and share thread fetches. Results are
+    returned in request order; a question that fails carries an ``error``
+    instead of failing the batch.
+    """
+    try:
+        results = await rag_service.ask_batch(request.items)
+    except Exception as e:
+        logger.error(f"Error in batch ask endpoint: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process questions: {str(e)}"
+        )
+    return AskBatchResponse(results=[
+        AskBatchItem(error=f"Failed to process question: {str(result)}")
+        if isinstance(result, Exception) else AskBatchItem(response=result)
+        for result in results
+    ])
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post(
+    "/ask/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Ask the AI Assistant (streaming)",
+    description="Stream sources, answer tokens and a final done event as Server-Sent Events",
+    response_class=StreamingResponse,
+)
+async def ask_question_stream(request: AskRequest) -> StreamingResponse:
+    """
+    Ask the Community Brain assistant a question and stream the answer.
+    
+    Emits a ``sources`` event after retrieval, a ``token`` event per answer
+    chunk and a ``done`` event with confidence and time-to-first-token.
+    Failures after the stream has started are reported as an ``error`` event.
+    """
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event in rag_service.ask_stream(request):
+                yield _sse(event["event"], event["data"])
+        except Exception as e:
+            logger.error(f"Error in ask stream: {e}", exc_info=True)
+            yield _sse("error", {"detail": f"Failed to process question: {str(e)}"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post(
     "/summarize",
     response_model=SummarizeResponse,
@@ -158,3 +239,35 @@ async def find_similar_threads(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to find similar threads: {str(e)}"
         )
+
+
+@router.post(
+    "/similar/batch",
+    response_model=SimilarThreadsBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Find Similar Threads (batch)",
+    description="Find similar threads for several queries, with a result or error per query",
+)
+async def find_similar_threads_batch(
+    request: SimilarThreadsBatchRequest
+) -> SimilarThreadsBatchResponse:
+    """
+    Find similar threads for several queries in one request.
+    
+    Queries are embedded with a single call and searched concurrently.
+    Results are returned in request order; a query that fails carries an
+    ``error`` instead of failing the batch.
+    """
+    try:
+        results = await search_service.find_similar_batch(request.items)
+    except Exception as e:
+        logger.error(f"Error in batch similar endpoint: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to find similar threads: {str(e)}"
+        )
+    return SimilarThreadsBatchResponse(results=[
+        SimilarThreadsBatchItem(error=f"Failed to find similar threads: {str(result)}")
+        if isinstance(result, Exception) else SimilarThreadsBatchItem(response=result)
+        for result in results
+    ])
@@ -2,12 +2,57 @@
 Pydantic request and response schemas for API endpoints.
 """
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
+from src.vector.vector_store import Range, payload_timestamp
+
+MAX_BATCH_ITEMS = 50
+
+RetrievalMode = Literal["vector", "lexical", "hybrid"]
+ThreadStatus = Literal["OPEN", "ANSWERED", "CLOSED"]
+
 
 # Request Schemas
 
+class SearchFilters(BaseModel):
+    """Thread filters applied during retrieval."""
+
+    tags: Optional[List[str]] = Field(
+        default=None,
+        min_length=1,
+        description="Only threads with at least one of these tags"
+    )
+    status: Optional[List[ThreadStatus]] = Field(
+        default=None,
+        min_length=1,
+        description="Only threads with one of these statuses"
+    )
+    created_after: Optional[datetime] = Field(
+        default=None,
+        description="Only threads created at or after this time"
+    )
+    created_before: Optional[datetime] = Field(
+        default=None,
+        description="Only threads created at or before this time"
+    )
+
+    def to_conditions(self) -> Dict[str, Any]:
+        """Vector store filter conditions on the indexed payload fields."""
+        conditions: Dict[str, Any] = {}
+        if self.tags:
+            conditions["tags"] = self.tags
+        if self.status:
+            conditions["status"] = self.status
+        if self.created_after or self.created_before:
+            conditions["created_at_ts"] = Range(
+                gte=payload_timestamp(self.created_after),
+                lte=payload_timestamp(self.created_before)
+            )
+        return conditions
+
+
 class AskRequest(BaseModel):
     """Request schema for asking the AI assistant."""
 
@@ -26,6 +71,14 @@ class AskRequest(BaseModel):
         le=20,
         description="Number of similar threads to retrieve"
     )
+    retrieval_mode: Optional[RetrievalMode] = Field(
+        default=None,
+        description="Vector, lexical (BM25) or hybrid retrieval (defaults to the configured mode)"
+    )
+    filters: Optional[SearchFilters] = Field(
+        default=None,
+        description="Restrict retrieval by tag, status or creation date"
+    )
 
 
 class SummarizeRequest(BaseModel):
@@ -64,6 +117,34 @@ class SimilarThreadsRequest(BaseModel):
         le=20,
         description="Number of similar threads to return"
     )
+    retrieval_mode: Optional[RetrievalMode] = Field(
+        default=None,
+        description="Vector, lexical (BM25) or hybrid retrieval (defaults to the configured mode)"
+    )
+    filters: Optional[SearchFilters] = Field(
+        default=None,
+        description="Restrict retrieval by tag, status or creation date"
+    )
+
+
+class AskBatchRequest(BaseModel):
+    """Request schema for answering several questions at once."""
+
+    items: List[AskRequest] = Field(
+        min_length=1,
+        max_length=MAX_BATCH_ITEMS,
+        description="Questions to answer"
+    )
+
+
+class SimilarThreadsBatchRequest(BaseModel):
+    """Request schema for finding similar threads for several queries."""
+
+    items: List[SimilarThreadsRequest] = Field(
+        min_length=1,
+        max_length=MAX_BATCH_ITEMS,
+        description="Search queries"
+    )
 
 
 # Response Schemas
@@ -123,3 +204,29 @@ class SimilarThreadsResponse(BaseModel):
     """Response schema for similar threads endpoint."""
 
     threads: List[SimilarThread]
+
+
+class AskBatchItem(BaseModel):
+    """Answer to one question of a batch, or the error it failed with."""
+
+    response: Optional[AskResponse] = None
+    error: Optional[str] = None
+
+
+class AskBatchResponse(BaseModel):
+    """Response schema for batch ask endpoint, in request order."""
+
+    results: List[AskBatchItem]
+
+
+class SimilarThreadsBatchItem(BaseModel):
+    """Similar threads for one query of a batch, or the error it failed with."""
+
+    response: Optional[SimilarThreadsResponse] = None
+    error: Optional[str] = None
+
+
+class SimilarThreadsBatchResponse(BaseModel):
+    """Response schema for batch similar threads endpoint, in request order."""
+
+    results: List[SimilarThreadsBatchItem]
@@ -0,0 +1,336 @@
+"""
+Local stand-ins for the OpenAI API and the Community Service.
+
+Both are small FastAPI apps served on loopback ports, so the real OpenAI
+SDK, LangChain and httpx clients run unchanged against them. Nothing here
+reads the service settings: the harness binds the ports first, then
+points the settings at them.
+"""
+
+import asyncio
+import base64
+import json
+import re
+import socket
+import time
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import numpy as np
+import uvicorn
+from fastapi import Body, FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+WORD_RE = re.compile(r"\w+")
+
+TOPICS = [
+    ("kubernetes", ["pod", "deployment", "ingress", "helm", "node", "autoscaling"]),
+    ("postgres", ["index", "vacuum", "replication", "migration", "query", "deadlock"]),
+    ("react", ["hook", "render", "state", "suspense", "router", "context"]),
+    ("python", ["asyncio", "packaging", "typing", "virtualenv", "pytest", "gil"]),
+    ("auth", ["oauth", "token", "session", "sso", "jwt", "rotation"]),
+    ("ci", ["pipeline", "cache", "runner", "artifact", "matrix", "flaky"]),
+]
+PROBLEMS = ["fails after upgrade", "is slow under load", "times out", "leaks memory", "returns wrong results"]
+
+
+class FakeOpenAI:
+    """
+    OpenAI-compatible ``/v1/embeddings`` and ``/v1/chat/completions``.
+    
+    Embeddings are sums of per-word random vectors seeded by the word, so
+    they are deterministic and texts sharing words are close, which gives
+    vector search realistic neighbours. Chat completions return a fixed
+    answer, or a JSON summary when the prompt asks for JSON, and can be
+    streamed.
+    """
+    
+    def __init__(
+        self,
+        dim: int = 1536,
+        embedding_latency: float = 0.0,
+        chat_latency: float = 0.0,
+        completion_words: int = 60
+    ):
+        """
+        Initialize fake.
+        
+        Args:
+            dim: Embedding dimension
+            embedding_latency: Seconds added to every embeddings request
+            chat_latency: Seconds before a completion (or its first chunk)
+            completion_words: Words per generated answer
+        """
+        self.dim = dim
+        self.embedding_latency = embedding_latency
+        self.chat_latency = chat_latency
+        self.completion_words = completion_words
+        self.requests = {"embeddings": 0, "chat": 0}
+        self._word_vector = lru_cache(maxsize=65536)(self._make_word_vector)
+    
+    def _make_word_vector(self, word: str) -> np.ndarray:
+        rng = np.random.default_rng(zlib.crc32(word.encode("utf-8")))
+        return rng.standard_normal(self.dim).astype(np.float32)
+    
+    def embed(self, text: str) -> np.ndarray:
+        """Deterministic unit vector for a text."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in WORD_RE.findall(text.lower()):
+            vector += self._word_vector(word)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = 1.0
+            return vector
+        return vector / norm
+    
+    def app(self) -> FastAPI:
+        """Build the ASGI app."""
+        app = FastAPI()
+        
+        @app.post("/v1/embeddings")
+        async def embeddings(payload: Dict[str, Any] = Body(...)):
+            self.requests["embeddings"] += 1
+            if self.embedding_latency:
+                await asyncio.sleep(self.embedding_latency)
+            inputs = payload["input"]
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            as_base64 = payload.get("encoding_format") == "base64"
+            data = []
+            for index, text in enumerate(inputs):
+                vector = self.embed(text)
+                embedding = (
+                    base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+                    if as_base64 else vector.tolist()
+                )
+                data.append({"object": "embedding", "index": index, "embedding": embedding})
+            tokens = sum(len(text.split()) for text in inputs)
+            return {
+                "object": "list",
+                "data": data,
+                "model": payload.get("model", ""),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+            }
+        
+        @app.post("/v1/chat/completions")
+        async def chat_completions(payload: Dict[str, Any] = Body(...)):
+            self.requests["chat"] += 1
+            if self.chat_latency:
+                await asyncio.sleep(self.chat_latency)
+            prompt = "\n".join(str(message.get("content", "")) for message in payload["messages"])
+            content = self._completion(prompt)
+            model = payload.get("model", "")
+            created = int(time.time())
+            
+            if not payload.get("stream"):
+                return {
+                    "id": "chatcmpl-benchmark",
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {
+                        "prompt_tokens": len(prompt.split()),
+                        "completion_tokens": len(content.split()),
+                        "total_tokens": len(prompt.split()) + len(content.split())
+                    }
+                }
+            
+            async def events():
+                pieces = [{"role": "assistant", "content": ""}]
+                pieces += [{"content": word + " "} for word in content.split()]
+                for delta in pieces + [{}]:
+                    chunk = {
+                        "id": "chatcmpl-benchmark",
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": delta,
+                            "finish_reason": None if delta else "stop"
+                        }]
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+            
+            return StreamingResponse(events(), media_type="text/event-stream")
+        
+        return app
+    
+    def _completion(self, prompt: str) -> str:
+        words = " ".join(["benchmark"] * self.completion_words)
+        if "JSON format" in prompt:
+            return json.dumps({
+                "summary": f"Synthetic summary. {words}",
+                "key_points": ["First point", "Second point", "Third point"],
+                "consensus": "Synthetic consensus",
+                "open_questions": None
+            })
+        return f"Synthetic answer [1]. {words}"
+
+
+def synthetic_threads(count: int, posts_per_thread: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    Generate forum threads with posts, tags and authors.
+    
+    Args:
+        count: Number of threads
+        posts_per_thread: Replies per thread
+        seed: Random seed
+        
+    Returns:
+        Threads by ID, each with its ``posts``
+    """
+    rng = np.random.default_rng(seed)
+    threads: Dict[str, Dict[str, Any]] = {}
+    for index in range(count):
+        topic, terms = TOPICS[index % len(TOPICS)]
+        term = terms[int(rng.integers(len(terms)))]
+        problem = PROBLEMS[int(rng.integers(len(PROBLEMS)))]
+        thread_id = f"thread-{index}"
+        posts = []
+        for post_index in range(posts_per_thread):
+            author = int(rng.integers(50))
+            posts.append({
+                "id": f"{thread_id}-post-{post_index}",
+                "authorId": f"user-{author}",
+                "author": {"id": f"user-{author}", "name": f"User {author}"},
+                "content": (
+                    f"Have you checked the {term} settings? In my setup the {topic} "
+                    f"{term} {problem} until the configuration is changed. " * 3
+                ).strip(),
+                "isAcceptedAnswer": post_index == 0,
+                "upvotes": int(rng.integers(10)),
+                "createdAt": f"2024-01-{1 + post_index % 28:02d}T12:00:00Z"
+            })
+        author = int(rng.integers(50))
+        threads[thread_id] = {
+            "id": thread_id,
+            "title": f"{topic.capitalize()} {term} {problem} (#{index})",
+            "content": (
+                f"Our {topic} {term} {problem} since yesterday. We tried restarting and "
+                f"rolling back the {term} change without success. Logs show nothing unusual. " * 4
+            ).strip(),
+            "authorId": f"user-{author}",
+            "author": {"id": f"user-{author}", "name": f"User {author}"},
+            "tags": [topic, term],
+            "status": "ANSWERED" if posts_per_thread else "OPEN",
+            "createdAt": f"2024-{1 + index % 12:02d}-15T09:00:00Z",
+            "updatedAt": f"2024-{1 + index % 12:02d}-16T09:00:00Z",
+            "posts": posts
+        }
+    return threads
+
+
+class FakeCommunity:
+    """
+    Community Service thread, posts, bulk lookup and experts endpoints.
+    
+    Threads and unpaginated posts are returned bare, paginated posts and
+    bulk lookups in the ``{data, meta}`` envelope, like the real service.
+    """
+    
+    def __init__(self, threads: Dict[str, Dict[str, Any]], latency: float = 0.0):
+        """
+        Initialize fake.
+        
+        Args:
+            threads: Threads by ID, each with its ``posts``
+            latency: Seconds added to every request
+        """
+        self.threads = threads
+        self.latency = latency
+        self.requests = 0
+    
+    def _thread(self, thread_id: str) -> Dict[str, Any]:
+        thread = self.threads.get(thread_id)
+        if thread is None:
+            raise HTTPException(status_code=404, detail="Thread not found")
+        return {key: value for key, value in thread.items() if key != "posts"}
+    
+    def app(self) -> FastAPI:
+        """Build the ASGI app."""
+        app = FastAPI()
+        
+        @app.middleware("http")
+        async def latency(request: Request, call_next):
+            self.requests += 1
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return await call_next(request)
+        
+        @app.post("/api/threads/batch")
+        async def threads_batch(payload: Dict[str, Any] = Body(...)):
+            found = [self._thread(id) for id in payload.get("ids", []) if id in self.threads]
+            return {"success": True, "data": found}
+        
+        @app.get("/api/threads")
+        async def threads(limit: int = 10, offset: int = 0):
+            # Like the real service, the reported total is the page length
+            page = [self._thread(id) for id in list(self.threads)[offset:offset + limit]]
+            return {"success": True, "data": page, "meta": {"pagination": {"total": len(page)}}}
+        
+        @app.get("/api/threads/{thread_id}")
+        async def thread(thread_id: str):
+            return self._thread(thread_id)
+        
+        @app.get("/api/threads/{thread_id}/posts")
+        async def posts(thread_id: str, limit: Optional[int] = None, offset: int = 0):
+            self._thread(thread_id)
+            posts = self.threads[thread_id]["posts"]
+            if limit is None:
+                return posts
+            return {
+                "success": True,
+                "data": posts[offset:offset + limit],
+                "meta": {"pagination": {"total": len(posts), "limit": limit, "offset": offset}}
+            }
+        
+        @app.get("/api/users/experts")
+        async def experts(tags: str = "", limit: int = 5):
+            return {"success": True, "data": []}
+        
+        return app
+
+
+class LocalServer:
+    """
+    Serve an ASGI app on a loopback port inside the running event loop.
+    
+    The socket is bound on construction, so ``url`` is known before the
+    server starts (and before anything reads it from the settings).
+    """
+    
+    def __init__(self, app: Optional[FastAPI] = None):
+        self.app = app
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.socket.getsockname()[1]}"
+        self._server: Optional[uvicorn.Server] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start(self, app: Optional[FastAPI] = None) -> None:
+        """Start serving and wait until the server accepts connections."""
+        config = uvicorn.Config(
+            app or self.app, log_level="warning", access_log=False, lifespan="off", ws="none"
+        )
+        self._server = uvicorn.Server(config)
+        self._task = asyncio.create_task(self._server.serve(sockets=[self.socket]))
+        while not self._server.started:
+            if self._task.done():
+                self._task.result()
+            await asyncio.sleep(0.01)
+    
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._task
+        self.socket.close()
+
@@ -0,0 +1,359 @@
+"""
+End-to-end latency and throughput benchmark against local stand-ins.
+
+Runs the real app and indexing worker against fake OpenAI and Community
+servers (see ``fake_services``) and the in-process vector store, so
+results depend only on this service's code and the configured latency.
+The harness points ``OPENAI_BASE_URL``, ``COMMUNITY_SERVICE_URL`` and the
+vector store at the stand-ins; every other setting comes from the
+environment as usual, so features can be compared by toggling them.
+
+Usage:
+    python -m src.benchmark.run --json baseline.json
+    python -m src.benchmark.run --concurrency 32 --chat-latency-ms 400 --baseline baseline.json
+    ANSWER_CACHE_ENABLED=false python -m src.benchmark.run --scenarios ask,similar
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from src.benchmark.fake_services import FakeCommunity, FakeOpenAI, LocalServer, synthetic_threads
+
+SCENARIOS = ("index", "ask", "similar", "summarize")
+QUESTION_TEMPLATES = [
+    "How do I fix {topic} {term} that {problem}?",
+    "Why does {topic} {term} {problem} in production?",
+    "{topic} {term} {problem}, any ideas?",
+]
+
+
+class BenchmarkMessage:
+    """In-memory stand-in for an ``aio_pika.IncomingMessage``."""
+    
+    def __init__(self, payload: Dict[str, Any]):
+        self.body = json.dumps(payload).encode()
+    
+    def process(self) -> "BenchmarkMessage":
+        return self
+    
+    async def __aenter__(self) -> "BenchmarkMessage":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+    
+    async def ack(self) -> None:
+        return None
+    
+    async def nack(self, requeue: bool = True) -> None:
+        return None
+    
+    async def reject(self, requeue: bool = False) -> None:
+        return None
+
+
+async def drive(
+    send: Callable[[int], Awaitable[None]],
+    total: int,
+    concurrency: int
+) -> Dict[str, Any]:
+    """
+    Issue ``total`` operations from ``concurrency`` concurrent clients.
+    
+    Args:
+        send: Performs operation ``i``; raising counts as an error
+        total: Number of operations
+        concurrency: Concurrent clients
+        
+    Returns:
+        Latency percentiles (ms), throughput and error count
+    """
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+    
+    async def client() -> None:
+        nonlocal next_index, errors
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                await send(index)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(min(concurrency, total))))
+    return latency_stats(latencies, errors, time.perf_counter() - started)
+
+
+def latency_stats(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Summarize per-operation latencies (seconds) over a run of ``elapsed`` seconds."""
+    report: Dict[str, Any] = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    if latencies:
+        ms = np.asarray(latencies) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        report.update({
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "mean_ms": round(float(ms.mean()), 2),
+            "max_ms": round(float(ms.max()), 2)
+        })
+    return report
+
+
+def question_for(thread: Dict[str, Any], index: int) -> str:
+    """A question worded differently from the thread title but sharing its topic."""
+    topic, term = thread["tags"]
+    problem = thread["title"].split(f"{term} ", 1)[1].rsplit(" (#", 1)[0]
+    template = QUESTION_TEMPLATES[index % len(QUESTION_TEMPLATES)]
+    return template.format(topic=topic, term=term, problem=problem)
+
+
+def configure_environment(openai_url: str, community_url: str) -> None:
+    """Point the service settings at the stand-ins before anything imports them."""
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_BASE_URL"] = f"{openai_url}/v1"
+    os.environ["COMMUNITY_SERVICE_URL"] = community_url
+    os.environ["VECTOR_STORE_BACKEND"] = "numpy"
+    os.environ["LOCAL_VECTOR_STORE_PATH"] = ""
+    # Keep embedding cache hits from earlier runs out of the measurements
+    os.environ["EMBEDDING_CACHE_PATH"] = ""
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Start the stand-ins, index the synthetic threads and run each scenario.
+    
+    Returns:
+        Machine-readable report
+    """
+    threads = synthetic_threads(args.threads, args.posts, args.seed)
+    fake_openai = FakeOpenAI(
+        dim=args.dim,
+        embedding_latency=args.embedding_latency_ms / 1000,
+        chat_latency=args.chat_latency_ms / 1000,
+        completion_words=args.completion_words
+    )
+    fake_community = FakeCommunity(threads, latency=args.community_latency_ms / 1000)
+    openai_server = LocalServer(fake_openai.app())
+    community_server = LocalServer(fake_community.app())
+    configure_environment(openai_server.url, community_server.url)
+    
+    # Imported here so the settings singleton sees the environment above
+    from src.config.settings import settings
+    from src.main import create_app
+    from src.utils.http_pools import http_pools
+    from src.workers.indexing_worker import IndexingWorker
+    
+    # Per-request INFO logs would dominate the timings and the output
+    logging.getLogger().setLevel(args.log_level)
+    
+    await openai_server.start()
+    await community_server.start()
+    
+    report: Dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "threads": args.threads,
+            "posts_per_thread": args.posts,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "embedding_latency_ms": args.embedding_latency_ms,
+            "chat_latency_ms": args.chat_latency_ms,
+            "community_latency_ms": args.community_latency_ms,
+            "settings": {
+                "retrieval_mode_default": settings.retrieval_mode_default,
+                "chunk_indexing_enabled": settings.chunk_indexing_enabled,
+                "indexing_batch_enabled": settings.indexing_batch_enabled,
+                "embedding_batching_enabled": settings.embedding_batching_enabled,
+                "embedding_cache_enabled": settings.embedding_cache_enabled,
+                "answer_cache_enabled": settings.answer_cache_enabled,
+                "summary_cache_enabled": settings.summary_cache_enabled,
+                "community_cache_enabled": settings.community_cache_enabled,
+                "local_vector_index": settings.local_vector_index,
+                "vector_quantization": settings.vector_quantization
+            }
+        },
+        "scenarios": {}
+    }
+    
+    worker = IndexingWorker()
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_app()),
+        base_url="http://benchmark",
+        timeout=60.0
+    )
+    thread_ids = list(threads)
+    # Requests cycle through the threads in a scattered order
+    stride = 7919 if len(thread_ids) % 7919 else 1
+    
+    def thread_for(index: int) -> Dict[str, Any]:
+        return threads[thread_ids[index * stride % len(thread_ids)]]
+    
+    async def post(path: str, payload: Dict[str, Any]) -> None:
+        response = await client.post(path, json=payload)
+        response.raise_for_status()
+    
+    async def index(i: int) -> None:
+        # Indexing runs first so the thread list doubles as the corpus
+        await worker.process_message(BenchmarkMessage({
+            "type": "thread",
+            "threadId": thread_ids[i],
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }))
+    
+    async def index_batch(i: int) -> None:
+        batch = thread_ids[i * worker.batch_size:(i + 1) * worker.batch_size]
+        await worker.process_batch([
+            BenchmarkMessage({"type": "thread", "threadId": thread_id}) for thread_id in batch
+        ])
+    
+    async def ask(i: int) -> None:
+        await post("/api/ask", {"question": question_for(thread_for(i), i)})
+    
+    async def similar(i: int) -> None:
+        await post("/api/similar", {"query": question_for(thread_for(i), i)})
+    
+    async def summarize(i: int) -> None:
+        await post("/api/summarize", {"thread_id": thread_for(i)["id"]})
+    
+    scenarios: Dict[str, Callable[[int], Awaitable[None]]] = {
+        "ask": ask, "similar": similar, "summarize": summarize
+    }
+    try:
+        if "index" in args.scenarios or any(name in scenarios for name in args.scenarios):
+            if worker.batch_enabled:
+                batches = -(-len(thread_ids) // worker.batch_size)
+                stats = await drive(index_batch, batches, args.concurrency)
+                stats["messages_per_second"] = round(len(thread_ids) / stats["seconds"], 1)
+            else:
+                stats = await drive(index, len(thread_ids), args.concurrency)
+            if "index" in args.scenarios:
+                report["scenarios"]["index"] = stats
+        
+        for name in args.scenarios:
+            if name not in scenarios:
+                continue
+            # Warm-up requests open connections and load tokenizers before measuring
+            await drive(lambda i: scenarios[name](args.requests + i), args.warmup, args.concurrency)
+            report["scenarios"][name] = await drive(scenarios[name], args.requests, args.concurrency)
+    finally:
+        await client.aclose()
+        await worker.stop()
+        await http_pools.close()
+        await openai_server.stop()
+        await community_server.stop()
+    
+    report["upstream_requests"] = {
+        "openai_embeddings": fake_openai.requests["embeddings"],
+        "openai_chat": fake_openai.requests["chat"],
+        "community": fake_community.requests
+    }
+    return report
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """
+    Relative change of throughput and tail latency per scenario.
+    
+    Returns:
+        ``{scenario: {"rps": change, "p95_ms": change, "p99_ms": change}}``
+        as fractions (0.1 is 10% higher than the baseline)
+    """
+    changes: Dict[str, Dict[str, float]] = {}
+    for name, stats in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        changes[name] = {
+            key: round(stats[key] / previous[key] - 1, 4)
+            for key in ("rps", "p95_ms", "p99_ms")
+            if stats.get(key) is not None and previous.get(key)
+        }
+    return changes
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a human-readable summary table."""
+    config = report["config"]
+    print(
+        f"{config['threads']} threads x {config['posts_per_thread']} posts, "
+        f"{config['requests']} requests per scenario at concurrency {config['concurrency']}, "
+        f"latency: embeddings {config['embedding_latency_ms']}ms, chat {config['chat_latency_ms']}ms, "
+        f"community {config['community_latency_ms']}ms"
+    )
+    print(f"{'scenario':>10} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, stats in report["scenarios"].items():
+        print(
+            f"{name:>10} {stats['rps']:>9.1f} {stats.get('p50_ms', 0):>9.2f} "
+            f"{stats.get('p95_ms', 0):>9.2f} {stats.get('p99_ms', 0):>9.2f} {stats['errors']:>7}"
+        )
+    for name, change in report.get("baseline_change", {}).items():
+        deltas = ", ".join(f"{key} {value:+.1%}" for key, value in change.items())
+        print(f"{name:>10} vs baseline: {deltas}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: [name for name in value.split(",") if name],
+        default=list(SCENARIOS),
+        help=f"Comma-separated scenarios to run ({', '.join(SCENARIOS)})"
+    )
+    parser.add_argument("--threads", type=int, default=1000, help="Synthetic threads to index")
+    parser.add_argument("--posts", type=int, default=10, help="Posts per synthetic thread")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests before each scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0, help="Latency of each embeddings call")
+    parser.add_argument("--chat-latency-ms", type=float, default=0.0, help="Latency of each chat completion")
+    parser.add_argument("--completion-words", type=int, default=60, help="Words per generated completion")
+    parser.add_argument("--community-latency-ms", type=float, default=0.0, help="Latency of each Community call")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--log-level", default="WARNING", help="Log level while benchmarking")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the benchmark and print or save the report."""
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["baseline_change"] = compare(report, json.load(f))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ Application settings and configuration.
 Loads configuration from environment variables using pydantic-settings.
 """
 
-from typing import Literal
+from typing import Dict, Literal
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -35,6 +35,10 @@ class Settings(BaseSettings):
     openai_api_key: str = Field(
         description="OpenAI API key for embeddings and generation"
     )
+    openai_base_url: str = Field(
+        default="",
+        description="OpenAI-compatible API base URL, e.g. a proxy or local stand-in (empty for OpenAI)"
+    )
     openai_embedding_model: str = Field(
         default="text-embedding-3-small",
         description="OpenAI embedding model"
@@ -50,6 +54,177 @@ class Settings(BaseSettings):
         description="Temperature for LLM generation"
     )
 
+    # Prompt Context Configuration
+    context_token_budgets: Dict[str, int] = Field(
+        default={
+            "gpt-3.5-turbo": 3000,
+            "gpt-4": 6000,
+            "gpt-4-32k": 24000,
+            "gpt-4-turbo": 24000,
+            "gpt-4o": 24000,
+        },
+        description="Max tokens of retrieved context per LLM model (longest prefix match)"
+    )
+    context_token_budget_default: int = Field(
+        default=4000,
+        ge=256,
+        description="Context token budget for models without an entry"
+    )
+
+    # Summarization Configuration
+    summarize_map_reduce_threshold_tokens: int = Field(
+        default=6000,
+        ge=256,
+        description="Threads longer than this are summarized in segments, then combined"
+    )
+    summarize_segment_max_tokens: int = Field(
+        default=2500,
+        ge=128,
+        description="Max tokens of thread content per segment summary"
+    )
+    summarize_max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Max segment summaries generated concurrently per thread"
+    )
+    summary_cache_enabled: bool = Field(
+        default=True,
+        description="Cache summaries per thread version and update them incrementally"
+    )
+    summary_cache_ttl_seconds: float = Field(
+        default=86400.0,
+        gt=0.0,
+        description="Time after which a cached summary is checked against the thread again"
+    )
+    summary_cache_max_entries: int = Field(
+        default=2000,
+        ge=1,
+        description="Max number of cached thread summaries"
+    )
+    summary_refresh_min_hits: int = Field(
+        default=3,
+        ge=0,
+        description="Requests after which a stale summary is refreshed in the background (0 to disable)"
+    )
+    summary_refresh_delay_seconds: float = Field(
+        default=30.0,
+        ge=0.0,
+        description="Wait after a new post before refreshing, so bursts share one refresh"
+    )
+
+    # Embedding Configuration
+    embedding_batching_enabled: bool = Field(
+        default=False,
+        description="Coalesce concurrent single-text embedding calls into batches"
+    )
+    embedding_batch_window_ms: float = Field(
+        default=5.0,
+        ge=0.0,
+        description="Max time to wait for more texts before sending a batch"
+    )
+    embedding_batch_max_size: int = Field(
+        default=64,
+        ge=1,
+        le=2048,
+        description="Max number of texts per coalesced embedding request"
+    )
+    embedding_cache_enabled: bool = Field(
+        default=True,
+        description="Cache embeddings by a hash of (model, text)"
+    )
+    embedding_cache_memory_items: int = Field(
+        default=10000,
+        ge=1,
+        description="Max vectors kept in the in-memory LRU cache"
+    )
+    embedding_cache_path: str = Field(
+        default=".cache/embeddings.sqlite3",
+        description="SQLite file for the persistent embedding cache (empty to disable)"
+    )
+    embedding_cache_max_disk_items: int = Field(
+        default=500000,
+        ge=0,
+        description="Max vectors kept on disk (0 for unbounded)"
+    )
+
+    # Vector Store Configuration
+    vector_store_backend: Literal["qdrant", "numpy"] = Field(
+        default="qdrant",
+        description="Vector store backend (numpy keeps vectors in-process)"
+    )
+    local_vector_store_path: str = Field(
+        default=".cache/vectors",
+        description="Directory the in-process vector store persists to (empty to disable)"
+    )
+    local_vector_store_persist_every: int = Field(
+        default=1000,
+        ge=0,
+        description="Persist the in-process store after this many writes (0 for shutdown only)"
+    )
+    local_vector_index: Literal["flat", "ivf"] = Field(
+        default="flat",
+        description="Search index for the in-process store (flat is exact, ivf is approximate)"
+    )
+    local_ivf_lists: int = Field(
+        default=256,
+        ge=1,
+        description="Number of k-means partitions in the IVF index"
+    )
+    local_ivf_probe: int = Field(
+        default=16,
+        ge=1,
+        description="IVF partitions scanned per query (higher trades latency for recall)"
+    )
+    local_ivf_min_train_size: int = Field(
+        default=10000,
+        ge=1,
+        description="Vectors required before the IVF index is trained (exact search until then)"
+    )
+    vector_quantization: Literal["none", "int8", "binary"] = Field(
+        default="none",
+        description="Quantize stored vectors for a fast first search pass (Qdrant and numpy)"
+    )
+    vector_quantization_oversampling: float = Field(
+        default=3.0,
+        ge=1.0,
+        description="Candidates rescored with original vectors, as a multiple of top_k"
+    )
+    vector_originals_on_disk: bool = Field(
+        default=False,
+        description="Keep full-precision vectors on disk and only quantized vectors in RAM"
+    )
+
+    # Lexical and Hybrid Retrieval Configuration
+    lexical_index_enabled: bool = Field(
+        default=True,
+        description="Keep a BM25 index of thread titles and bodies for lexical and hybrid retrieval"
+    )
+    bm25_k1: float = Field(
+        default=1.2,
+        ge=0.0,
+        description="BM25 term frequency saturation"
+    )
+    bm25_b: float = Field(
+        default=0.75,
+        ge=0.0,
+        le=1.0,
+        description="BM25 document length normalization"
+    )
+    retrieval_mode_default: Literal["vector", "lexical", "hybrid"] = Field(
+        default="vector",
+        description="Retrieval mode for requests that don't choose one"
+    )
+    hybrid_rrf_k: int = Field(
+        default=60,
+        ge=1,
+        description="Reciprocal rank fusion constant (higher flattens the weight of top ranks)"
+    )
+    hybrid_candidate_multiplier: int = Field(
+        default=2,
+        ge=1,
+        description="Candidates taken from each hybrid leg, as a multiple of top_k"
+    )
+
     # Qdrant Configuration
     qdrant_url: str = Field(
         default="http://localhost:6333",
@@ -59,6 +234,24 @@ class Settings(BaseSettings):
         default="threads",
         description="Qdrant collection name for thread vectors"
     )
+    qdrant_write_batch_size: int = Field(
+        default=256,
+        ge=1,
+        description="Max points per Qdrant upsert/delete request"
+    )
+    qdrant_write_parallelism: int = Field(
+        default=1,
+        ge=1,
+        description="Max concurrent Qdrant write requests for bulk operations"
+    )
+    qdrant_write_wait: bool = Field(
+        default=True,
+        description="Wait for Qdrant to apply bulk writes before returning (always on for batched indexing)"
+    )
+    qdrant_write_ordering: Literal["weak", "medium", "strong"] = Field(
+        default="weak",
+        description="Write ordering guarantee for bulk Qdrant operations"
+    )
 
     # RabbitMQ Configuration
     rabbitmq_url: str = Field(
@@ -66,11 +259,189 @@ class Settings(BaseSettings):
         description="RabbitMQ connection URL"
     )
 
+    # Indexing Worker Configuration
+    indexing_prefetch_count: int = Field(
+        default=64,
+        ge=1,
+        description="Max unacknowledged messages delivered to the indexing worker"
+    )
+    indexing_batch_enabled: bool = Field(
+        default=False,
+        description="Index messages in batches instead of one at a time"
+    )
+    indexing_batch_size: int = Field(
+        default=32,
+        ge=1,
+        description="Max messages per indexing batch"
+    )
+    indexing_batch_timeout_ms: float = Field(
+        default=500.0,
+        ge=0.0,
+        description="Max time to wait for a batch to fill before indexing it"
+    )
+    indexing_coalesce_window_ms: float = Field(
+        default=0.0,
+        ge=0.0,
+        description="Debounce window for events of the same thread (0 to disable)"
+    )
+    indexing_coalesce_max_wait_ms: float = Field(
+        default=10000.0,
+        ge=0.0,
+        description="Max time a busy thread's events can be deferred by coalescing"
+    )
+    indexing_retry_backoff_ms: float = Field(
+        default=1000.0,
+        ge=0.0,
+        description="Delay before requeueing a failed thread's messages, doubled per attempt"
+    )
+    indexing_retry_max_backoff_ms: float = Field(
+        default=60000.0,
+        ge=0.0,
+        description="Upper bound on the requeue delay"
+    )
+    indexing_max_retries: int = Field(
+        default=8,
+        ge=0,
+        description="Failed attempts before a thread's messages are rejected (dead-lettered if configured)"
+    )
+    chunk_indexing_enabled: bool = Field(
+        default=False,
+        description="Index the thread body and posts as overlapping chunks (re-index after changing)"
+    )
+    chunk_max_tokens: int = Field(
+        default=256,
+        ge=16,
+        description="Max tokens per indexed chunk"
+    )
+    chunk_overlap_tokens: int = Field(
+        default=32,
+        ge=0,
+        description="Tokens repeated from the end of one chunk at the start of the next"
+    )
+    chunk_group_size: int = Field(
+        default=3,
+        ge=1,
+        description="Max matched chunks per thread returned by grouped search"
+    )
+
     # Community Service Configuration
     community_service_url: str = Field(
         default="http://localhost:4001",
         description="Community service base URL"
     )
+    community_max_concurrency: int = Field(
+        default=10,
+        ge=1,
+        description="Max concurrent requests when fetching threads in parallel"
+    )
+    community_posts_page_size: int = Field(
+        default=100,
+        ge=1,
+        le=1000,
+        description="Posts requested per page when streaming a thread's posts"
+    )
+    community_bulk_lookup_enabled: bool = Field(
+        default=True,
+        description="Try the bulk thread lookup endpoint before fanning out"
+    )
+    community_cache_enabled: bool = Field(
+        default=True,
+        description="Cache threads and posts fetched from the community service"
+    )
+    community_cache_ttl_seconds: float = Field(
+        default=600.0,
+        gt=0.0,
+        description="Max age of cached threads; indexing events invalidate sooner"
+    )
+    community_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        ge=0,
+        description="Max total size of cached community responses"
+    )
+
+    # HTTP Connection Pool Configuration
+    http_max_connections: int = Field(
+        default=100,
+        ge=1,
+        description="Max open connections per upstream (OpenAI, Community Service, Qdrant)"
+    )
+    http_pool_max_connections: Dict[str, int] = Field(
+        default={},
+        description="Per-upstream overrides of http_max_connections, e.g. {\"openai\": 20}"
+    )
+    http_max_keepalive_connections: int = Field(
+        default=20,
+        ge=0,
+        description="Idle connections kept open per upstream"
+    )
+    http_keepalive_expiry_seconds: float = Field(
+        default=60.0,
+        ge=0.0,
+        description="Time an idle connection is kept open"
+    )
+    http_pool_timeout_seconds: float = Field(
+        default=10.0,
+        gt=0.0,
+        description="Max wait for a free connection when an upstream's pool is full"
+    )
+    http2_enabled: bool = Field(
+        default=False,
+        description="Negotiate HTTP/2 with upstreams that support it (requires the h2 package)"
+    )
+    http_prewarm_connections: int = Field(
+        default=2,
+        ge=0,
+        description="Connections opened per upstream at startup (0 to disable)"
+    )
+
+    # Answer Cache Configuration
+    answer_cache_enabled: bool = Field(
+        default=True,
+        description="Serve /api/ask answers for near-identical questions from cache"
+    )
+    answer_cache_similarity_threshold: float = Field(
+        default=0.95,
+        ge=0.0,
+        le=1.0,
+        description="Minimum cosine similarity between questions for a cache hit"
+    )
+    answer_cache_ttl_seconds: float = Field(
+        default=3600,
+        ge=0,
+        description="Time after which cached answers expire"
+    )
+    answer_cache_max_entries: int = Field(
+        default=1000,
+        ge=1,
+        description="Max number of cached answers (least recently used are evicted)"
+    )
+
+    # Expert Index Configuration
+    expert_index_enabled: bool = Field(
+        default=True,
+        description="Rank experts from a local index built by the indexing worker"
+    )
+    expert_score_weights: Dict[str, float] = Field(
+        default={
+            "threads": 1.0,
+            "posts": 1.0,
+            "accepted_answers": 5.0,
+            "upvotes": 0.5,
+        },
+        description="Weight of threads, posts, accepted_answers and upvotes in expert scores"
+    )
+    expert_score_saturation: float = Field(
+        default=20.0,
+        gt=0.0,
+        description="Weighted score at which a user's expertise score reaches 0.5"
+    )
+
+    def context_token_budget(self, model: str) -> int:
+        """Context token budget for a model, matching the longest known prefix."""
+        matches = [name for name in self.context_token_budgets if model.startswith(name)]
+        if not matches:
+            return self.context_token_budget_default
+        return self.context_token_budgets[max(matches, key=len)]
 
     @property
     def is_development(self) -> bool:
@@ -0,0 +1,247 @@
+"""
+Token-budgeted context assembly for RAG prompts.
+"""
+
+import logging
+import math
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.utils.metrics import metrics
+from src.utils.tokens import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r"\w+")
+# Paragraph breaks, or whitespace after sentence-ending punctuation
+PASSAGE_SPLIT_RE = re.compile(r"\n\s*\n|(?<=[.!?])\s+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it my of on or "
+    "the to was what when where which who why with you your".split()
+)
+GAP_MARKER = " … "
+
+CONTEXT_TOKEN_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+def _terms(text: str) -> Set[str]:
+    """Lowercased content words of a text."""
+    return {word for word in WORD_RE.findall(text.lower()) if word not in STOPWORDS}
+
+
+def _shingles(text: str, size: int = 3, max_words: int = 2000) -> Set[Tuple[str, ...]]:
+    """Word n-grams used to detect near-identical documents."""
+    words = WORD_RE.findall(text.lower())[:max_words]
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class ContextBuilder:
+    """
+    Builds the numbered context block for a prompt within a token budget.
+    
+    Near-duplicate sources are dropped first. The budget is then shared
+    between sources in proportion to their relevance score, discounted by
+    rank; sources needing less than their share release the remainder to
+    the others. Sources that don't fit are cut down to the passages that
+    share the most terms with the question. Kept sources keep their
+    number, so ``[n]`` citations match the n-th source shown to the user.
+    """
+    
+    def __init__(
+        self,
+        model: str,
+        max_tokens: int,
+        min_source_tokens: int = 48,
+        dedupe_threshold: float = 0.9
+    ):
+        """
+        Initialize context builder.
+        
+        Args:
+            model: Model name used to pick the tokenizer
+            max_tokens: Token budget for the whole context block
+            min_source_tokens: Sources that would get fewer tokens are dropped
+            dedupe_threshold: Shingle Jaccard similarity above which a source
+                is treated as a duplicate of a higher-ranked one
+        """
+        self.tokenizer = get_tokenizer(model)
+        self.max_tokens = max_tokens
+        self.min_source_tokens = min_source_tokens
+        self.dedupe_threshold = dedupe_threshold
+        
+        self._context_tokens = metrics.histogram(
+            "llm_context_tokens",
+            "Tokens in the assembled RAG context",
+            buckets=CONTEXT_TOKEN_BUCKETS
+        )
+        self._duplicates = metrics.counter(
+            "llm_context_sources_dropped_total",
+            "Sources left out of the RAG context",
+            labels={"reason": "duplicate"}
+        )
+        self._over_budget = metrics.counter(
+            "llm_context_sources_dropped_total",
+            "Sources left out of the RAG context",
+            labels={"reason": "budget"}
+        )
+    
+    def build(self, context_docs: List[Dict[str, Any]], question: str = "") -> str:
+        """
+        Build the context string.
+        
+        Args:
+            context_docs: Documents in rank order with ``title``, ``content``
+                and optionally ``score`` and ``rank`` (the 1-based number to
+                cite them by, defaulting to their position)
+            question: Question used to pick the most relevant passages
+            
+        Returns:
+            Numbered context block
+        """
+        numbered = self._dedupe([
+            (doc.get("rank", position), doc) for position, doc in enumerate(context_docs, 1)
+        ])
+        numbers = [number for number, _ in numbered]
+        docs = [doc for _, doc in numbered]
+        headers = [
+            f"[{number}] {doc.get('title', 'Untitled')}\n" for number, doc in zip(numbers, docs)
+        ]
+        contents = [doc.get("content", "") or "" for doc in docs]
+        needs = [
+            self.tokenizer.count(header) + self.tokenizer.count(content)
+            for header, content in zip(headers, contents)
+        ]
+        weights = [
+            max(float(doc.get("score", 1.0) or 0.0), 0.05) / math.sqrt(rank + 1)
+            for rank, doc in enumerate(docs)
+        ]
+        
+        # Drop the lowest-ranked sources until every remaining one gets a useful share
+        active = list(range(len(docs)))
+        while True:
+            budgets = self._allocate(active, needs, weights)
+            starved = [
+                i for i in active
+                if budgets[i] < min(needs[i], self.min_source_tokens)
+            ]
+            if not starved:
+                break
+            active.remove(max(starved))
+            self._over_budget.inc()
+        
+        terms = _terms(question)
+        parts = []
+        for i in active:
+            content = contents[i]
+            if budgets[i] < needs[i]:
+                content_budget = budgets[i] - self.tokenizer.count(headers[i])
+                content = self._fit(content, content_budget, terms)
+            parts.append(f"{headers[i]}{content}\n")
+        
+        context = "\n".join(parts)
+        self._context_tokens.observe(self.tokenizer.count(context))
+        return context
+    
+    def _dedupe(
+        self,
+        context_docs: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """Keep the highest-ranked copy of near-identical numbered documents."""
+        kept: List[Tuple[int, Dict[str, Any]]] = []
+        kept_shingles: List[Set[Tuple[str, ...]]] = []
+        for number, doc in context_docs:
+            shingles = _shingles(f"{doc.get('title', '')} {doc.get('content', '')}")
+            duplicate = any(
+                len(shingles & other) / max(len(shingles | other), 1) >= self.dedupe_threshold
+                for other in kept_shingles
+            )
+            if duplicate:
+                self._duplicates.inc()
+                logger.debug(f"Dropping near-duplicate source {doc.get('thread_id', '')}")
+                continue
+            kept.append((number, doc))
+            kept_shingles.append(shingles)
+        return kept
+    
+    def _allocate(
+        self,
+        active: List[int],
+        needs: List[int],
+        weights: List[float]
+    ) -> Dict[int, int]:
+        """
+        Split the budget by weight, redistributing what small sources don't use.
+        
+        Args:
+            active: Indexes of sources to include
+            needs: Tokens each source needs in full
+            weights: Relative share of each source
+            
+        Returns:
+            Token budget per active source index
+        """
+        budgets: Dict[int, int] = {}
+        remaining = self.max_tokens - max(len(active) - 1, 0)  # Joining newlines
+        unresolved = set(active)
+        while unresolved:
+            total_weight = sum(weights[i] for i in unresolved)
+            satisfied = [
+                i for i in unresolved
+                if needs[i] <= remaining * weights[i] / total_weight
+            ]
+            if not satisfied:
+                for i in unresolved:
+                    budgets[i] = int(remaining * weights[i] / total_weight)
+                break
+            for i in satisfied:
+                budgets[i] = needs[i]
+                remaining -= needs[i]
+                unresolved.discard(i)
+        return budgets
+    
+    def _fit(self, content: str, max_tokens: int, terms: Set[str]) -> str:
+        """
+        Shorten content to the passages most relevant to the question.
+        
+        Args:
+            content: Full source text
+            max_tokens: Token budget for the content
+            terms: Content words of the question
+            
+        Returns:
+            Selected passages in their original order, with gaps marked
+        """
+        passages = [p.strip() for p in PASSAGE_SPLIT_RE.split(content) if p and p.strip()]
+        if not passages:
+            return ""
+        
+        def relevance(index: int) -> float:
+            overlap = len(terms & _terms(passages[index]))
+            # The opening passage usually states the problem
+            return overlap + (0.5 if index == 0 else 0.0)
+        
+        gap_tokens = self.tokenizer.count(GAP_MARKER)
+        selected: List[int] = []
+        used = 0
+        for index in sorted(range(len(passages)), key=lambda i: (-relevance(i), i)):
+            cost = self.tokenizer.count(passages[index]) + gap_tokens
+            if used + cost <= max_tokens:
+                selected.append(index)
+                used += cost
+            elif not selected:
+                return self.tokenizer.truncate(passages[index], max_tokens - gap_tokens) + GAP_MARKER.rstrip()
+        
+        selected.sort()
+        text = ""
+        previous: Optional[int] = None
+        for index in selected:
+            if previous is None:
+                text = passages[index] if index == 0 else GAP_MARKER.lstrip() + passages[index]
+            else:
+                text += (" " if index == previous + 1 else GAP_MARKER) + passages[index]
+            previous = index
+        if previous != len(passages) - 1:
+            text += GAP_MARKER.rstrip()
+        return text
@@ -4,13 +4,19 @@ LangChain adapter for LLM orchestration.
 
 import logging
 import json
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List
 
+import httpx
 from langchain_openai import ChatOpenAI
+from openai import AsyncOpenAI
 from langchain.prompts import ChatPromptTemplate
 
+from src.core.context_builder import ContextBuilder
 from src.core.orchestrator import Orchestrator
 from src.config.settings import settings
+from src.utils.http_pools import HTTPPools, PooledClient, http_pools
+from src.utils.metrics import metrics
+from src.utils.tokens import get_tokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -18,13 +24,43 @@ logger = logging.getLogger(__name__)
 class LangChainAdapter(Orchestrator):
     """LangChain-based orchestrator implementation."""
     
-    def __init__(self):
-        """Initialize LangChain ChatOpenAI."""
-        self.llm = ChatOpenAI(
+    def __init__(self, pools: HTTPPools = http_pools):
+        """
+        Initialize LangChain ChatOpenAI.
+        
+        Args:
+            pools: Connection pools; async calls use the shared ``openai`` pool
+        """
+        self._completions = PooledClient(pools, "openai", self._build_completions, timeout=600.0)
+        self._llm = ChatOpenAI(
             model=settings.openai_llm_model,
             temperature=settings.openai_temperature,
-            openai_api_key=settings.openai_api_key
+            openai_api_key=settings.openai_api_key,
+            openai_api_base=settings.openai_base_url or None,
+            async_client=self._completions.get()
         )
+        self.context_builder = ContextBuilder(
+            model=settings.openai_llm_model,
+            max_tokens=settings.context_token_budget(settings.openai_llm_model)
+        )
+        self.tokenizer = get_tokenizer(settings.openai_llm_model)
+    
+    @property
+    def llm(self) -> ChatOpenAI:
+        """Chat model, re-attached to the pool if it was reopened."""
+        completions = self._completions.get()
+        if self._llm.async_client is not completions:
+            self._llm.async_client = completions
+        return self._llm
+    
+    @staticmethod
+    def _build_completions(http_client: httpx.AsyncClient) -> Any:
+        return AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url or None,
+            http_client=http_client,
+            timeout=http_client.timeout
+        ).chat.completions
     
     async def answer_question(
         self,
@@ -33,35 +69,14 @@ class LangChainAdapter(Orchestrator):
     ) -> Dict[str, Any]:
         """Answer question using RAG with LangChain."""
         try:
-            # Build context string
-            context = self._build_context(context_docs)
-            
-            # Create prompt template
-            system_prompt = """You are Braintrust AI, a helpful assistant for the Community Brain Q&A platform.
-
-Use the following context from previous discussions to answer the question. If you don't know the answer based on the context, say so clearly - don't make up information.
-
-CONTEXT:
-{context}
-
-Provide a clear, concise, and helpful answer. If relevant, cite sources using [number] notation."""
-            
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_prompt),
-                ("human", "{question}")
-            ])
-            
-            # Build chain
-            chain = prompt | self.llm
-            
             # Generate answer
-            response = await chain.ainvoke({
-                "context": context,
+            answer = await self._invoke("answer", self._answer_prompt(), {
+                "context": self._build_context(context_docs, question),
                 "question": question
             })
             
             return {
-                "answer": response.content,
+                "answer": answer,
                 "model": settings.openai_llm_model,
                 "temperature": settings.openai_temperature
             }
@@ -69,6 +84,33 @@ Provide a clear, concise, and helpful answer. If relevant, cite sources using [n
             logger.error(f"Error generating answer: {e}")
             raise
     
+    async def stream_answer(
+        self,
+        question: str,
+        context_docs: List[Dict[str, Any]]
+    ) -> AsyncIterator[str]:
+        """Stream answer tokens using the chat model's async streaming."""
+        try:
+            prompt = self._answer_prompt()
+            inputs = {
+                "context": self._build_context(context_docs, question),
+                "question": question
+            }
+            self._count_tokens("stream_answer", "prompt", prompt.format(**inputs))
+            
+            streamed: List[str] = []
+            try:
+                async for chunk in (prompt | self.llm).astream(inputs):
+                    if chunk.content:
+                        streamed.append(chunk.content)
+                        yield chunk.content
+            finally:
+                # Counted on disconnect too; those tokens were still generated
+                self._count_tokens("stream_answer", "completion", "".join(streamed))
+        except Exception as e:
+            logger.error(f"Error streaming answer: {e}")
+            raise
+    
     async def summarize(self, thread_content: str) -> Dict[str, Any]:
         """Summarize thread content using LangChain."""
         try:
@@ -95,36 +137,175 @@ Ensure the JSON is valid."""
                 ("human", "Please summarize this thread.")
             ])
             
-            # Build chain
-            chain = prompt | self.llm
-            
             # Generate summary
-            response = await chain.ainvoke({
+            content = await self._invoke("summarize", prompt, {
                 "content": thread_content
             })
             
-            # Parse JSON response
-            try:
-                result = json.loads(response.content)
-            except json.JSONDecodeError:
-                # Fallback if JSON parsing fails
-                result = {
-                    "summary": response.content,
-                    "key_points": [],
-                    "consensus": None,
-                    "open_questions": None
-                }
-            
-            return result
+            return self._parse_summary(content)
         except Exception as e:
             logger.error(f"Error generating summary: {e}")
             raise
     
-    def _build_context(self, context_docs: List[Dict[str, Any]]) -> str:
-        """Build context string from documents."""
-        context_parts = []
-        for idx, doc in enumerate(context_docs, 1):
-            title = doc.get("title", "Untitled")
-            content = doc.get("content", "")
-            context_parts.append(f"[{idx}] {title}\n{content}\n")
-        return "\n".join(context_parts)
+    async def summarize_segment(self, segment_content: str) -> str:
+        """Summarize one segment of a long thread into notes for the combine step."""
+        try:
+            system_prompt = """You are a thread summarization assistant for Community Brain.
+
+The following is one part of a long discussion thread. Write concise notes on this part only: the problems raised, proposed solutions, decisions or agreement reached, and questions left unanswered. Keep names of people and technologies. Do not add information that is not in the text.
+
+THREAD PART:
+{content}"""
+            
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system_prompt),
+                ("human", "Write the notes for this part.")
+            ])
+            
+            return await self._invoke("summarize_segment", prompt, {"content": segment_content})
+        except Exception as e:
+            logger.error(f"Error summarizing thread segment: {e}")
+            raise
+    
+    async def combine_summaries(self, title: str, partial_summaries: List[str]) -> Dict[str, Any]:
+        """Combine segment notes into the structured thread summary."""
+        try:
+            system_prompt = """You are a thread summarization assistant for Community Brain.
+
+A long discussion thread was split into consecutive parts and each part was summarized. Combine the notes below into one summary of the whole thread. Later parts may answer questions raised in earlier ones.
+
+THREAD TITLE: {title}
+
+NOTES BY PART:
+{notes}
+
+Provide your response in the following JSON format:
+{{
+    "summary": "A 2-3 sentence executive summary",
+    "key_points": ["Point 1", "Point 2", "Point 3"],
+    "consensus": "Main consensus or conclusion (if any)",
+    "open_questions": ["Question 1", "Question 2"] or null
+}}
+
+Ensure the JSON is valid."""
+            
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system_prompt),
+                ("human", "Please summarize this thread.")
+            ])
+            
+            notes = "\n\n".join(
+                f"Part {idx}:\n{summary}" for idx, summary in enumerate(partial_summaries, 1)
+            )
+            content = await self._invoke("combine_summaries", prompt, {"title": title, "notes": notes})
+            return self._parse_summary(content)
+        except Exception as e:
+            logger.error(f"Error combining thread summaries: {e}")
+            raise
+    
+    async def update_summary(self, previous: Dict[str, Any], new_content: str) -> Dict[str, Any]:
+        """Fold new replies into an existing structured summary."""
+        try:
+            system_prompt = """You are a thread summarization assistant for Community Brain.
+
+Below is the summary of a discussion thread, followed by the replies posted since it was written. Update the summary so it covers the whole thread: add new points, record any consensus that was reached, and remove open questions that the new replies answered.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW REPLIES:
+{content}
+
+Provide your response in the following JSON format:
+{{
+    "summary": "A 2-3 sentence executive summary",
+    "key_points": ["Point 1", "Point 2", "Point 3"],
+    "consensus": "Main consensus or conclusion (if any)",
+    "open_questions": ["Question 1", "Question 2"] or null
+}}
+
+Ensure the JSON is valid."""
+            
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system_prompt),
+                ("human", "Please update the summary.")
+            ])
+            
+            content = await self._invoke("update_summary", prompt, {
+                "summary": json.dumps(previous, indent=2),
+                "content": new_content
+            })
+            return self._parse_summary(content)
+        except Exception as e:
+            logger.error(f"Error updating summary: {e}")
+            raise
+    
+    async def _invoke(
+        self,
+        operation: str,
+        prompt: ChatPromptTemplate,
+        inputs: Dict[str, Any]
+    ) -> str:
+        """
+        Run a prompt through the model and count its tokens.
+        
+        Args:
+            operation: Label for the token counter
+            prompt: Prompt template
+            inputs: Template variables
+            
+        Returns:
+            Response content
+        """
+        self._count_tokens(operation, "prompt", prompt.format(**inputs))
+        response = await (prompt | self.llm).ainvoke(inputs)
+        self._count_tokens(operation, "completion", response.content)
+        return response.content
+    
+    def _count_tokens(self, operation: str, kind: str, text: str) -> None:
+        """
+        Add to ``llm_tokens_total``.
+        
+        This langchain version doesn't expose the API's usage numbers, so
+        tokens are counted locally with the model's tokenizer (message
+        framing overhead is not included).
+        """
+        metrics.counter(
+            "llm_tokens_total",
+            "LLM tokens by operation and kind (prompt or completion)",
+            labels={"operation": operation, "kind": kind}
+        ).inc(self.tokenizer.count(text))
+    
+    @staticmethod
+    def _parse_summary(content: str) -> Dict[str, Any]:
+        """Parse the JSON summary, falling back to the raw text."""
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            # Fallback if JSON parsing fails
+            return {
+                "summary": content,
+                "key_points": [],
+                "consensus": None,
+                "open_questions": None
+            }
+    
+    def _answer_prompt(self) -> ChatPromptTemplate:
+        """Prompt template for answering questions from context."""
+        system_prompt = """You are Braintrust AI, a helpful assistant for the Community Brain Q&A platform.
+
+Use the following context from previous discussions to answer the question. If you don't know the answer based on the context, say so clearly - don't make up information.
+
+CONTEXT:
+{context}
+
+Provide a clear, concise, and helpful answer. If relevant, cite sources using [number] notation."""
+        
+        return ChatPromptTemplate.from_messages([
+            ("system", system_prompt),
+            ("human", "{question}")
+        ])
+    
+    def _build_context(self, context_docs: List[Dict[str, Any]], question: str = "") -> str:
+        """Build a token-budgeted context string from ranked documents."""
+        return self.context_builder.build(context_docs, question)
@@ -3,7 +3,7 @@ Abstract orchestrator interface for LLM operations.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List
 
 
 class Orchestrator(ABC):
@@ -27,6 +27,24 @@ class Orchestrator(ABC):
         """
         pass
     
+    @abstractmethod
+    def stream_answer(
+        self,
+        question: str,
+        context_docs: List[Dict[str, Any]]
+    ) -> AsyncIterator[str]:
+        """
+        Answer a question, yielding answer text as it is generated.
+        
+        Args:
+            question: User's question
+            context_docs: List of context documents
+            
+        Returns:
+            Async iterator of answer text chunks
+        """
+        pass
+    
     @abstractmethod
     async def summarize(self, thread_content: str) -> Dict[str, Any]:
         """
@@ -39,3 +57,44 @@ class Orchestrator(ABC):
             Dict with summary components
         """
         pass
+    
+    @abstractmethod
+    async def summarize_segment(self, segment_content: str) -> str:
+        """
+        Summarize one segment of a long thread for a later combine step.
+        
+        Args:
+            segment_content: Part of the thread content
+            
+        Returns:
+            Concise notes on the segment
+        """
+        pass
+    
+    @abstractmethod
+    async def combine_summaries(self, title: str, partial_summaries: List[str]) -> Dict[str, Any]:
+        """
+        Combine segment summaries into one structured thread summary.
+        
+        Args:
+            title: Thread title
+            partial_summaries: Segment summaries in thread order
+            
+        Returns:
+            Dict with summary components, as returned by ``summarize``
+        """
+        pass
+    
+    @abstractmethod
+    async def update_summary(self, previous: Dict[str, Any], new_content: str) -> Dict[str, Any]:
+        """
+        Update a thread summary with replies posted since it was generated.
+        
+        Args:
+            previous: Summary components generated earlier
+            new_content: Only the new replies
+            
+        Returns:
+            Dict with updated summary components
+        """
+        pass
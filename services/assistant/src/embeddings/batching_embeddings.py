@@ -0,0 +1,164 @@
+"""
+Micro-batching wrapper that coalesces concurrent single-text embedding calls.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.embeddings.embedding_service import EmbeddingService
+from src.config.settings import settings
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+QUEUE_WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+# (text, caller future, enqueue time)
+PendingRequest = Tuple[str, asyncio.Future, float]
+
+
+class BatchingEmbeddings(EmbeddingService):
+    """
+    Embedding service that groups concurrent ``embed_text`` calls.
+    
+    Requests arriving within ``window_ms`` of the first pending request (or
+    until ``max_batch_size`` is reached) are sent to the wrapped service as a
+    single ``embed_batch`` call and each caller receives its own vector.
+    """
+    
+    def __init__(
+        self,
+        inner: EmbeddingService,
+        window_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None
+    ):
+        """
+        Initialize batching wrapper.
+        
+        Args:
+            inner: Embedding service that performs the actual requests
+            window_ms: Max time to wait for more requests before flushing
+            max_batch_size: Flush immediately once this many requests are queued
+        """
+        self.inner = inner
+        self.window = (
+            window_ms if window_ms is not None else settings.embedding_batch_window_ms
+        ) / 1000.0
+        self.max_batch_size = max_batch_size or settings.embedding_batch_max_size
+        
+        self._pending: List[PendingRequest] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+        
+        self._batch_size = metrics.histogram(
+            "embedding_batch_size",
+            "Number of texts per coalesced embedding request",
+            buckets=BATCH_SIZE_BUCKETS
+        )
+        self._queue_wait = metrics.histogram(
+            "embedding_batch_queue_wait_seconds",
+            "Time an embed_text call waited before its batch was sent",
+            buckets=QUEUE_WAIT_BUCKETS
+        )
+    
+    async def embed_text(self, text: str) -> List[float]:
+        """Queue a text for the next batch and wait for its vector."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((text, future, loop.time()))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        
+        return await future
+    
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Explicit batches are already coalesced, so pass them through."""
+        return await self.inner.embed_batch(texts)
+    
+    async def flush(self) -> None:
+        """Send any queued requests now and wait for in-flight batches."""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+    
+    def _flush(self) -> None:
+        """Hand the currently queued requests to a background batch task."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+    
+    async def _run_batch(self, batch: List[PendingRequest]) -> None:
+        """Embed one batch and resolve each caller's future."""
+        now = asyncio.get_running_loop().time()
+        for _, _, enqueued_at in batch:
+            self._queue_wait.observe(now - enqueued_at)
+        
+        # Callers that gave up while queued don't need a vector
+        batch = [request for request in batch if not request[1].done()]
+        if not batch:
+            return
+        
+        # Identical texts in the same window share one input slot
+        unique_texts: List[str] = []
+        positions: Dict[str, int] = {}
+        for text, _, _ in batch:
+            if text not in positions:
+                positions[text] = len(unique_texts)
+                unique_texts.append(text)
+        
+        self._batch_size.observe(len(unique_texts))
+        
+        try:
+            vectors = await self.inner.embed_batch(unique_texts)
+            if len(vectors) != len(unique_texts):
+                raise ValueError(
+                    f"Expected {len(unique_texts)} embeddings, got {len(vectors)}"
+                )
+        except Exception as e:
+            if len(unique_texts) == 1:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            
+            # Retry individually so a bad input only fails its own caller
+            logger.warning(
+                f"Batch embedding of {len(unique_texts)} texts failed, "
+                f"retrying individually: {e}"
+            )
+            await asyncio.gather(*(
+                self._run_single(text, [f for t, f, _ in batch if t == text])
+                for text in unique_texts
+            ))
+            return
+        
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(vectors[positions[text]])
+    
+    async def _run_single(self, text: str, futures: List[asyncio.Future]) -> None:
+        """Embed one text and resolve every future waiting on it."""
+        try:
+            vector = await self.inner.embed_text(text)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for future in futures:
+            if not future.done():
+                future.set_result(vector)
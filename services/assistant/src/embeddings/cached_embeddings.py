@@ -0,0 +1,279 @@
+"""
+Content-addressed embedding cache with an in-memory LRU and on-disk store.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from src.embeddings.embedding_service import EmbeddingService
+from src.config.settings import settings
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    """Hash (model, text) into a stable cache key."""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SQLiteEmbeddingStore:
+    """Persistent float32 vector store backed by SQLite."""
+    
+    def __init__(self, path: str, model: str, max_items: int = 0):
+        """
+        Open (or create) the on-disk store.
+        
+        Args:
+            path: SQLite database file path
+            model: Embedding model the stored vectors belong to
+            max_items: Max rows to keep (0 for unbounded)
+        """
+        self.path = path
+        self.model = model
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._invalidate_on_model_change()
+        self._conn.commit()
+    
+    def _invalidate_on_model_change(self) -> None:
+        """Drop all stored vectors if they were produced by another model."""
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE name = 'model'"
+        ).fetchone()
+        if row and row[0] != self.model:
+            logger.info(
+                f"Embedding model changed from {row[0]} to {self.model}, "
+                "clearing on-disk embedding cache"
+            )
+            self._conn.execute("DELETE FROM embeddings")
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('model', ?)",
+            (self.model,)
+        )
+    
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Load the vectors stored for the given keys."""
+        if not keys:
+            return {}
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            # Stay well below SQLite's host parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+        return found
+    
+    def put_many(self, items: Dict[str, List[float]]) -> int:
+        """
+        Store vectors as float32.
+        
+        Returns:
+            Number of rows evicted to respect ``max_items``
+        """
+        if not items:
+            return 0
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) "
+                "VALUES (?, ?, ?)",
+                [
+                    (key, array("f", vector).tobytes(), now)
+                    for key, vector in items.items()
+                ]
+            )
+            evicted = 0
+            self._writes_since_prune += len(items)
+            if self.max_items and self._writes_since_prune >= 100:
+                evicted = self._prune()
+                self._writes_since_prune = 0
+            self._conn.commit()
+        return evicted
+    
+    def _prune(self) -> int:
+        """Delete the oldest rows above ``max_items``."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_items
+        if excess <= 0:
+            return 0
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY created_at LIMIT ?)",
+            (excess,)
+        )
+        return excess
+    
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(EmbeddingService):
+    """
+    Embedding service that caches vectors by a hash of (model, text).
+    
+    Lookups hit a bounded in-memory LRU first, then the optional on-disk
+    store; only texts missing from both are sent to the wrapped service.
+    """
+    
+    def __init__(
+        self,
+        inner: EmbeddingService,
+        model: Optional[str] = None,
+        max_memory_items: Optional[int] = None,
+        store: Optional[SQLiteEmbeddingStore] = None
+    ):
+        """
+        Initialize embedding cache.
+        
+        Args:
+            inner: Embedding service used on cache misses
+            model: Embedding model name, part of every cache key
+            max_memory_items: Capacity of the in-memory LRU
+            store: Optional persistent second tier
+        """
+        self.inner = inner
+        self.model = model or getattr(inner, "model", settings.openai_embedding_model)
+        self.max_memory_items = max_memory_items or settings.embedding_cache_memory_items
+        self.store = store
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        
+        self._hits = {
+            tier: metrics.counter(
+                "embedding_cache_hits_total",
+                "Embedding cache hits",
+                labels={"tier": tier}
+            )
+            for tier in ("memory", "disk")
+        }
+        self._misses = metrics.counter(
+            "embedding_cache_misses_total",
+            "Embedding cache misses"
+        )
+        self._evictions = {
+            tier: metrics.counter(
+                "embedding_cache_evictions_total",
+                "Embedding cache evictions",
+                labels={"tier": tier}
+            )
+            for tier in ("memory", "disk")
+        }
+        self._hit_ratio = metrics.gauge(
+            "embedding_cache_hit_ratio",
+            "Fraction of embedding lookups served from cache"
+        )
+    
+    async def embed_text(self, text: str) -> List[float]:
+        """Return a cached vector or embed the text."""
+        return (await self.embed_batch([text]))[0]
+    
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Return cached vectors and embed only the missing texts."""
+        keys = [embedding_cache_key(self.model, text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        
+        for key in keys:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[key] = self._memory[key]
+                self._hits["memory"].inc()
+        
+        if self.store is not None:
+            disk_keys = list({key for key in keys if key not in found})
+            if disk_keys:
+                try:
+                    from_disk = await asyncio.to_thread(self.store.get_many, disk_keys)
+                except Exception as e:
+                    logger.warning(f"Error reading embedding cache: {e}")
+                    from_disk = {}
+                for key, vector in from_disk.items():
+                    found[key] = vector
+                    self._remember(key, vector)
+                self._hits["disk"].inc(
+                    sum(1 for key in keys if key in from_disk)
+                )
+        
+        # Deduplicate misses so repeated texts are embedded once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        
+        if missing:
+            self._misses.inc(sum(1 for key in keys if key in missing))
+            if len(missing) == 1:
+                # Single misses go through embed_text so a batching wrapper
+                # can coalesce them with concurrent callers
+                vectors = [await self.inner.embed_text(next(iter(missing.values())))]
+            else:
+                vectors = await self.inner.embed_batch(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            for key, vector in new_items.items():
+                found[key] = vector
+                self._remember(key, vector)
+            if self.store is not None:
+                try:
+                    evicted = await asyncio.to_thread(self.store.put_many, new_items)
+                    self._evictions["disk"].inc(evicted)
+                except Exception as e:
+                    logger.warning(f"Error writing embedding cache: {e}")
+        
+        self._update_hit_ratio()
+        return [found[key] for key in keys]
+    
+    def _remember(self, key: str, vector: List[float]) -> None:
+        """Insert into the memory LRU, evicting the least recent entries."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+            self._evictions["memory"].inc()
+    
+    def _update_hit_ratio(self) -> None:
+        """Refresh the hit ratio gauge from the counters."""
+        hits = sum(counter.value for counter in self._hits.values())
+        total = hits + self._misses.value
+        self._hit_ratio.set(hits / total if total else 0.0)
+    
+    def close(self) -> None:
+        """Close the persistent store."""
+        if self.store is not None:
+            self.store.close()
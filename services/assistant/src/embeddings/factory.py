@@ -0,0 +1,50 @@
+"""
+Factory for assembling the configured embedding service stack.
+"""
+
+import logging
+from typing import Optional
+
+from src.embeddings.embedding_service import EmbeddingService
+from src.embeddings.openai_embeddings import OpenAIEmbeddings
+from src.embeddings.batching_embeddings import BatchingEmbeddings
+from src.embeddings.cached_embeddings import CachedEmbeddings, SQLiteEmbeddingStore
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def create_embedding_service(batching: Optional[bool] = None) -> EmbeddingService:
+    """
+    Build the embedding service used by the API and the indexing worker.
+    
+    The cache sits outermost so hits never enter the batching queue;
+    single-text misses are passed on as ``embed_text`` calls, which the
+    batching wrapper coalesces, and multi-text misses as one explicit batch.
+    
+    Args:
+        batching: Override ``settings.embedding_batching_enabled``
+        
+    Returns:
+        Configured embedding service
+    """
+    base = OpenAIEmbeddings()
+    service: EmbeddingService = base
+    
+    if settings.embedding_batching_enabled if batching is None else batching:
+        service = BatchingEmbeddings(service)
+    
+    if settings.embedding_cache_enabled:
+        store = None
+        if settings.embedding_cache_path:
+            try:
+                store = SQLiteEmbeddingStore(
+                    path=settings.embedding_cache_path,
+                    model=base.model,
+                    max_items=settings.embedding_cache_max_disk_items
+                )
+            except Exception as e:
+                logger.warning(f"Persistent embedding cache unavailable: {e}")
+        service = CachedEmbeddings(service, model=base.model, store=store)
+    
+    return service
@@ -5,10 +5,12 @@ OpenAI embeddings implementation.
 import logging
 from typing import List
 
+import httpx
 from openai import AsyncOpenAI
 
 from src.embeddings.embedding_service import EmbeddingService
 from src.config.settings import settings
+from src.utils.http_pools import HTTPPools, PooledClient, http_pools
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +18,30 @@ logger = logging.getLogger(__name__)
 class OpenAIEmbeddings(EmbeddingService):
     """OpenAI embeddings service."""
     
-    def __init__(self):
-        """Initialize OpenAI client."""
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+    def __init__(self, pools: HTTPPools = http_pools):
+        """
+        Initialize OpenAI client on the shared ``openai`` connection pool.
+        
+        Args:
+            pools: Connection pools
+        """
+        self._openai = PooledClient(pools, "openai", self._build_client, timeout=600.0)
         self.model = settings.openai_embedding_model
     
+    @property
+    def client(self) -> AsyncOpenAI:
+        """OpenAI client on the pool's current connections."""
+        return self._openai.get()
+    
+    @staticmethod
+    def _build_client(http_client: httpx.AsyncClient) -> AsyncOpenAI:
+        return AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url or None,
+            http_client=http_client,
+            timeout=http_client.timeout
+        )
+    
     async def embed_text(self, text: str) -> List[float]:
         """Generate embedding for a single text using OpenAI."""
         try:
@@ -2,14 +2,19 @@
 FastAPI application entry point for Community Brain Assistant Service.
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from src.config.settings import settings
+from src.utils.http_pools import http_pools
+from src.utils.metrics import metrics
+from src.utils.tracing import start_request_trace
 
 # Configure logging
 logging.basicConfig(
@@ -44,16 +49,35 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     except Exception as e:
         logger.error(f"Failed to start indexing worker: {e}")
     
+    # Open upstream connections in the background so the first requests
+    # don't pay for TCP and TLS setup
+    warm_up = None
+    if settings.http_prewarm_connections:
+        openai_url = (settings.openai_base_url or "https://api.openai.com/v1").rstrip("/")
+        warm_up = asyncio.create_task(http_pools.warm_up(
+            {
+                "openai": f"{openai_url}/models",
+                "community": f"{settings.community_service_url.rstrip('/')}/health"
+            },
+            connections=settings.http_prewarm_connections
+        ))
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Braintrust Assistant Service")
+    if warm_up is not None:
+        warm_up.cancel()
     if indexing_worker:
         try:
             await indexing_worker.stop()
             logger.info("Indexing worker stopped successfully")
         except Exception as e:
             logger.error(f"Error stopping indexing worker: {e}")
+    
+    # Close the shared connection pools once nothing uses them
+    await http_pools.close()
+    logger.info("HTTP connection pools closed")
 
 
 def create_app() -> FastAPI:
@@ -81,6 +105,15 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # Stage timings of each request; streamed responses start before
+    # their stages run, so they only report the time to start streaming
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        trace = start_request_trace()
+        response = await call_next(request)
+        response.headers["Server-Timing"] = trace.server_timing()
+        return response
+    
     # Health check endpoint
     @app.get("/health")
     async def health_check():
@@ -91,6 +124,15 @@ def create_app() -> FastAPI:
             "version": "1.0.0"
         }
     
+    # Prometheus scrape endpoint
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def prometheus_metrics():
+        """Metrics in the Prometheus text exposition format."""
+        return PlainTextResponse(
+            metrics.render_prometheus(),
+            media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+    
     # Include API routes
     from src.api.routes import router as api_router
     app.include_router(api_router, prefix="/api")
@@ -3,25 +3,61 @@ Expert recommendation service.
 """
 
 import logging
-from typing import List
+from typing import Any, Dict, List, Optional
 
 from src.api.schemas import ExpertRequest, ExpertResponse, Expert
+from src.config.settings import settings
 from src.utils.community_client import CommunityClient
+from src.utils.expert_index import ExpertIndex, weighted_scorer
+from src.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Shared so the indexing worker can record contributions as threads change
+expert_index: Optional[ExpertIndex] = (
+    ExpertIndex(
+        scorer=weighted_scorer(settings.expert_score_weights),
+        saturation=settings.expert_score_saturation
+    )
+    if settings.expert_index_enabled else None
+)
+
 
 class ExpertService:
-    """Service for finding expert recommendations."""
+    """
+    Service for finding expert recommendations.
+    
+    Once the local index has been backfilled with every thread, experts
+    are ranked from it for the requested tags it has contributions for,
+    and only the remaining tags are looked up in the Community Service;
+    both rankings are merged by score. Before that, e.g. right after a
+    restart, the index only knows recently indexed threads, so the
+    Community Service is asked for every tag and leads the ranking.
+    """
     
-    def __init__(self, community_client: CommunityClient):
+    def __init__(
+        self,
+        community_client: CommunityClient,
+        index: Optional[ExpertIndex] = expert_index
+    ):
         """
         Initialize expert service.
         
         Args:
             community_client: Community service client
+            index: Local expert index (None to always ask the Community Service)
         """
         self.community_client = community_client
+        self.index = index
+        
+        self._lookups = {
+            source: metrics.counter(
+                "expert_lookups_total",
+                "Expert lookups by the source that answered them",
+                labels={"source": source}
+            )
+            for source in ("local", "remote", "partial")
+        }
     
     async def find_experts(self, request: ExpertRequest) -> ExpertResponse:
         """
@@ -36,18 +72,34 @@ class ExpertService:
         try:
             logger.info(f"Finding experts for tags: {request.tags}")
             
-            # Call community service to get experts
-            experts_data = await self.community_client.get_experts_by_tags(
-                tags=request.tags,
-                top_k=request.top_k
-            )
+            experts_data: List[Dict[str, Any]] = []
+            missing = list(request.tags)
+            complete = self.index is not None and self.index.complete
+            if self.index is not None:
+                experts_data = self.index.top_experts(request.tags, request.top_k)
+                if complete:
+                    missing = self.index.missing_tags(request.tags)
+            
+            if not missing:
+                self._lookups["local"].inc()
+            else:
+                # Ask the Community Service for tags the index can't answer alone
+                self._lookups["partial" if experts_data else "remote"].inc()
+                remote = await self.community_client.get_experts_by_tags(
+                    tags=missing,
+                    top_k=request.top_k
+                )
+                if complete:
+                    experts_data = self._merge(experts_data, remote, request.top_k, by_score=True)
+                else:
+                    experts_data = self._merge(remote, experts_data, request.top_k, by_score=False)
             
             # Map to Expert models
             experts: List[Expert] = []
             for expert_data in experts_data:
                 experts.append(Expert(
-                    user_id=expert_data.get("user_id", ""),
-                    username=expert_data.get("username", ""),
+                    user_id=str(expert_data.get("user_id") or expert_data.get("id") or ""),
+                    username=expert_data.get("username") or expert_data.get("name") or "",
                     expertise_score=expert_data.get("expertise_score", 0.0),
                     relevant_contributions=expert_data.get("relevant_contributions", 0)
                 ))
@@ -56,3 +108,46 @@ class ExpertService:
         except Exception as e:
             logger.error(f"Error in expert service: {e}", exc_info=True)
             raise
+    
+    @staticmethod
+    def _merge(
+        first: List[Dict[str, Any]],
+        second: List[Dict[str, Any]],
+        top_k: int,
+        by_score: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Combine two expert rankings.
+        
+        Like the local index, scores and contributions of a user found in
+        both are summed.
+        
+        Args:
+            first: Leading ranking
+            second: Ranking merged into it
+            top_k: Number of experts to return
+            by_score: Rank by summed score (for rankings of disjoint tags);
+                otherwise keep ``first``'s order, followed by users only in
+                ``second``
+                
+        Returns:
+            Merged experts, best first
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        for expert in first + second:
+            user_id = str(expert.get("user_id") or expert.get("id") or "")
+            previous = merged.get(user_id)
+            if previous is None:
+                merged[user_id] = dict(expert)
+                continue
+            previous["expertise_score"] = min(
+                previous.get("expertise_score", 0.0) + expert.get("expertise_score", 0.0), 1.0
+            )
+            previous["relevant_contributions"] = (
+                previous.get("relevant_contributions", 0) + expert.get("relevant_contributions", 0)
+            )
+        ranked = list(merged.values())
+        if by_score:
+            # Stable, so experts without a score keep the Community Service's order
+            ranked.sort(key=lambda e: e.get("expertise_score", 0.0), reverse=True)
+        return ranked[:top_k]
@@ -2,17 +2,40 @@
 RAG (Retrieval-Augmented Generation) service implementation.
 """
 
+import asyncio
 import logging
-from typing import List
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
 
 from src.api.schemas import AskRequest, AskResponse, SourceThread
+from src.config.settings import settings
 from src.core.orchestrator import Orchestrator
 from src.vector.vector_store import VectorStore
 from src.embeddings.embedding_service import EmbeddingService
 from src.utils.community_client import CommunityClient
+from src.utils.metrics import metrics
+from src.utils.semantic_cache import SemanticCache
+from src.utils.tracing import Tracer
+from src.vector.hybrid import HybridRetriever
+from src.vector.vector_store import SearchResult
 
 logger = logging.getLogger(__name__)
 
+NO_RESULTS_ANSWER = (
+    "I couldn't find any relevant information in the knowledge base to answer your question."
+)
+
+# Shared so the indexing worker can drop answers citing re-indexed threads
+answer_cache: Optional[SemanticCache] = (
+    SemanticCache(
+        name="answers",
+        threshold=settings.answer_cache_similarity_threshold,
+        ttl_seconds=settings.answer_cache_ttl_seconds,
+        max_entries=settings.answer_cache_max_entries
+    )
+    if settings.answer_cache_enabled else None
+)
+
 
 class RAGService:
     """RAG service for question answering."""
@@ -22,7 +45,9 @@ class RAGService:
         orchestrator: Orchestrator,
         vector_store: VectorStore,
         embeddings: EmbeddingService,
-        community_client: CommunityClient
+        community_client: CommunityClient,
+        cache: Optional[SemanticCache] = answer_cache,
+        retriever: Optional[HybridRetriever] = None
     ):
         """
         Initialize RAG service.
@@ -32,11 +57,21 @@ class RAGService:
             vector_store: Vector database
             embeddings: Embedding service
             community_client: Community service client
+            cache: Answer cache keyed on question embeddings (None to disable)
+            retriever: Vector, lexical or hybrid retrieval (defaults to one over ``vector_store``)
         """
         self.orchestrator = orchestrator
         self.vector_store = vector_store
         self.embeddings = embeddings
         self.community_client = community_client
+        self.cache = cache
+        self.retriever = retriever or HybridRetriever(vector_store)
+        
+        self.tracer = Tracer("ask", "Time spent in each stage of answering a question")
+        self._time_to_first_token = metrics.histogram(
+            "ask_time_to_first_token_seconds",
+            "Time from receiving a streamed question to its first answer token"
+        )
     
     async def ask(self, request: AskRequest) -> AskResponse:
         """
@@ -48,67 +83,442 @@ class RAGService:
         Returns:
             Answer response with sources and confidence
         """
+        response, _ = await self.ask_with_cache_status(request)
+        return response
+    
+    async def ask_with_cache_status(
+        self,
+        request: AskRequest
+    ) -> Tuple[AskResponse, Optional[float]]:
+        """
+        Answer a question, reusing the answer to a near-identical question.
+        
+        Args:
+            request: Ask request with question and parameters
+            
+        Returns:
+            Answer response, and the similarity of the cached question it
+            was served from (None if it was generated)
+        """
         try:
             # Step 1: Generate query embedding
             logger.info(f"Generating embedding for query: {request.question[:50]}...")
-            query_embedding = await self.embeddings.embed_text(request.question)
+            with self.tracer.span("embed"):
+                query_embedding = await self.embeddings.embed_text(request.question)
             
-            # Step 2: Search vector store
-            logger.info(f"Searching for {request.top_k} similar threads")
-            search_results = await self.vector_store.search(
-                query_vector=query_embedding,
-                top_k=request.top_k
+            if self.cache is None:
+                return await self._answer(request, query_embedding), None
+            
+            scope = self._cache_scope(request)
+            cached = self.cache.get(query_embedding, scope)
+            if cached is not None:
+                response, similarity = cached
+                logger.info(f"Serving cached answer (similarity {similarity:.3f})")
+                return response, similarity
+            
+            ticket = self.cache.track()
+            try:
+                response = await self._answer(request, query_embedding)
+            finally:
+                self.cache.untrack(ticket)
+            
+            self._cache_answer(query_embedding, response, scope, ticket)
+            return response, None
+        except Exception as e:
+            logger.error(f"Error in RAG service: {e}", exc_info=True)
+            raise
+    
+    async def ask_batch(
+        self,
+        requests: List[AskRequest]
+    ) -> List[Union[AskResponse, Exception]]:
+        """
+        Answer several questions together.
+        
+        All questions are embedded with one call and searched concurrently.
+        Threads needed by more than one question are fetched once, then the
+        answers are generated concurrently. A failing question doesn't fail
+        the others.
+        
+        Args:
+            requests: Ask requests
+            
+        Returns:
+            Answer response or the error raised, per request in order
+        """
+        results: List[Union[AskResponse, Exception, None]] = [None] * len(requests)
+        
+        questions = list(dict.fromkeys(request.question for request in requests))
+        logger.info(f"Generating embeddings for {len(questions)} batched queries")
+        with self.tracer.span("embed"):
+            vectors = dict(zip(questions, await self.embeddings.embed_batch(questions)))
+        query_embeddings = [vectors[request.question] for request in requests]
+        
+        # Serve near-identical questions from the answer cache
+        pending: List[int] = []
+        for i, request in enumerate(requests):
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(query_embeddings[i], self._cache_scope(request))
+            if cached is not None:
+                results[i] = cached[0]
+            else:
+                pending.append(i)
+        
+        tickets = {i: self.cache.track() for i in pending} if self.cache is not None else {}
+        try:
+            searches = await asyncio.gather(
+                *(self._search(requests[i], query_embeddings[i]) for i in pending),
+                return_exceptions=True
+            )
+            
+            # One fetch for all threads whose text isn't in the index
+            thread_ids: List[str] = []
+            for search_results in searches:
+                if not isinstance(search_results, Exception):
+                    thread_ids.extend(self._threads_to_fetch(search_results))
+            thread_ids = list(dict.fromkeys(thread_ids))
+            threads = await self._fetch_threads(thread_ids) if thread_ids else {}
+            
+            async def answer(i: int, search_results: List[SearchResult]) -> AskResponse:
+                context_docs = self._build_context(search_results, threads)
+                return await self._generate(requests[i], search_results, context_docs)
+            
+            answers = await asyncio.gather(
+                *(
+                    answer(i, search_results)
+                    for i, search_results in zip(pending, searches)
+                    if not isinstance(search_results, Exception)
+                ),
+                return_exceptions=True
             )
+            answers_iter = iter(answers)
+            for i, search_results in zip(pending, searches):
+                results[i] = search_results if isinstance(search_results, Exception) else next(answers_iter)
+            
+            for i in pending:
+                if self.cache is not None and isinstance(results[i], AskResponse):
+                    request = requests[i]
+                    self._cache_answer(
+                        query_embeddings[i],
+                        results[i],
+                        self._cache_scope(request),
+                        tickets[i]
+                    )
+        finally:
+            for ticket in tickets.values():
+                self.cache.untrack(ticket)
+        
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Error answering batched question {i}: {result}")
+        return results
+    
+    async def ask_stream(self, request: AskRequest) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer a question, yielding events as soon as they are available.
+        
+        Events are ``{"event": name, "data": dict}``: ``sources`` once
+        retrieval finishes, ``token`` for each chunk of the answer, then
+        ``done`` with the confidence and time-to-first-token.
+        
+        Args:
+            request: Ask request with question and parameters
+            
+        Yields:
+            Stream events
+        """
+        started = time.perf_counter()
+        
+        logger.info(f"Generating embedding for streamed query: {request.question[:50]}...")
+        with self.tracer.span("embed"):
+            query_embedding = await self.embeddings.embed_text(request.question)
+        scope = self._cache_scope(request)
+        
+        if self.cache is not None:
+            cached = self.cache.get(query_embedding, scope)
+            if cached is not None:
+                response, similarity = cached
+                logger.info(f"Streaming cached answer (similarity {similarity:.3f})")
+                yield self._sources_event(response.sources)
+                first_token_at = time.perf_counter()
+                yield {"event": "token", "data": {"text": response.answer}}
+                yield self._done_event(response.confidence, started, first_token_at, cached=True)
+                return
+        
+        ticket = self.cache.track() if self.cache is not None else None
+        try:
+            search_results, context_docs = await self._retrieve(request, query_embedding)
+            sources, confidence = self._build_sources(search_results)
+            yield self._sources_event(sources)
             
+            first_token_at = None
+            parts: List[str] = []
             if not search_results:
-                logger.warning("No search results found")
-                return AskResponse(
-                    answer="I couldn't find any relevant information in the knowledge base to answer your question.",
-                    sources=[],
-                    confidence=0.0
-                )
+                parts.append(NO_RESULTS_ANSWER)
+                first_token_at = time.perf_counter()
+                yield {"event": "token", "data": {"text": NO_RESULTS_ANSWER}}
+            else:
+                logger.info("Streaming answer from LLM")
+                generate_started = time.perf_counter()
+                async for text in self.orchestrator.stream_answer(
+                    question=request.question,
+                    context_docs=context_docs
+                ):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        self._time_to_first_token.observe(first_token_at - started)
+                    parts.append(text)
+                    yield {"event": "token", "data": {"text": text}}
+                self.tracer.record("generate", generate_started)
             
-            # Step 3: Fetch full threads from Community Service
-            thread_ids = [result.id for result in search_results]
-            logger.info(f"Fetching {len(thread_ids)} threads from Community Service")
-            threads = await self.community_client.get_threads_batch(thread_ids)
+            if ticket is not None:
+                self._cache_answer(
+                    query_embedding,
+                    AskResponse(answer="".join(parts), sources=sources, confidence=confidence),
+                    scope,
+                    ticket
+                )
+            yield self._done_event(confidence, started, first_token_at)
+        finally:
+            if ticket is not None:
+                self.cache.untrack(ticket)
+    
+    async def _answer(
+        self,
+        request: AskRequest,
+        query_embedding: List[float]
+    ) -> AskResponse:
+        """
+        Run retrieval and generation for an embedded question.
+        
+        Args:
+            request: Ask request with question and parameters
+            query_embedding: Embedding of the question
             
-            # Step 4: Build context documents
-            context_docs = []
-            for thread in threads:
-                context_docs.append({
-                    "title": thread.get("title", ""),
-                    "content": thread.get("content", ""),
-                    "thread_id": thread.get("id", "")
-                })
+        Returns:
+            Answer response with sources and confidence
+        """
+        search_results, context_docs = await self._retrieve(request, query_embedding)
+        return await self._generate(request, search_results, context_docs)
+    
+    async def _generate(
+        self,
+        request: AskRequest,
+        search_results: List[SearchResult],
+        context_docs: List[Dict[str, Any]]
+    ) -> AskResponse:
+        """
+        Generate an answer from retrieved context.
+        
+        Args:
+            request: Ask request with question and parameters
+            search_results: Vector search results
+            context_docs: Context documents built from them
             
-            # Step 5: Generate answer
-            logger.info("Generating answer with LLM")
+        Returns:
+            Answer response with sources and confidence
+        """
+        if not search_results:
+            return AskResponse(answer=NO_RESULTS_ANSWER, sources=[], confidence=0.0)
+        
+        # Step 5: Generate answer
+        logger.info("Generating answer with LLM")
+        with self.tracer.span("generate"):
             answer_result = await self.orchestrator.answer_question(
                 question=request.question,
                 context_docs=context_docs
             )
+        
+        sources, confidence = self._build_sources(search_results)
+        return AskResponse(
+            answer=answer_result["answer"],
+            sources=sources,
+            confidence=confidence
+        )
+    
+    async def _retrieve(
+        self,
+        request: AskRequest,
+        query_embedding: List[float]
+    ) -> Tuple[List[SearchResult], List[Dict[str, Any]]]:
+        """
+        Find similar threads and build context documents from them.
+        
+        Args:
+            request: Ask request with question and parameters
+            query_embedding: Embedding of the question
             
-            # Step 6: Build response
-            sources = []
-            for result in search_results:
-                metadata = result.metadata
-                sources.append(SourceThread(
-                    thread_id=result.id,
-                    title=metadata.get("title", "Untitled"),
-                    relevance_score=result.score,
-                    excerpt=metadata.get("excerpt", "")[:200]
-                ))
-            
-            # Calculate confidence (average of top 3 scores)
-            top_scores = [r.score for r in search_results[:3]]
-            confidence = sum(top_scores) / len(top_scores) if top_scores else 0.0
-            
-            return AskResponse(
-                answer=answer_result["answer"],
-                sources=sources,
-                confidence=round(confidence, 2)
+        Returns:
+            Search results and context documents (both empty if nothing matched)
+        """
+        search_results = await self._search(request, query_embedding)
+        if not search_results:
+            return [], []
+        
+        thread_ids = self._threads_to_fetch(search_results)
+        threads = await self._fetch_threads(thread_ids) if thread_ids else {}
+        return search_results, self._build_context(search_results, threads)
+    
+    async def _search(
+        self,
+        request: AskRequest,
+        query_embedding: List[float]
+    ) -> List[SearchResult]:
+        """Find threads relevant to an embedded question."""
+        # Step 2: Search vector store and/or the lexical index
+        logger.info(f"Searching for {request.top_k} similar threads")
+        with self.tracer.span("search"):
+            search_results = await self.retriever.search(
+                query=request.question,
+                query_vector=query_embedding,
+                top_k=request.top_k,
+                mode=request.retrieval_mode,
+                group_size=settings.chunk_group_size,
+                filter_conditions=request.filters.to_conditions() if request.filters else None
             )
-        except Exception as e:
-            logger.error(f"Error in RAG service: {e}", exc_info=True)
-            raise
+        if not search_results:
+            logger.warning("No search results found")
+        return search_results
+    
+    async def _fetch_threads(self, thread_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch full threads from the Community Service, keyed by ID."""
+        logger.info(f"Fetching {len(thread_ids)} threads from Community Service")
+        with self.tracer.span("fetch"):
+            threads = await self.community_client.get_threads_batch(thread_ids)
+        return {str(thread.get("id", "")): thread for thread in threads}
+    
+    def _build_context(
+        self,
+        search_results: List[SearchResult],
+        threads: Dict[str, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Build context documents, carrying scores for token budgeting.
+        
+        Args:
+            search_results: Grouped search results
+            threads: Fetched threads by ID, for results without chunk text
+            
+        Returns:
+            Context documents in search result order, each with the
+            ``rank`` of its result so citations match the response sources
+        """
+        context_docs = []
+        for rank, result in enumerate(search_results, 1):
+            # Step 3: Use matched chunks directly when the index holds their text
+            if self._has_chunk_text(result):
+                context_docs.append({
+                    "title": result.metadata.get("title", ""),
+                    "content": "\n\n".join(chunk["text"] for chunk in result.metadata["chunks"]),
+                    "thread_id": result.id,
+                    "score": result.score,
+                    "rank": rank
+                })
+                continue
+            
+            # Step 4: Otherwise use the full thread, skipping any that failed to load
+            thread = threads.get(result.id)
+            if thread is None:
+                continue
+            context_docs.append({
+                "title": thread.get("title", ""),
+                "content": thread.get("content", ""),
+                "thread_id": thread.get("id", ""),
+                "score": result.score,
+                "rank": rank
+            })
+        return context_docs
+    
+    def _threads_to_fetch(self, search_results: List[SearchResult]) -> List[str]:
+        """IDs of results whose context must come from the full thread."""
+        return [result.id for result in search_results if not self._has_chunk_text(result)]
+    
+    @staticmethod
+    def _has_chunk_text(result: SearchResult) -> bool:
+        """Whether a grouped result carries the text of its matched chunks."""
+        chunks = result.metadata.get("chunks") or []
+        return bool(chunks) and all(chunk.get("text") is not None for chunk in chunks)
+    
+    def _cache_scope(self, request: AskRequest) -> Tuple[Any, ...]:
+        """Request fields besides the question that an answer depends on."""
+        return (
+            request.top_k,
+            request.context_thread_id,
+            self.retriever.resolve_mode(request.retrieval_mode),
+            request.filters.model_dump_json(exclude_none=True) if request.filters else None
+        )
+    
+    def _build_sources(
+        self,
+        search_results: List[SearchResult]
+    ) -> Tuple[List[SourceThread], float]:
+        """
+        Build response sources and confidence from search results.
+        
+        Args:
+            search_results: Vector search results
+            
+        Returns:
+            Source threads and confidence score
+        """
+        sources = []
+        for result in search_results:
+            metadata = result.metadata
+            sources.append(SourceThread(
+                thread_id=result.id,
+                title=metadata.get("title", "Untitled"),
+                relevance_score=result.score,
+                excerpt=metadata.get("excerpt", "")[:200]
+            ))
+        
+        # Calculate confidence (average of top 3 scores)
+        top_scores = [r.score for r in search_results[:3]]
+        confidence = sum(top_scores) / len(top_scores) if top_scores else 0.0
+        return sources, round(confidence, 2)
+    
+    def _cache_answer(
+        self,
+        query_embedding: List[float],
+        response: AskResponse,
+        scope: Tuple[Any, ...],
+        ticket: Set[str]
+    ) -> None:
+        """Cache a generated answer unless its sources changed meanwhile."""
+        # Answers without sources can't be invalidated by indexing events
+        if response.sources:
+            self.cache.put(
+                query_embedding,
+                response,
+                thread_ids=[source.thread_id for source in response.sources],
+                scope=scope,
+                ticket=ticket
+            )
+    
+    @staticmethod
+    def _sources_event(sources: List[SourceThread]) -> Dict[str, Any]:
+        """Stream event carrying the retrieved sources."""
+        return {
+            "event": "sources",
+            "data": {"sources": [source.model_dump() for source in sources]}
+        }
+    
+    @staticmethod
+    def _done_event(
+        confidence: float,
+        started: float,
+        first_token_at: Optional[float],
+        cached: bool = False
+    ) -> Dict[str, Any]:
+        """Final stream event with confidence and timing."""
+        time_to_first_token = None
+        if first_token_at is not None:
+            time_to_first_token = round((first_token_at - started) * 1000, 1)
+        return {
+            "event": "done",
+            "data": {
+                "confidence": confidence,
+                "cached": cached,
+                "time_to_first_token_ms": time_to_first_token
+            }
+        }
@@ -2,12 +2,17 @@
 Semantic search service for finding similar threads.
 """
 
+import asyncio
 import logging
+import time
+from typing import List, Optional, Union
 
 from src.api.schemas import SimilarThreadsRequest, SimilarThreadsResponse, SimilarThread
-from src.vector.vector_store import VectorStore
+from src.vector.vector_store import SearchResult, VectorStore
 from src.embeddings.embedding_service import EmbeddingService
 from src.utils.community_client import CommunityClient
+from src.utils.tracing import Tracer
+from src.vector.hybrid import HybridRetriever
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +24,8 @@ class SearchService:
         self,
         vector_store: VectorStore,
         embeddings: EmbeddingService,
-        community_client: CommunityClient
+        community_client: CommunityClient,
+        retriever: Optional[HybridRetriever] = None
     ):
         """
         Initialize search service.
@@ -28,10 +34,13 @@ class SearchService:
             vector_store: Vector database
             embeddings: Embedding service
             community_client: Community service client
+            retriever: Vector, lexical or hybrid retrieval (defaults to one over ``vector_store``)
         """
         self.vector_store = vector_store
         self.embeddings = embeddings
         self.community_client = community_client
+        self.retriever = retriever or HybridRetriever(vector_store)
+        self.tracer = Tracer("similar", "Time spent in each stage of similar-thread search")
     
     async def find_similar(
         self,
@@ -49,28 +58,90 @@ class SearchService:
         try:
             logger.info(f"Searching for similar threads: {request.query[:50]}...")
             
-            # Generate query embedding
-            query_embedding = await self.embeddings.embed_text(request.query)
+            # Generate query embedding unless only the lexical index is searched
+            query_embedding = None
+            if self.retriever.resolve_mode(request.retrieval_mode) != "lexical":
+                with self.tracer.span("embed"):
+                    query_embedding = await self.embeddings.embed_text(request.query)
             
-            # Search vector store
-            search_results = await self.vector_store.search(
-                query_vector=query_embedding,
-                top_k=request.top_k
-            )
+            # One result per thread however many chunks matched
+            with self.tracer.span("search"):
+                search_results = await self.retriever.search(
+                    query=request.query,
+                    query_vector=query_embedding,
+                    top_k=request.top_k,
+                    mode=request.retrieval_mode,
+                    filter_conditions=request.filters.to_conditions() if request.filters else None
+                )
             
-            # Map to SimilarThread models
-            threads = []
-            for result in search_results:
-                metadata = result.metadata
-                threads.append(SimilarThread(
-                    thread_id=result.id,
-                    title=metadata.get("title", "Untitled"),
-                    similarity_score=result.score,
-                    tags=metadata.get("tags", []),
-                    created_at=metadata.get("created_at", "")
-                ))
-            
-            return SimilarThreadsResponse(threads=threads)
+            return self._to_response(search_results)
         except Exception as e:
             logger.error(f"Error in search service: {e}", exc_info=True)
             raise
+    
+    async def find_similar_batch(
+        self,
+        requests: List[SimilarThreadsRequest]
+    ) -> List[Union[SimilarThreadsResponse, Exception]]:
+        """
+        Find similar threads for several queries.
+        
+        Queries needing vector search are embedded with one call, then all
+        are searched concurrently.
+        A failing search doesn't fail the others.
+        
+        Args:
+            requests: Search requests
+            
+        Returns:
+            Similar threads response or the error raised, per request in order
+        """
+        logger.info(f"Searching for similar threads for {len(requests)} batched queries")
+        queries = list(dict.fromkeys(
+            request.query for request in requests
+            if self.retriever.resolve_mode(request.retrieval_mode) != "lexical"
+        ))
+        vectors = {}
+        if queries:
+            with self.tracer.span("embed"):
+                vectors = dict(zip(queries, await self.embeddings.embed_batch(queries)))
+        
+        search_started = time.perf_counter()
+        searches = await asyncio.gather(
+            *(
+                self.retriever.search(
+                    query=request.query,
+                    query_vector=vectors.get(request.query),
+                    top_k=request.top_k,
+                    mode=request.retrieval_mode,
+                    filter_conditions=request.filters.to_conditions() if request.filters else None
+                )
+                for request in requests
+            ),
+            return_exceptions=True
+        )
+        self.tracer.record("search", search_started)
+        
+        responses: List[Union[SimilarThreadsResponse, Exception]] = []
+        for i, search_results in enumerate(searches):
+            if isinstance(search_results, Exception):
+                logger.error(f"Error in batched search {i}: {search_results}")
+                responses.append(search_results)
+            else:
+                responses.append(self._to_response(search_results))
+        return responses
+    
+    @staticmethod
+    def _to_response(search_results: List[SearchResult]) -> SimilarThreadsResponse:
+        """Map grouped search results to SimilarThread models."""
+        threads = []
+        for result in search_results:
+            metadata = result.metadata
+            threads.append(SimilarThread(
+                thread_id=result.id,
+                title=metadata.get("title", "Untitled"),
+                similarity_score=result.score,
+                tags=metadata.get("tags", []),
+                created_at=metadata.get("created_at", "")
+            ))
+        return SimilarThreadsResponse(threads=threads)
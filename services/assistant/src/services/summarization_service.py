@@ -2,22 +2,62 @@
 Thread summarization service.
 """
 
+import asyncio
 import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
 
 from src.api.schemas import SummarizeRequest, SummarizeResponse
+from src.config.settings import settings
 from src.core.orchestrator import Orchestrator
+from src.utils.chunking import chunk_text
 from src.utils.community_client import CommunityClient
+from src.utils.metrics import metrics
+from src.utils.summary_cache import CachedSummary, SummaryCache, summary_version
+from src.utils.tokens import Tokenizer, get_tokenizer
+from src.utils.tracing import Tracer
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_OUTCOMES = ("cached", "unchanged", "incremental", "full")
+SEGMENT_COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+# Shared so the indexing worker can mark summaries of changed threads stale
+summary_cache: Optional[SummaryCache] = (
+    SummaryCache(
+        ttl_seconds=settings.summary_cache_ttl_seconds,
+        max_entries=settings.summary_cache_max_entries,
+        refresh_min_hits=settings.summary_refresh_min_hits,
+        refresh_delay=settings.summary_refresh_delay_seconds
+    )
+    if settings.summary_cache_enabled else None
+)
+
 
 class SummarizationService:
-    """Service for summarizing thread discussions."""
+    """
+    Service for summarizing thread discussions.
+    
+    Threads up to ``map_reduce_threshold`` tokens are summarized with one
+    LLM call. Longer threads are split into token-bounded segments of
+    whole posts, the segments are summarized concurrently, and the partial
+    summaries are combined into the final structured summary.
+    
+    Summaries are cached per thread version. A summary marked stale by an
+    indexing event is updated from just the new replies when the earlier
+    posts are unchanged, and regenerated otherwise.
+    """
     
     def __init__(
         self,
         orchestrator: Orchestrator,
-        community_client: CommunityClient
+        community_client: CommunityClient,
+        map_reduce_threshold: Optional[int] = None,
+        segment_max_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        cache: Optional[SummaryCache] = summary_cache
     ):
         """
         Initialize summarization service.
@@ -25,9 +65,48 @@ class SummarizationService:
         Args:
             orchestrator: LLM orchestrator
             community_client: Community service client
+            map_reduce_threshold: Thread tokens above which segments are
+                summarized separately (defaults to settings)
+            segment_max_tokens: Max tokens per segment (defaults to settings)
+            max_concurrency: Max concurrent segment summaries (defaults to settings)
+            cache: Versioned summary cache (None to disable); stale summaries
+                of popular threads are refreshed through this service
         """
         self.orchestrator = orchestrator
         self.community_client = community_client
+        self.map_reduce_threshold = (
+            settings.summarize_map_reduce_threshold_tokens
+            if map_reduce_threshold is None else map_reduce_threshold
+        )
+        self.segment_max_tokens = (
+            settings.summarize_segment_max_tokens
+            if segment_max_tokens is None else segment_max_tokens
+        )
+        self.max_concurrency = (
+            settings.summarize_max_concurrency
+            if max_concurrency is None else max_concurrency
+        )
+        self.model = settings.openai_llm_model
+        self.tokenizer = get_tokenizer(self.model)
+        self.cache = cache
+        if cache is not None:
+            cache.refresher = self.refresh
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        self.tracer = Tracer("summarize", "Time spent in each stage of thread summarization")
+        self._segment_counts = metrics.histogram(
+            "summarize_segments",
+            "Segments summarized separately for long threads",
+            buckets=SEGMENT_COUNT_BUCKETS
+        )
+        self._outcomes = {
+            outcome: metrics.counter(
+                "summarize_requests_total",
+                "Summaries by how they were produced",
+                labels={"outcome": outcome}
+            )
+            for outcome in SUMMARY_OUTCOMES
+        }
     
     async def summarize(self, request: SummarizeRequest) -> SummarizeResponse:
         """
@@ -40,38 +119,424 @@ class SummarizationService:
             Summary response
         """
         try:
-            # Fetch thread
-            logger.info(f"Fetching thread {request.thread_id}")
-            thread = await self.community_client.get_thread(request.thread_id)
-            
-            # Fetch posts
-            logger.info(f"Fetching posts for thread {request.thread_id}")
-            posts = await self.community_client.get_thread_posts(request.thread_id)
-            
-            # Build full content
-            content_parts = [
-                f"Title: {thread.get('title', '')}",
-                f"\nOriginal Post: {thread.get('content', '')}",
-                "\nReplies:"
-            ]
+            cached = self.cache.get(request.thread_id) if self.cache is not None else None
+            if cached is not None:
+                cached.hits += 1
+                if self.cache.is_fresh(cached):
+                    logger.info(f"Serving cached summary of thread {request.thread_id}")
+                    self._outcomes["cached"].inc()
+                    return cached.value
+            return await self._summarize_once(request.thread_id)
+        except Exception as e:
+            logger.error(f"Error in summarization service: {e}", exc_info=True)
+            raise
+    
+    async def refresh(self, thread_id: str) -> None:
+        """
+        Bring a thread's cached summary up to date.
+        
+        Args:
+            thread_id: Thread ID
+        """
+        await self._summarize_once(thread_id)
+    
+    async def _summarize_once(self, thread_id: str) -> SummarizeResponse:
+        """Share one summarization between concurrent requests for a thread."""
+        future = self._inflight.get(thread_id)
+        if future is None:
+            future = asyncio.ensure_future(self._summarize(thread_id))
+            self._inflight[thread_id] = future
+            future.add_done_callback(lambda _: self._inflight.pop(thread_id, None))
+        # Shielded so one cancelled request doesn't cancel the others
+        return await asyncio.shield(future)
+    
+    async def _summarize(self, thread_id: str) -> SummarizeResponse:
+        """
+        Fetch a thread and produce its summary, reusing the cached one where possible.
+        
+        The thread and its posts are fetched concurrently. Posts are
+        streamed page by page and only new replies, or the segments being
+        summarized, are held in memory. If the posts can't be fetched, the
+        thread is summarized from the posts loaded so far, and that summary
+        isn't cached.
+        
+        Args:
+            thread_id: Thread ID
             
-            for post in posts:
-                author = post.get('author', 'Unknown')
-                content = post.get('content', '')
-                content_parts.append(f"\n- {author}: {content}")
+        Returns:
+            Summary response
+        """
+        started = time.perf_counter()
+        logger.info(f"Fetching thread {thread_id} and its posts")
+        thread_task = asyncio.ensure_future(self.community_client.get_thread(thread_id))
+        try:
+            cached = self.cache.get(thread_id) if self.cache is not None else None
+            outcome = response = current = None
+            if cached is not None:
+                outcome, response, current = await self._revalidate(thread_id, thread_task, cached, started)
+            if response is None:
+                # Nothing reusable; stream the posts (again) for a full summary
+                outcome = "full"
+                response, current = await self._generate(thread_id, thread_task, started)
+        finally:
+            if not thread_task.done():
+                thread_task.cancel()
+        
+        self._outcomes[outcome].inc()
+        if self.cache is not None and current is not None:
+            current.value = response
+            self.cache.put(thread_id, current)
+        return response
+    
+    async def _revalidate(
+        self,
+        thread_id: str,
+        thread_task: asyncio.Future,
+        cached: CachedSummary,
+        started: float
+    ) -> Tuple[Optional[str], Optional[SummarizeResponse], Optional[CachedSummary]]:
+        """
+        Reuse or incrementally update a cached summary.
+        
+        Streams the posts once, keeping only replies past the cached ones.
+        
+        Args:
+            thread_id: Thread ID
+            thread_task: Pending thread fetch
+            cached: Cached summary record
+            started: When fetching started
             
-            full_content = "\n".join(content_parts)
+        Returns:
+            Outcome, response and version record; all None if the summary
+            has to be regenerated
+        """
+        post_count = 0
+        last_post = None
+        new_replies: List[str] = []
+        new_tokens = 0
+        # Only possible while earlier posts match and new replies fit one prompt
+        updatable = cached.model == self.model
+        try:
+            async for post in self.community_client.iter_thread_posts(thread_id):
+                post_count += 1
+                last_post = post
+                if post_count == cached.post_count and str(post.get("id", "")) != cached.last_post_id:
+                    updatable = False
+                if updatable and post_count > cached.post_count:
+                    reply = self._format_reply(post)
+                    new_tokens += self.tokenizer.count(reply) + 1
+                    if new_tokens > self.map_reduce_threshold:
+                        updatable, new_replies = False, []
+                    else:
+                        new_replies.append(reply)
+        except httpx.HTTPError as e:
+            # The version can't be known without every post
+            logger.warning(f"Could not revalidate summary of thread {thread_id}: {e}")
+            return None, None, None
+        thread = await thread_task
+        fetch_time = self._observe("fetch", started)
+        
+        current = summary_version(thread_id, thread, post_count, last_post, self.model)
+        if current.version == cached.version:
+            logger.info(f"Thread {thread_id} unchanged since its cached summary")
+            return "unchanged", cached.value, current
+        if (
+            updatable
+            and new_replies
+            and post_count > cached.post_count
+            and current.thread_hash == cached.thread_hash
+        ):
+            response = await self._update(thread_id, cached, new_replies, fetch_time)
+            return "incremental", response, current
+        return None, None, None
+    
+    async def _generate(
+        self,
+        thread_id: str,
+        thread_task: asyncio.Future,
+        started: float
+    ) -> Tuple[SummarizeResponse, Optional[CachedSummary]]:
+        """
+        Summarize a whole thread, in segments if it is long.
+        
+        Replies are buffered until the thread exceeds the map-reduce
+        threshold. From then on each segment is summarized as soon as it
+        fills, while later pages are still being fetched.
+        
+        Args:
+            thread_id: Thread ID
+            thread_task: Pending thread fetch
+            started: When fetching started
             
+        Returns:
+            Summary response and the version record it was built from
+            (None if some posts could not be fetched)
+        """
+        errors: List[httpx.HTTPError] = []
+        posts = self._stream_posts(thread_id, errors)
+        # The thread and the first page of posts load concurrently
+        thread, first_post = await asyncio.gather(thread_task, anext(posts, None))
+        
+        # Build full content
+        title = thread.get('title', '')
+        original_post = f"\nOriginal Post: {thread.get('content', '')}"
+        header = [f"Title: {title}", original_post, "\nReplies:"]
+        replies: List[str] = []
+        content_tokens = sum(self.tokenizer.count(line) + 1 for line in header)
+        mapper: Optional[_SegmentMapper] = None
+        
+        post_count = 0
+        last_post = None
+        try:
+            post = first_post
+            while post is not None:
+                post_count += 1
+                last_post = post
+                reply = self._format_reply(post)
+                if mapper is not None:
+                    await mapper.add(reply)
+                else:
+                    replies.append(reply)
+                    content_tokens += self.tokenizer.count(reply) + 1
+                    if content_tokens > self.map_reduce_threshold:
+                        logger.info(f"Thread {thread_id} is long, summarizing it in segments")
+                        mapper = _SegmentMapper(self, title)
+                        for part in [original_post] + replies:
+                            await mapper.add(part)
+                        replies = []
+                post = await anext(posts, None)
+        except BaseException:
+            if mapper is not None:
+                mapper.cancel()
+            raise
+        fetch_time = self._observe("fetch", started)
+        current = None if errors else summary_version(thread_id, thread, post_count, last_post, self.model)
+        
+        if mapper is None:
             # Generate summary
             logger.info("Generating summary with LLM")
-            summary_result = await self.orchestrator.summarize(full_content)
-            
-            return SummarizeResponse(
-                summary=summary_result.get("summary", ""),
-                key_points=summary_result.get("key_points", []),
-                consensus=summary_result.get("consensus"),
-                open_questions=summary_result.get("open_questions")
+            generate_started = time.perf_counter()
+            summary_result = await self.orchestrator.summarize("\n".join(header + replies))
+            logger.info(
+                f"Summarized thread {thread_id}: fetch {fetch_time:.2f}s, "
+                f"generate {self._observe('single', generate_started):.2f}s"
             )
-        except Exception as e:
-            logger.error(f"Error in summarization service: {e}", exc_info=True)
+        else:
+            summary_result = await self._map_reduce(thread_id, title, mapper, started, fetch_time)
+        return self._to_response(summary_result), current
+    
+    async def _stream_posts(
+        self,
+        thread_id: str,
+        errors: List[httpx.HTTPError]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a thread's posts, ending early if the Community Service fails.
+        
+        Args:
+            thread_id: Thread ID
+            errors: Receives the error that ended the stream, if any
+            
+        Yields:
+            Posts in thread order
+        """
+        try:
+            async for post in self.community_client.iter_thread_posts(thread_id):
+                yield post
+        except httpx.HTTPError as e:
+            logger.warning(f"Summarizing thread {thread_id} without its remaining posts: {e}")
+            errors.append(e)
+    
+    async def _update(
+        self,
+        thread_id: str,
+        cached: CachedSummary,
+        new_replies: List[str],
+        fetch_time: float
+    ) -> SummarizeResponse:
+        """
+        Fold new replies into a cached summary.
+        
+        Args:
+            thread_id: Thread ID
+            cached: Cached summary record
+            new_replies: Formatted replies posted since the cached summary
+            fetch_time: Seconds spent fetching the thread
+            
+        Returns:
+            Updated summary response
+        """
+        logger.info(f"Updating summary of thread {thread_id} with {len(new_replies)} new replies")
+        update_started = time.perf_counter()
+        summary_result = await self.orchestrator.update_summary(
+            cached.value.model_dump(),
+            "\n".join(new_replies)
+        )
+        logger.info(
+            f"Updated summary of thread {thread_id}: fetch {fetch_time:.2f}s, "
+            f"update {self._observe('update', update_started):.2f}s"
+        )
+        return self._to_response(summary_result)
+    
+    @staticmethod
+    def _format_reply(post: Dict[str, Any]) -> str:
+        """Prompt line for a reply."""
+        author = post.get('author', 'Unknown')
+        content = post.get('content', '')
+        return f"\n- {author}: {content}"
+    
+    @staticmethod
+    def _to_response(summary_result: Dict[str, Any]) -> SummarizeResponse:
+        """Build the response from the LLM's summary components."""
+        return SummarizeResponse(
+            summary=summary_result.get("summary", ""),
+            key_points=summary_result.get("key_points", []),
+            consensus=summary_result.get("consensus"),
+            open_questions=summary_result.get("open_questions")
+        )
+    
+    async def _map_reduce(
+        self,
+        thread_id: str,
+        title: str,
+        mapper: "_SegmentMapper",
+        started: float,
+        fetch_time: float
+    ) -> Dict[str, Any]:
+        """
+        Wait for the segment summaries of a long thread, then combine them.
+        
+        Partial summaries that together still exceed the threshold are
+        summarized again in groups before the final combine call.
+        
+        Args:
+            thread_id: Thread ID (for logging)
+            title: Thread title
+            mapper: Mapper the whole thread was fed to
+            started: When fetching (and with it mapping) started
+            fetch_time: Seconds spent fetching the thread
+            
+        Returns:
+            Dict with summary components
+        """
+        partials = await mapper.finish()
+        segment_count = len(partials)
+        self._segment_counts.observe(segment_count)
+        
+        while len(partials) > 1 and self.tokenizer.count("\n\n".join(partials)) > self.map_reduce_threshold:
+            packer = _SegmentPacker(self.tokenizer, self.segment_max_tokens)
+            groups = [segment for partial in partials for segment in packer.add(partial)]
+            groups.extend(packer.flush())
+            if len(groups) == len(partials):
+                # Each summary fills a segment on its own, combining can't shrink them
+                break
+            logger.info(f"Condensing {len(partials)} partial summaries into {len(groups)}")
+            condenser = _SegmentMapper(self, title)
+            for group in groups:
+                await condenser.submit(group)
+            partials = await condenser.finish()
+        # Mapping overlaps with fetching, so this stage starts with the fetch
+        map_time = self._observe("map", started)
+        
+        reduce_started = time.perf_counter()
+        result = await self.orchestrator.combine_summaries(title, partials)
+        logger.info(
+            f"Summarized thread {thread_id} in {segment_count} segments: "
+            f"fetch {fetch_time:.2f}s, fetch and map {map_time:.2f}s, "
+            f"reduce {self._observe('reduce', reduce_started):.2f}s"
+        )
+        return result
+    
+    def _observe(self, stage: str, started: float) -> float:
+        """Record the duration of a stage and return it in seconds."""
+        return self.tracer.record(stage, started)
+
+
+class _SegmentPacker:
+    """Packs consecutive texts into segments of at most ``max_tokens``."""
+    
+    def __init__(self, tokenizer: Tokenizer, max_tokens: int):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self._current: List[str] = []
+        self._current_tokens = 0
+    
+    def add(self, part: str) -> List[str]:
+        """
+        Add a text, splitting it into chunks if it can't fit a segment alone.
+        
+        Returns:
+            Segments completed by this text
+        """
+        pieces = [part]
+        if self.tokenizer.count(part) > self.max_tokens:
+            pieces = chunk_text(part, self.max_tokens, 0, self.tokenizer)
+        
+        completed = []
+        for piece in pieces:
+            tokens = self.tokenizer.count(piece) + 1
+            if self._current and self._current_tokens + tokens > self.max_tokens:
+                completed.append("\n".join(self._current))
+                self._current, self._current_tokens = [], 0
+            self._current.append(piece)
+            self._current_tokens += tokens
+        return completed
+    
+    def flush(self) -> List[str]:
+        """Return the last, partially filled segment, if any."""
+        if not self._current:
+            return []
+        segment = "\n".join(self._current)
+        self._current, self._current_tokens = [], 0
+        return [segment]
+
+
+class _SegmentMapper:
+    """
+    Summarizes segments as soon as they are complete.
+    
+    At most ``max_concurrency`` summaries run at once; submitting another
+    segment waits for a free slot, which also pauses the caller's post
+    stream so unsummarized text can't pile up.
+    """
+    
+    def __init__(self, service: SummarizationService, title: str):
+        self.orchestrator = service.orchestrator
+        self.title = title
+        self.packer = _SegmentPacker(service.tokenizer, service.segment_max_tokens)
+        self._slots = asyncio.Semaphore(service.max_concurrency)
+        self._tasks: List[asyncio.Task] = []
+    
+    async def add(self, part: str) -> None:
+        """Add thread text, summarizing each segment it completes."""
+        for segment in self.packer.add(part):
+            await self.submit(segment)
+    
+    async def submit(self, segment: str) -> None:
+        """Start summarizing a segment once a slot is free."""
+        await self._slots.acquire()
+        index = len(self._tasks) + 1
+        self._tasks.append(asyncio.ensure_future(self._summarize(index, segment)))
+    
+    async def finish(self) -> List[str]:
+        """Summarize the remaining text and return all summaries in order."""
+        for segment in self.packer.flush():
+            await self.submit(segment)
+        try:
+            return list(await asyncio.gather(*self._tasks))
+        except BaseException:
+            self.cancel()
             raise
+    
+    def cancel(self) -> None:
+        """Cancel summaries still running."""
+        for task in self._tasks:
+            task.cancel()
+    
+    async def _summarize(self, index: int, segment: str) -> str:
+        try:
+            return await self.orchestrator.summarize_segment(
+                f"Title: {self.title}\n(Part {index})\n{segment}"
+            )
+        finally:
+            self._slots.release()
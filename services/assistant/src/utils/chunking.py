@@ -0,0 +1,83 @@
+"""
+Token-bounded, overlapping text chunking for multi-vector indexing.
+"""
+
+import re
+from typing import List
+
+from src.utils.tokens import Tokenizer
+
+# Paragraph breaks, or whitespace after sentence-ending punctuation
+SENTENCE_SPLIT_RE = re.compile(r"\n\s*\n|(?<=[.!?])\s+")
+
+
+def _split_long(sentence: str, max_tokens: int, tokenizer: Tokenizer) -> List[str]:
+    """Split a single over-long sentence on word boundaries."""
+    pieces: List[str] = []
+    current: List[str] = []
+    for word in sentence.split():
+        candidate = " ".join(current + [word])
+        if current and tokenizer.count(candidate) > max_tokens:
+            pieces.append(" ".join(current))
+            current = [word]
+        else:
+            current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int,
+    tokenizer: Tokenizer
+) -> List[str]:
+    """
+    Split text into chunks of whole sentences.
+    
+    Each chunk holds at most ``max_tokens`` tokens and repeats the
+    trailing sentences of the previous chunk, up to ``overlap_tokens``,
+    so passages spanning a boundary are retrievable from either side.
+    
+    Args:
+        text: Text to split
+        max_tokens: Max tokens per chunk
+        overlap_tokens: Tokens of context carried into the next chunk
+        tokenizer: Tokenizer used for counting
+        
+    Returns:
+        Chunks in document order (empty for blank text)
+    """
+    sentences: List[str] = []
+    for sentence in SENTENCE_SPLIT_RE.split(text):
+        sentence = sentence.strip() if sentence else ""
+        if not sentence:
+            continue
+        if tokenizer.count(sentence) > max_tokens:
+            sentences.extend(_split_long(sentence, max_tokens, tokenizer))
+        else:
+            sentences.append(sentence)
+    
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for sentence in sentences:
+        tokens = tokenizer.count(sentence) + 1
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            # Carry trailing sentences forward as overlap
+            overlap: List[str] = []
+            overlap_size = 0
+            for previous in reversed(current):
+                size = tokenizer.count(previous) + 1
+                if overlap_size + size > overlap_tokens or overlap_size + size + tokens > max_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += size
+            current, current_tokens = overlap, overlap_size
+        current.append(sentence)
+        current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
@@ -2,38 +2,113 @@
 HTTP client for communicating with Community Service.
 """
 
+import asyncio
+import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 
 import httpx
 
 from src.config.settings import settings
+from src.utils.http_pools import HTTPPools, http_pools
+from src.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Shared across client instances so indexing events seen by the worker
+# invalidate entries read by the API
+thread_cache: Optional[TTLCache] = (
+    TTLCache(
+        name="community_threads",
+        ttl_seconds=settings.community_cache_ttl_seconds,
+        max_bytes=settings.community_cache_max_bytes
+    )
+    if settings.community_cache_enabled else None
+)
+
 
 class CommunityClient:
     """Async HTTP client for Community Service API."""
     
-    def __init__(self):
-        """Initialize HTTP client."""
+    def __init__(
+        self,
+        cache: Optional[TTLCache] = thread_cache,
+        pools: HTTPPools = http_pools
+    ):
+        """
+        Initialize HTTP client.
+        
+        Args:
+            cache: Read-through cache for threads and posts (None to disable)
+            pools: Connection pools; the ``community`` pool is shared with
+                other clients and closed at shutdown
+        """
         self.base_url = settings.community_service_url
-        self.client: Optional[httpx.AsyncClient] = None
+        self.pools = pools
+        self.client = self._pooled_client()
+        self._owns_client = False
+        self.cache = cache
+        self.max_concurrency = settings.community_max_concurrency
+        self.posts_page_size = settings.community_posts_page_size
+        # None until the bulk endpoint has been probed
+        self._bulk_supported: Optional[bool] = (
+            None if settings.community_bulk_lookup_enabled else False
+        )
     
     async def __aenter__(self):
-        """Async context manager entry."""
+        """Async context manager entry, with a private client closed on exit."""
         self.client = httpx.AsyncClient(base_url=self.base_url, timeout=30.0)
+        self._owns_client = True
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self.client:
-            await self.client.aclose()
+        await self.close()
+    
+    def _pooled_client(self) -> httpx.AsyncClient:
+        return self.pools.client("community", base_url=self.base_url, timeout=30.0)
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the HTTP client, reopening the shared pool if it was closed."""
+        if self.client.is_closed and not self._owns_client:
+            self.client = self._pooled_client()
+        return self.client
+    
+    async def _get_json(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Any, int]:
+        """Fetch a JSON resource and return it with its size in bytes."""
+        response = await self._get_client().get(path, params=params)
+        response.raise_for_status()
+        return response.json(), len(response.content)
+    
+    async def _get_cached(self, key: Tuple[str, str], path: str) -> Any:
+        """Fetch a JSON resource through the read-through cache."""
+        if self.cache is None:
+            data, _ = await self._get_json(path)
+            return data
+        return await self.cache.get_or_load(key, lambda: self._get_json(path))
+    
+    def invalidate_thread(self, thread_id: str) -> None:
+        """
+        Drop cached data for a thread after it changed upstream.
+        
+        Args:
+            thread_id: Thread ID
+        """
+        if self.cache is not None:
+            self.cache.invalidate(("thread", thread_id))
+            self.cache.invalidate(("posts", thread_id))
     
     async def get_thread(self, thread_id: str) -> Dict[str, Any]:
         """
         Fetch a single thread by ID.
         
+        Results are cached and shared between callers; treat them as
+        read-only.
+        
         Args:
             thread_id: Thread ID
             
@@ -41,12 +116,10 @@ class CommunityClient:
             Thread data
         """
         try:
-            if not self.client:
-                self.client = httpx.AsyncClient(base_url=self.base_url, timeout=30.0)
-            
-            response = await self.client.get(f"/api/threads/{thread_id}")
-            response.raise_for_status()
-            return response.json()
+            return await self._get_cached(
+                ("thread", thread_id),
+                f"/api/threads/{thread_id}"
+            )
         except httpx.HTTPError as e:
             logger.error(f"Error fetching thread {thread_id}: {e}")
             raise
@@ -55,43 +128,247 @@ class CommunityClient:
         """
         Fetch multiple threads by IDs.
         
+        Uses the bulk lookup endpoint when the Community Service provides
+        one, otherwise fetches threads concurrently (bounded by
+        ``max_concurrency``). Threads that fail to load are skipped.
+        
         Args:
             thread_ids: List of thread IDs
             
         Returns:
-            List of thread data
+            List of thread data, in the same order as ``thread_ids``
         """
-        threads = []
-        for thread_id in thread_ids:
-            try:
-                thread = await self.get_thread(thread_id)
-                threads.append(thread)
-            except Exception as e:
-                logger.warning(f"Failed to fetch thread {thread_id}: {e}")
-                continue
-        return threads
+        if not thread_ids:
+            return []
+        
+        cached: Dict[str, Dict[str, Any]] = {}
+        if self.cache is not None:
+            for thread_id in thread_ids:
+                thread = self.cache.get(("thread", thread_id))
+                if thread is not None:
+                    cached[thread_id] = thread
+            if len(cached) == len(thread_ids):
+                return [cached[thread_id] for thread_id in thread_ids]
+        
+        if self._bulk_supported is not False:
+            missing = [thread_id for thread_id in thread_ids if thread_id not in cached]
+            fetched = await self._get_threads_bulk(missing)
+            if fetched is not None:
+                by_id = {**cached, **{str(t.get("id")): t for t in fetched}}
+                return [by_id[thread_id] for thread_id in thread_ids if thread_id in by_id]
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def fetch(thread_id: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self.get_thread(thread_id)
+                except Exception as e:
+                    logger.warning(f"Failed to fetch thread {thread_id}: {e}")
+                    return None
+        
+        results = await asyncio.gather(*(fetch(thread_id) for thread_id in thread_ids))
+        return [thread for thread in results if thread is not None]
     
-    async def get_thread_posts(self, thread_id: str) -> List[Dict[str, Any]]:
+    async def _get_threads_bulk(
+        self,
+        thread_ids: List[str]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch threads with a single bulk request.
+        
+        Args:
+            thread_ids: List of thread IDs
+            
+        Returns:
+            Threads ordered like ``thread_ids``, or None if the bulk
+            endpoint is unavailable and the caller should fan out instead
+        """
+        try:
+            response = await self._get_client().post(
+                "/api/threads/batch",
+                json={"ids": thread_ids}
+            )
+            if response.status_code in (404, 405, 501):
+                logger.info("Community Service has no bulk thread lookup, using fan-out")
+                self._bulk_supported = False
+                return None
+            response.raise_for_status()
+            payload = response.json()
+        except httpx.HTTPError as e:
+            logger.warning(f"Bulk thread lookup failed, using fan-out: {e}")
+            return None
+        
+        self._bulk_supported = True
+        if isinstance(payload, dict):
+            payload = payload.get("data", [])
+        
+        by_id = {str(thread.get("id")): thread for thread in payload}
+        if self.cache is not None and by_id:
+            approx_size = len(response.content) // len(by_id)
+            for thread_id, thread in by_id.items():
+                self.cache.set(("thread", thread_id), thread, approx_size)
+        missing = [thread_id for thread_id in thread_ids if thread_id not in by_id]
+        if missing:
+            logger.warning(f"Bulk lookup did not return threads: {missing}")
+        return [by_id[thread_id] for thread_id in thread_ids if thread_id in by_id]
+    
+    async def get_thread_posts(self, thread_id: str, strict: bool = False) -> List[Dict[str, Any]]:
         """
         Fetch all posts in a thread.
         
+        Results are cached and shared between callers; treat them as
+        read-only.
+        
         Args:
             thread_id: Thread ID
+            strict: Raise on errors instead of returning no posts
             
         Returns:
             List of posts
         """
         try:
-            if not self.client:
-                self.client = httpx.AsyncClient(base_url=self.base_url, timeout=30.0)
-            
-            response = await self.client.get(f"/api/threads/{thread_id}/posts")
-            response.raise_for_status()
-            return response.json()
+            return await self._get_cached(
+                ("posts", thread_id),
+                f"/api/threads/{thread_id}/posts"
+            )
         except httpx.HTTPError as e:
             logger.error(f"Error fetching posts for thread {thread_id}: {e}")
+            if strict:
+                raise
             return []
     
+    async def iter_thread_posts(
+        self,
+        thread_id: str,
+        page_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over the posts of a thread one page at a time.
+        
+        The next page is requested while the current one is consumed, and
+        at most two pages are held in memory. Posts are served from the
+        cache instead when ``get_thread_posts`` already cached them. Pages
+        repeating earlier posts are handled as in ``_iter_pages``.
+        
+        Args:
+            thread_id: Thread ID
+            page_size: Posts per request (defaults to settings)
+            
+        Yields:
+            Posts in thread order
+        """
+        if self.cache is not None:
+            cached = self.cache.get(("posts", thread_id))
+            if cached is not None:
+                for post in cached:
+                    yield post
+                return
+        
+        pages = self._iter_pages(
+            f"/api/threads/{thread_id}/posts",
+            page_size or self.posts_page_size,
+            f"posts of thread {thread_id}"
+        )
+        async for post in pages:
+            yield post
+    
+    async def iter_threads(self, page_size: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over every thread, newest first, one page at a time.
+        
+        Listed threads embed only their latest posts; fetch the posts
+        separately where all of them are needed.
+        
+        Args:
+            page_size: Threads per request (defaults to the posts page size)
+            
+        Yields:
+            Threads
+        """
+        # The listing reports the page length as its total, so only a short page ends it
+        pages = self._iter_pages(
+            "/api/threads",
+            page_size or self.posts_page_size,
+            "threads",
+            use_total=False
+        )
+        async for thread in pages:
+            yield thread
+    
+    async def _iter_pages(
+        self,
+        path: str,
+        page_size: int,
+        description: str,
+        use_total: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Page through a listing with ``limit`` and ``offset``.
+        
+        The next page is requested while the current one is consumed.
+        Items seen on an earlier page are skipped, and a page with no new
+        items ends the listing, so a server that ignores ``offset`` can't
+        make it loop.
+        
+        Args:
+            path: Listing path
+            page_size: Items per request
+            description: What is listed, for log messages
+            use_total: Also stop once the reported total is reached
+            
+        Yields:
+            Items in listing order
+        """
+        def request(offset: int) -> asyncio.Future:
+            return asyncio.ensure_future(
+                self._get_json(path, params={"limit": page_size, "offset": offset})
+            )
+        
+        offset = 0
+        seen: Set[str] = set()
+        pending = request(offset)
+        try:
+            while pending is not None:
+                payload, _ = await pending
+                pending = None
+                items, total = self._unwrap_page(payload)
+                new_items = [item for item in items if self._item_key(item) not in seen]
+                if items and not new_items:
+                    logger.warning(
+                        f"Page of {description} at offset {offset} only repeated "
+                        "earlier items, the server may be ignoring pagination"
+                    )
+                    break
+                seen.update(self._item_key(item) for item in new_items)
+                offset += len(items)
+                # A short page, or a server that ignored the limit, ends the listing
+                more = len(items) == page_size and (total is None or not use_total or offset < total)
+                if more:
+                    pending = request(offset)
+                for item in new_items:
+                    yield item
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching {description} at offset {offset}: {e}")
+            raise
+        finally:
+            if pending is not None:
+                pending.cancel()
+    
+    @staticmethod
+    def _item_key(item: Dict[str, Any]) -> str:
+        """Identity of a listed item, its ID or else its content."""
+        item_id = item.get("id")
+        return str(item_id) if item_id is not None else json.dumps(item, sort_keys=True, default=str)
+    
+    @staticmethod
+    def _unwrap_page(payload: Any) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Items and total count from a bare list or an ``ApiResponse`` envelope."""
+        if isinstance(payload, list):
+            return payload, None
+        pagination = (payload.get("meta") or {}).get("pagination") or {}
+        return payload.get("data") or [], pagination.get("total")
+    
     async def get_experts_by_tags(
         self,
         tags: List[str],
@@ -108,18 +385,16 @@ class CommunityClient:
             List of experts
         """
         try:
-            if not self.client:
-                self.client = httpx.AsyncClient(base_url=self.base_url, timeout=30.0)
-            
             params = {"tags": ",".join(tags), "limit": top_k}
-            response = await self.client.get("/api/users/experts", params=params)
+            response = await self._get_client().get("/api/users/experts", params=params)
             response.raise_for_status()
-            return response.json()
+            experts, _ = self._unwrap_page(response.json())
+            return experts
         except httpx.HTTPError as e:
             logger.error(f"Error fetching experts: {e}")
             return []
     
     async def close(self) -> None:
-        """Close HTTP client."""
-        if self.client:
+        """Close a private client; the shared pool is closed with ``http_pools``."""
+        if self._owns_client:
             await self.client.aclose()
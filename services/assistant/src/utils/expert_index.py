@@ -0,0 +1,211 @@
+"""
+In-process tag to user contribution index for expert lookups.
+"""
+
+import heapq
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.utils.metrics import metrics
+
+
+@dataclass
+class ContributionStats:
+    """A user's contributions to threads with a given tag."""
+    threads: int = 0
+    posts: int = 0
+    accepted_answers: int = 0
+    upvotes: int = 0
+    
+    @property
+    def count(self) -> int:
+        """Threads started plus replies posted."""
+        return self.threads + self.posts
+    
+    def add(self, other: "ContributionStats", sign: int = 1) -> None:
+        """Add (or with ``sign=-1`` subtract) another set of stats."""
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + sign * getattr(other, field.name))
+    
+    def is_empty(self) -> bool:
+        return not any(getattr(self, field.name) for field in fields(self))
+
+
+ExpertScorer = Callable[[ContributionStats], float]
+
+
+def weighted_scorer(weights: Dict[str, float]) -> ExpertScorer:
+    """
+    Score contributions as a weighted sum of their fields.
+    
+    Args:
+        weights: Weight per ``ContributionStats`` field (missing fields count 0)
+        
+    Returns:
+        Scoring function
+    """
+    def score(stats: ContributionStats) -> float:
+        return sum(weight * getattr(stats, name, 0) for name, weight in weights.items())
+    return score
+
+
+@dataclass
+class _IndexedThread:
+    tags: Tuple[str, ...]
+    contributions: Dict[str, ContributionStats]
+
+
+class ExpertIndex:
+    """
+    Inverted index from tag to the users contributing to threads with it.
+    
+    Each indexed thread's contributions are kept so a re-indexed thread
+    replaces its previous counts. Per-tag totals are maintained
+    incrementally, so a lookup only scores the users of the requested
+    tags. With several tags a user's score is the sum over the tags.
+    Scores are mapped to ``[0, 1)`` with ``score / (score + saturation)``.
+    
+    The index lives in memory, so after a start it only knows threads
+    indexed since. ``complete`` is set once a backfill has recorded every
+    existing thread; until then lookups must not treat it as authoritative.
+    """
+    
+    def __init__(self, scorer: ExpertScorer, saturation: float):
+        """
+        Initialize index.
+        
+        Args:
+            scorer: Raw score of a user's contributions to one tag
+            saturation: Raw score that maps to an expertise score of 0.5
+        """
+        self.scorer = scorer
+        self.saturation = saturation
+        self.complete = False
+        
+        self._threads: Dict[str, _IndexedThread] = {}
+        self._totals: Dict[str, Dict[str, ContributionStats]] = {}
+        self._user_threads: Dict[str, Set[str]] = {}
+        self._usernames: Dict[str, str] = {}
+        
+        self._indexed_threads = metrics.gauge(
+            "expert_index_threads",
+            "Threads contributing to the local expert index"
+        )
+    
+    def update_thread(
+        self,
+        thread_id: str,
+        thread: Dict[str, Any],
+        posts: Optional[Iterable[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Replace a thread's contributions with its current state.
+        
+        Args:
+            thread_id: Thread ID
+            thread: Thread data from the Community Service
+            posts: Thread posts (defaults to the ``posts`` embedded in the thread)
+        """
+        contributions: Dict[str, ContributionStats] = {}
+        
+        author_id = self._user(thread)
+        if author_id:
+            contributions[author_id] = ContributionStats(threads=1)
+        for post in thread.get("posts", []) if posts is None else posts:
+            user_id = self._user(post)
+            if not user_id:
+                continue
+            stats = contributions.setdefault(user_id, ContributionStats())
+            stats.posts += 1
+            stats.accepted_answers += 1 if post.get("isAcceptedAnswer") else 0
+            stats.upvotes += int(post.get("upvotes") or 0)
+        
+        self.remove_thread(thread_id)
+        tags = tuple(dict.fromkeys(tag.lower() for tag in thread.get("tags") or []))
+        if not tags or not contributions:
+            return
+        self._threads[thread_id] = _IndexedThread(tags, contributions)
+        for user_id, stats in contributions.items():
+            self._user_threads.setdefault(user_id, set()).add(thread_id)
+            for tag in tags:
+                self._totals.setdefault(tag, {}).setdefault(user_id, ContributionStats()).add(stats)
+        self._indexed_threads.set(len(self._threads))
+    
+    def remove_thread(self, thread_id: str) -> None:
+        """Subtract a thread's contributions, if it was indexed."""
+        indexed = self._threads.pop(thread_id, None)
+        if indexed is None:
+            return
+        for user_id, stats in indexed.contributions.items():
+            user_threads = self._user_threads.get(user_id)
+            if user_threads is not None:
+                user_threads.discard(thread_id)
+                if not user_threads:
+                    del self._user_threads[user_id]
+            for tag in indexed.tags:
+                users = self._totals[tag]
+                users[user_id].add(stats, sign=-1)
+                if users[user_id].is_empty():
+                    del users[user_id]
+                if not users:
+                    del self._totals[tag]
+        self._indexed_threads.set(len(self._threads))
+    
+    def top_experts(self, tags: List[str], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Find the highest-scoring contributors to threads with any of the tags.
+        
+        Args:
+            tags: Tags to match
+            top_k: Number of experts to return
+            
+        Returns:
+            Experts as ``user_id``, ``username``, ``expertise_score`` and
+            ``relevant_contributions`` dicts, best first (empty if no
+            indexed thread has the tags)
+        """
+        wanted = list(dict.fromkeys(tag.lower() for tag in tags))
+        scores: Dict[str, float] = {}
+        for tag in wanted:
+            for user_id, stats in self._totals.get(tag, {}).items():
+                scores[user_id] = scores.get(user_id, 0.0) + self.scorer(stats)
+        
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], item[0]))
+        wanted_set = set(wanted)
+        experts = []
+        for user_id, score in best:
+            if score <= 0:
+                break
+            # Count each contribution once even if its thread has several of the tags
+            contributions = sum(
+                self._threads[thread_id].contributions[user_id].count
+                for thread_id in self._user_threads.get(user_id, ())
+                if wanted_set.intersection(self._threads[thread_id].tags)
+            )
+            experts.append({
+                "user_id": user_id,
+                "username": self._usernames.get(user_id, ""),
+                "expertise_score": round(score / (score + self.saturation), 4),
+                "relevant_contributions": contributions
+            })
+        return experts
+    
+    def missing_tags(self, tags: List[str]) -> List[str]:
+        """Requested tags without any indexed contributions, in request order."""
+        return [tag for tag in dict.fromkeys(tags) if tag.lower() not in self._totals]
+    
+    def __len__(self) -> int:
+        return len(self._threads)
+    
+    def _user(self, item: Dict[str, Any]) -> Optional[str]:
+        """Author ID of a thread or post, remembering the author's name."""
+        author = item.get("author")
+        author = author if isinstance(author, dict) else {}
+        user_id = item.get("authorId") or author.get("id")
+        if not user_id:
+            return None
+        user_id = str(user_id)
+        name = author.get("name") or author.get("username")
+        if name:
+            self._usernames[user_id] = name
+        return user_id
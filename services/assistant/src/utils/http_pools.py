@@ -0,0 +1,245 @@
+"""
+Shared keep-alive HTTP connection pools for upstream services.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+import httpx
+
+from src.config.settings import settings
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """
+    Transport that times pool waits and connection setup.
+    
+    Uses httpcore's ``trace`` extension: a request has waited for the pool
+    until it either starts opening a connection or starts sending on a
+    reused one, and connection setup (TCP, TLS and the HTTP/2 preface)
+    lasts until the request is sent.
+    """
+    
+    def __init__(self, pool: str, **kwargs: Any):
+        """
+        Initialize transport.
+        
+        Args:
+            pool: Pool name used as the metric label
+            **kwargs: ``httpx.AsyncHTTPTransport`` arguments
+        """
+        super().__init__(**kwargs)
+        labels = {"pool": pool}
+        self._wait = metrics.histogram(
+            "http_pool_wait_seconds",
+            "Time requests waited for a pooled connection",
+            buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+            labels=labels
+        )
+        self._connect = metrics.histogram(
+            "http_connect_duration_seconds",
+            "Time to open a new upstream connection, including TLS",
+            labels=labels
+        )
+        self._opened = metrics.counter(
+            "http_connections_opened_total",
+            "Upstream connections opened",
+            labels=labels
+        )
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        connecting: Optional[float] = None
+        waiting = True
+        outer = request.extensions.get("trace")
+        
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            nonlocal connecting, waiting
+            if event.endswith("connect_tcp.started"):
+                connecting = time.perf_counter()
+                self._opened.inc()
+            if waiting and (connecting is not None or event.endswith("send_request_headers.started")):
+                waiting = False
+                self._wait.observe((connecting or time.perf_counter()) - started)
+            if connecting is not None and event.endswith("send_request_headers.started"):
+                self._connect.observe(time.perf_counter() - connecting)
+                connecting = None
+            if outer is not None:
+                await outer(event, info)
+        
+        request.extensions["trace"] = trace
+        return await super().handle_async_request(request)
+
+
+class HTTPPools:
+    """
+    Named connection pools, one ``httpx.AsyncClient`` per upstream.
+    
+    Every component talking to the same upstream shares its pool, so
+    keep-alive connections opened by one (e.g. the indexing worker) serve
+    the others (the API), and limits apply per upstream host. Clients are
+    created on first use and closed together at shutdown.
+    """
+    
+    def __init__(
+        self,
+        max_connections: int = settings.http_max_connections,
+        max_keepalive_connections: int = settings.http_max_keepalive_connections,
+        keepalive_expiry: float = settings.http_keepalive_expiry_seconds,
+        pool_timeout: float = settings.http_pool_timeout_seconds,
+        pool_max_connections: Optional[Dict[str, int]] = None,
+        http2: bool = settings.http2_enabled
+    ):
+        """
+        Initialize registry.
+        
+        Args:
+            max_connections: Max open connections per pool
+            max_keepalive_connections: Idle connections kept per pool
+            keepalive_expiry: Seconds an idle connection is kept
+            pool_timeout: Max seconds to wait for a free connection
+            pool_max_connections: Per-pool overrides of ``max_connections``
+            http2: Negotiate HTTP/2 where the upstream supports it
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.pool_timeout = pool_timeout
+        self.pool_max_connections = (
+            settings.http_pool_max_connections if pool_max_connections is None else pool_max_connections
+        )
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requires the h2 package (pip install httpx[http2]), using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+    
+    def limits(self, name: str) -> httpx.Limits:
+        """
+        Connection limits of a pool.
+        
+        Args:
+            name: Pool name
+            
+        Returns:
+            Limits for the pool's transport
+        """
+        max_connections = self.pool_max_connections.get(name, self.max_connections)
+        return httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(self.max_keepalive_connections, max_connections),
+            keepalive_expiry=self.keepalive_expiry
+        )
+    
+    def client(self, name: str, base_url: str = "", timeout: float = 30.0) -> httpx.AsyncClient:
+        """
+        Get or create the client of a pool.
+        
+        ``base_url`` and ``timeout`` only apply when the client is created.
+        
+        Args:
+            name: Pool name, e.g. ``community`` or ``openai``
+            base_url: Base URL for relative request paths
+            timeout: Default request timeout in seconds
+            
+        Returns:
+            Shared client (do not close it; see ``close``)
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = httpx.AsyncClient(
+                base_url=base_url,
+                timeout=httpx.Timeout(timeout, pool=self.pool_timeout),
+                transport=InstrumentedTransport(pool=name, limits=self.limits(name), http2=self.http2)
+            )
+        return client
+    
+    async def warm_up(self, urls: Dict[str, str], connections: int) -> None:
+        """
+        Open keep-alive connections ahead of the first requests.
+        
+        Only pools that components already created are warmed. Any
+        response (even an error status) leaves a connection in the pool;
+        failures are logged and otherwise ignored.
+        
+        Args:
+            urls: Pool name to a cheap URL on its upstream
+            connections: Concurrent requests, and so connections, per pool
+        """
+        async def ping(client: httpx.AsyncClient, name: str, url: str) -> None:
+            try:
+                await client.get(url)
+            except httpx.HTTPError as e:
+                logger.warning(f"Could not pre-open {name} connection to {url}: {e}")
+        
+        pings = []
+        for name, url in urls.items():
+            client = self._clients.get(name)
+            if client is None or client.is_closed:
+                continue
+            count = min(connections, self.limits(name).max_keepalive_connections or 0)
+            pings.extend(ping(client, name, url) for _ in range(count))
+        if not pings:
+            return
+        
+        started = time.perf_counter()
+        await asyncio.gather(*pings)
+        logger.info(f"Pre-opened HTTP connections to {', '.join(urls)} in {time.perf_counter() - started:.2f}s")
+    
+    async def close(self) -> None:
+        """Close every pool and its connections."""
+        clients, self._clients = list(self._clients.values()), {}
+        await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
+
+
+class PooledClient(Generic[T]):
+    """
+    SDK client built on a pool's httpx client.
+    
+    SDKs such as OpenAI's keep the httpx client they are given, which is
+    closed with the pools at shutdown. ``get`` is called at use time and
+    rebuilds the SDK client whenever the pool has been reopened.
+    """
+    
+    def __init__(
+        self,
+        pools: HTTPPools,
+        name: str,
+        build: Callable[[httpx.AsyncClient], T],
+        timeout: float = 30.0
+    ):
+        """
+        Initialize wrapper.
+        
+        Args:
+            pools: Connection pools
+            name: Pool name
+            build: Creates the SDK client on an httpx client
+            timeout: Default request timeout if the pool is created here
+        """
+        self.pools = pools
+        self.name = name
+        self.build = build
+        self.timeout = timeout
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._client: Optional[T] = None
+    
+    def get(self) -> T:
+        """Return the SDK client for the pool's current httpx client."""
+        http_client = self.pools.client(self.name, timeout=self.timeout)
+        if http_client is not self._http_client:
+            self._client = self.build(http_client)
+            self._http_client = http_client
+        return self._client
+
+
+# Shared by the API and the indexing worker, closed in the app lifespan
+http_pools = HTTPPools()
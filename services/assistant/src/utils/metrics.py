@@ -0,0 +1,222 @@
+"""
+Lightweight in-process metrics primitives.
+
+Counters, gauges and histograms are registered on a shared registry so
+components can record measurements without depending on an external
+metrics library.
+"""
+
+import bisect
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    """Build a hashable, order-independent key from a label dict."""
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str, quote: bool = True) -> str:
+    """Escape backslashes, newlines and (in label values) double quotes."""
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quote else value
+
+
+def _format_labels(labels: LabelKey) -> str:
+    """Render a label key as ``{name="value",...}`` (empty without labels)."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value, dropping the fraction of whole numbers."""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing counter."""
+    
+    def __init__(self, name: str, description: str = "", labels: LabelKey = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the counter by a non-negative amount."""
+        if amount < 0:
+            raise ValueError("Counter can only be incremented by non-negative amounts")
+        self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down."""
+    
+    def __init__(self, name: str, description: str = "", labels: LabelKey = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.value = 0.0
+    
+    def set(self, value: float) -> None:
+        """Set the gauge to a value."""
+        self.value = value
+    
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the gauge."""
+        self.value += amount
+    
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrease the gauge."""
+        self.value -= amount
+
+
+class Histogram:
+    """Cumulative bucketed histogram."""
+    
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        buckets: Optional[Sequence[float]] = None,
+        labels: LabelKey = ()
+    ):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets: List[float] = sorted(buckets or DEFAULT_BUCKETS)
+        # One extra slot for observations above the largest bucket (+Inf)
+        self.bucket_counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+    
+    def cumulative_counts(self) -> List[int]:
+        """Return cumulative counts per bucket, ending with the +Inf bucket."""
+        cumulative = []
+        running = 0
+        for bucket_count in self.bucket_counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative
+    
+    @property
+    def mean(self) -> float:
+        """Average of all observations."""
+        return self.sum / self.count if self.count else 0.0
+
+
+class MetricsRegistry:
+    """Registry of named metrics, created on first use."""
+    
+    def __init__(self):
+        self._counters: Dict[Tuple[str, LabelKey], Counter] = {}
+        self._gauges: Dict[Tuple[str, LabelKey], Gauge] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+    
+    def counter(
+        self,
+        name: str,
+        description: str = "",
+        labels: Optional[Dict[str, str]] = None
+    ) -> Counter:
+        """Get or create a counter."""
+        key = (name, _label_key(labels))
+        if key not in self._counters:
+            self._counters[key] = Counter(name, description, key[1])
+        return self._counters[key]
+    
+    def gauge(
+        self,
+        name: str,
+        description: str = "",
+        labels: Optional[Dict[str, str]] = None
+    ) -> Gauge:
+        """Get or create a gauge."""
+        key = (name, _label_key(labels))
+        if key not in self._gauges:
+            self._gauges[key] = Gauge(name, description, key[1])
+        return self._gauges[key]
+    
+    def histogram(
+        self,
+        name: str,
+        description: str = "",
+        buckets: Optional[Sequence[float]] = None,
+        labels: Optional[Dict[str, str]] = None
+    ) -> Histogram:
+        """Get or create a histogram."""
+        key = (name, _label_key(labels))
+        if key not in self._histograms:
+            self._histograms[key] = Histogram(name, description, buckets, key[1])
+        return self._histograms[key]
+    
+    def counters(self) -> List[Counter]:
+        """All registered counters."""
+        return list(self._counters.values())
+    
+    def gauges(self) -> List[Gauge]:
+        """All registered gauges."""
+        return list(self._gauges.values())
+    
+    def histograms(self) -> List[Histogram]:
+        """All registered histograms."""
+        return list(self._histograms.values())
+    
+    def render_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        
+        Returns:
+            Exposition text, one ``HELP``/``TYPE`` header per metric name
+        """
+        lines: List[str] = []
+        families = (
+            ("counter", self._counters),
+            ("gauge", self._gauges),
+            ("histogram", self._histograms),
+        )
+        for metric_type, registered in families:
+            by_name: Dict[str, list] = {}
+            for (name, _), metric in registered.items():
+                by_name.setdefault(name, []).append(metric)
+            for name in sorted(by_name):
+                series = sorted(by_name[name], key=lambda metric: metric.labels)
+                lines.append(f"# HELP {name} {_escape(series[0].description, quote=False)}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for metric in series:
+                    if metric_type != "histogram":
+                        lines.append(f"{name}{_format_labels(metric.labels)} {_format_value(metric.value)}")
+                        continue
+                    bounds = [_format_value(bound) for bound in metric.buckets] + ["+Inf"]
+                    for bound, count in zip(bounds, metric.cumulative_counts()):
+                        labels = _format_labels(metric.labels + (("le", bound),))
+                        lines.append(f"{name}_bucket{labels} {count}")
+                    labels = _format_labels(metric.labels)
+                    lines.append(f"{name}_sum{labels} {_format_value(metric.sum)}")
+                    lines.append(f"{name}_count{labels} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+
+# Singleton metrics registry
+metrics = MetricsRegistry()
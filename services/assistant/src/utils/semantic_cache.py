@@ -0,0 +1,216 @@
+"""
+Similarity-keyed cache for responses derived from a query embedding.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.utils.metrics import metrics
+
+
+@dataclass
+class _Entry:
+    """Cached value and the bookkeeping needed to expire or invalidate it."""
+    value: Any
+    scope: Hashable
+    thread_ids: Tuple[str, ...]
+    expires_at: float
+
+
+class SemanticCache:
+    """
+    Cache matched by cosine similarity of query embeddings.
+    
+    A lookup returns the most similar cached entry within the same scope
+    if its similarity reaches ``threshold``. Entries expire after
+    ``ttl_seconds`` and the least recently used entry is evicted once
+    ``max_entries`` is reached. Each entry records the thread IDs it was
+    built from, so an indexing event for any of them drops it.
+    
+    Embeddings live in a preallocated matrix with one row per slot, so a
+    lookup is a single matrix-vector product.
+    """
+    
+    def __init__(self, name: str, threshold: float, ttl_seconds: float, max_entries: int):
+        """
+        Initialize cache.
+        
+        Args:
+            name: Name used to label cache metrics
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Time after which entries expire
+            max_entries: Max number of cached entries
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        
+        self._vectors: Optional[np.ndarray] = None
+        self._occupied = np.zeros(max_entries, dtype=bool)
+        self._scope_hashes = np.zeros(max_entries, dtype=np.int64)
+        # slot -> entry, least recently used first
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._free: List[int] = list(range(max_entries - 1, -1, -1))
+        self._by_thread: Dict[str, Set[int]] = {}
+        # Thread IDs invalidated while each tracked computation was running
+        self._tracked: List[Set[str]] = []
+        
+        labels = {"cache": name}
+        self._hits = metrics.counter("cache_hits_total", "Cache hits", labels=labels)
+        self._misses = metrics.counter("cache_misses_total", "Cache misses", labels=labels)
+        self._evictions = metrics.counter(
+            "cache_evictions_total", "Cache evictions", labels=labels
+        )
+        self._invalidations = metrics.counter(
+            "cache_invalidations_total",
+            "Cache entries dropped because a source changed",
+            labels=labels
+        )
+        self._size = metrics.gauge("cache_entries", "Cached entries", labels=labels)
+    
+    def get(self, vector: List[float], scope: Hashable = None) -> Optional[Tuple[Any, float]]:
+        """
+        Find a cached value for a similar query.
+        
+        Args:
+            vector: Query embedding
+            scope: Only entries stored with an equal scope can match
+            
+        Returns:
+            ``(value, similarity)`` for the best match, or None
+        """
+        if self._vectors is None:
+            self._misses.inc()
+            return None
+        
+        query = self._normalize(vector)
+        mask = self._occupied & (self._scope_hashes == hash(scope))
+        scores = np.where(mask, self._vectors @ query, -np.inf)
+        slot = int(np.argmax(scores))
+        similarity = float(scores[slot])
+        
+        entry = self._entries.get(slot)
+        if entry is None or similarity < self.threshold or entry.scope != scope:
+            self._misses.inc()
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(slot)
+            self._misses.inc()
+            return None
+        
+        self._entries.move_to_end(slot)
+        self._hits.inc()
+        return entry.value, similarity
+    
+    def track(self) -> Set[str]:
+        """
+        Start tracking invalidations for a value about to be computed.
+        
+        Pass the returned ticket to ``put`` and release it with ``untrack``.
+        """
+        ticket: Set[str] = set()
+        self._tracked.append(ticket)
+        return ticket
+    
+    def untrack(self, ticket: Set[str]) -> None:
+        """Stop tracking invalidations for a ticket."""
+        for i, tracked in enumerate(self._tracked):
+            if tracked is ticket:
+                del self._tracked[i]
+                return
+    
+    def put(
+        self,
+        vector: List[float],
+        value: Any,
+        thread_ids: Iterable[str],
+        scope: Hashable = None,
+        ticket: Optional[Set[str]] = None
+    ) -> bool:
+        """
+        Cache a value computed for a query.
+        
+        Args:
+            vector: Query embedding
+            value: Value to cache
+            thread_ids: Threads the value was built from
+            scope: Scope the value is valid for
+            ticket: Ticket from ``track`` taken before computing the value
+            
+        Returns:
+            False if a source thread changed while the value was computed
+        """
+        thread_ids = tuple(dict.fromkeys(thread_ids))
+        if ticket is not None and ticket.intersection(thread_ids):
+            return False
+        
+        query = self._normalize(vector)
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, query.shape[0]), dtype=np.float32)
+        if not self._free:
+            self._remove(next(iter(self._entries)))
+            self._evictions.inc()
+        
+        slot = self._free.pop()
+        self._vectors[slot] = query
+        self._occupied[slot] = True
+        self._scope_hashes[slot] = hash(scope)
+        self._entries[slot] = _Entry(
+            value=value,
+            scope=scope,
+            thread_ids=thread_ids,
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        for thread_id in thread_ids:
+            self._by_thread.setdefault(thread_id, set()).add(slot)
+        self._size.set(len(self._entries))
+        return True
+    
+    def invalidate_thread(self, thread_id: str) -> int:
+        """
+        Drop every entry built from a thread.
+        
+        Returns:
+            Number of entries dropped
+        """
+        for ticket in self._tracked:
+            ticket.add(thread_id)
+        slots = list(self._by_thread.get(thread_id, ()))
+        for slot in slots:
+            self._remove(slot)
+        self._invalidations.inc(len(slots))
+        return len(slots)
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        for slot in list(self._entries):
+            self._remove(slot)
+    
+    def _remove(self, slot: int) -> None:
+        """Free a slot and unlink it from its threads."""
+        entry = self._entries.pop(slot, None)
+        if entry is None:
+            return
+        self._occupied[slot] = False
+        self._free.append(slot)
+        for thread_id in entry.thread_ids:
+            slots = self._by_thread.get(thread_id)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._by_thread[thread_id]
+        self._size.set(len(self._entries))
+    
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        """L2-normalize a vector so dot products are cosine similarities."""
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+    
+    def __len__(self) -> int:
+        return len(self._entries)
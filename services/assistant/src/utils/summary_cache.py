@@ -0,0 +1,233 @@
+"""
+Versioned cache of thread summaries with stale marking and background refresh.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedSummary:
+    """A summary and the thread state it was generated from."""
+    version: str
+    value: Any
+    model: str
+    thread_hash: str
+    post_count: int
+    last_post_id: Optional[str]
+    last_post_at: str
+    expires_at: float = 0.0
+    stale: bool = False
+    hits: int = 0
+
+
+def summary_version(
+    thread_id: str,
+    thread: Dict[str, Any],
+    post_count: int,
+    last_post: Optional[Dict[str, Any]],
+    model: str
+) -> CachedSummary:
+    """
+    Describe the thread state a summary is generated from.
+    
+    The version changes when the thread's title, content, tags or status
+    change, a post is added or removed, or the model changes. The thread's
+    updatedAt is left out because the Community Service bumps it on every
+    read (view counts); post edits and votes don't count either.
+    
+    Args:
+        thread_id: Thread ID
+        thread: Thread data from the Community Service
+        post_count: Number of posts
+        last_post: Most recent post (None if there are none)
+        model: LLM model generating the summary
+        
+    Returns:
+        Summary record without a value, keyed by its version string
+    """
+    thread_hash = hashlib.sha256(json.dumps(
+        [thread.get(field) for field in ("title", "content", "tags", "status")],
+        sort_keys=True,
+        default=str
+    ).encode("utf-8")).hexdigest()[:16]
+    last_post_id = str(last_post.get("id", "")) if last_post else None
+    last_post_at = str(last_post.get("createdAt") or "") if last_post else ""
+    version = ":".join([
+        thread_id, thread_hash, str(post_count), last_post_id or "", last_post_at, model
+    ])
+    return CachedSummary(
+        version=version,
+        value=None,
+        model=model,
+        thread_hash=thread_hash,
+        post_count=post_count,
+        last_post_id=last_post_id,
+        last_post_at=last_post_at
+    )
+
+
+class SummaryCache:
+    """
+    Thread summaries keyed by thread ID and checked against a version.
+    
+    Indexing events mark a thread's summary stale instead of dropping it,
+    so the next request can update it from the new posts alone. Summaries
+    requested at least ``refresh_min_hits`` times are refreshed in the
+    background ``refresh_delay`` seconds after being marked stale, which
+    folds a burst of replies into one refresh.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        refresh_min_hits: int = 0,
+        refresh_delay: float = 0.0
+    ):
+        """
+        Initialize cache.
+        
+        Args:
+            ttl_seconds: Time after which a summary must be revalidated
+            max_entries: Max number of cached summaries
+            refresh_min_hits: Hits that make a summary worth refreshing
+                in the background (0 to disable)
+            refresh_delay: Seconds to wait after a stale mark before refreshing
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.refresh_min_hits = refresh_min_hits
+        self.refresh_delay = refresh_delay
+        self.refresher: Optional[Callable[[str], Awaitable[Any]]] = None
+        
+        self._entries: "OrderedDict[str, CachedSummary]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        
+        labels = {"cache": "summaries"}
+        self._evictions = metrics.counter(
+            "cache_evictions_total", "Cache evictions", labels=labels
+        )
+        self._stale_marked = metrics.counter(
+            "summary_cache_stale_marked_total",
+            "Cached summaries marked stale by indexing events"
+        )
+        self._refreshes = metrics.counter(
+            "summary_cache_background_refreshes_total",
+            "Stale summaries of frequently requested threads refreshed in the background"
+        )
+        self._size = metrics.gauge("cache_entries", "Cached entries", labels=labels)
+    
+    def get(self, thread_id: str) -> Optional[CachedSummary]:
+        """
+        Get the cached summary record for a thread.
+        
+        Args:
+            thread_id: Thread ID
+            
+        Returns:
+            Record (possibly stale or expired), or None
+        """
+        entry = self._entries.get(thread_id)
+        if entry is not None:
+            self._entries.move_to_end(thread_id)
+        return entry
+    
+    def is_fresh(self, entry: CachedSummary) -> bool:
+        """Whether a record can be served without checking the thread."""
+        return not entry.stale and entry.expires_at > time.monotonic()
+    
+    def put(self, thread_id: str, entry: CachedSummary) -> None:
+        """
+        Store a summary record, evicting the least recently used if full.
+        
+        Args:
+            thread_id: Thread ID
+            entry: Record with its value set
+        """
+        previous = self._entries.pop(thread_id, None)
+        # Popularity carries over so hot threads keep being refreshed; a new
+        # summary was generated for one request
+        entry.hits = previous.hits if previous is not None else 1
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        self._entries[thread_id] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions.inc()
+        self._size.set(len(self._entries))
+    
+    def mark_stale(self, thread_id: str) -> bool:
+        """
+        Mark a thread's summary as outdated and schedule a refresh if hot.
+        
+        Args:
+            thread_id: Thread ID
+            
+        Returns:
+            True if a cached summary was marked
+        """
+        entry = self._entries.get(thread_id)
+        if entry is None:
+            return False
+        entry.stale = True
+        self._stale_marked.inc()
+        
+        if (
+            self.refresher is not None
+            and self.refresh_min_hits > 0
+            and entry.hits >= self.refresh_min_hits
+            and thread_id not in self._refreshing
+        ):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return True
+            self._refreshing[thread_id] = loop.create_task(self._refresh(thread_id))
+        return True
+    
+    async def close(self) -> None:
+        """Cancel pending background refreshes."""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def clear(self) -> None:
+        """Drop all summaries and cancel pending refreshes."""
+        for task in self._refreshing.values():
+            task.cancel()
+        self._refreshing.clear()
+        self._entries.clear()
+        self._size.set(0)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    async def _refresh(self, thread_id: str) -> None:
+        """Regenerate a hot thread's summary after the refresh delay."""
+        try:
+            await asyncio.sleep(self.refresh_delay)
+            entry = self._entries.get(thread_id)
+            if entry is None or not entry.stale:
+                return
+            # Only refresh again if the thread is still being read
+            entry.hits = 0
+            logger.info(f"Refreshing stale summary of thread {thread_id} in the background")
+            await self.refresher(thread_id)
+            self._refreshes.inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error refreshing summary of thread {thread_id}: {e}")
+        finally:
+            self._refreshing.pop(thread_id, None)
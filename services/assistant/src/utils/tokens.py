@@ -0,0 +1,79 @@
+"""
+Token counting with cached tokenizers.
+"""
+
+import logging
+from functools import lru_cache
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Rough characters per token for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+class Tokenizer:
+    """Counts and truncates text in model tokens using tiktoken."""
+    
+    def __init__(self, encoding):
+        self.encoding = encoding
+    
+    def encode(self, text: str) -> List[int]:
+        """Encode text to token IDs."""
+        return self.encoding.encode(text, disallowed_special=())
+    
+    def count(self, text: str) -> int:
+        """Number of tokens in text."""
+        return len(self.encode(text))
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most ``max_tokens`` tokens."""
+        tokens = self.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max(max_tokens, 0)])
+
+
+class ApproximateTokenizer(Tokenizer):
+    """Character-based estimate used when no tiktoken encoding is available."""
+    
+    def __init__(self):
+        super().__init__(encoding=None)
+    
+    def count(self, text: str) -> int:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        return text[:max(max_tokens, 0) * CHARS_PER_TOKEN]
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model: str) -> Tokenizer:
+    """
+    Get the tokenizer for a model, loading each encoding only once.
+    
+    Falls back to an approximate tokenizer if tiktoken or the model's
+    encoding files are unavailable.
+    
+    Args:
+        model: OpenAI model name
+        
+    Returns:
+        Tokenizer for the model
+    """
+    try:
+        import tiktoken
+        
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return Tokenizer(encoding)
+    except Exception as e:
+        logger.warning(f"Using approximate token counts for {model}: {e}")
+        return ApproximateTokenizer()
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Number of tokens in text for a model."""
+    return get_tokenizer(model).count(text)
@@ -0,0 +1,122 @@
+"""
+Stage timing spans recorded as histograms and per-request Server-Timing.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.metrics import Histogram, metrics
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+
+
+class RequestTrace:
+    """Stage durations of one request, in the order they finished."""
+    
+    __slots__ = ("started", "stages")
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+    
+    def add(self, name: str, seconds: float) -> None:
+        self.stages.append((name, seconds))
+    
+    def server_timing(self) -> str:
+        """
+        Format the stages as a ``Server-Timing`` header value.
+        
+        Repeated stages (e.g. one per batch item or segment) are summed.
+        A ``total`` entry covers the request so far.
+        """
+        totals: Dict[str, float] = {}
+        for name, seconds in self.stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        totals["total"] = time.perf_counter() - self.started
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+def start_request_trace() -> RequestTrace:
+    """
+    Start collecting stage timings for the current request.
+    
+    Tasks and threads started afterwards inherit the trace through the
+    context, so concurrent stages are recorded too.
+    """
+    trace = RequestTrace()
+    _current_trace.set(trace)
+    return trace
+
+
+class _Span:
+    """Times one stage; created by ``Tracer.span``."""
+    
+    __slots__ = ("tracer", "stage", "started")
+    
+    def __init__(self, tracer: "Tracer", stage: str):
+        self.tracer = tracer
+        self.stage = stage
+        self.started = 0.0
+    
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.tracer.record(self.stage, self.started)
+
+
+class Tracer:
+    """
+    Stage timer for one component.
+    
+    Durations go to the ``<component>_stage_duration_seconds`` histogram
+    labelled by stage, and to the current request's trace (if any) as
+    ``<component>-<stage>``. A span costs two clock reads and a histogram
+    update, so it can wrap every call on hot paths.
+    """
+    
+    def __init__(self, component: str, description: str = ""):
+        """
+        Initialize tracer.
+        
+        Args:
+            component: Metric prefix and Server-Timing namespace
+            description: Histogram description
+        """
+        self.component = component
+        self.description = description or f"Time spent in each stage of {component}"
+        self._histograms: Dict[str, Histogram] = {}
+    
+    def span(self, stage: str) -> _Span:
+        """
+        Time a block as a stage.
+        
+        Usage::
+        
+            with tracer.span("embed"):
+                vector = await embeddings.embed_text(text)
+        """
+        return _Span(self, stage)
+    
+    def record(self, stage: str, started: float) -> float:
+        """
+        Record a stage that began at ``started`` (a ``perf_counter`` value).
+        
+        Returns:
+            Stage duration in seconds
+        """
+        elapsed = time.perf_counter() - started
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            histogram = self._histograms[stage] = metrics.histogram(
+                f"{self.component}_stage_duration_seconds",
+                self.description,
+                labels={"stage": stage}
+            )
+        histogram.observe(elapsed)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(f"{self.component}-{stage}", elapsed)
+        return elapsed
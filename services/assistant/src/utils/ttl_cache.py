@@ -0,0 +1,147 @@
+"""
+Async read-through cache with TTL expiry, byte-bounded LRU eviction and
+request coalescing.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from src.utils.metrics import metrics
+
+# Loader returns the value and its approximate size in bytes
+Loader = Callable[[], Awaitable[Tuple[Any, int]]]
+
+
+class TTLCache:
+    """
+    LRU cache bounded by total byte size, with per-entry TTL.
+    
+    Concurrent misses for the same key share one in-flight load. A key
+    invalidated while its load is in flight is not populated with the
+    (possibly stale) result, though waiting callers still receive it.
+    """
+    
+    def __init__(self, name: str, ttl_seconds: float, max_bytes: int):
+        """
+        Initialize cache.
+        
+        Args:
+            name: Name used to label cache metrics
+            ttl_seconds: Time after which entries expire
+            max_bytes: Max total size of cached entries
+        """
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        
+        # key -> (value, size, expires_at)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Keys with a load in flight -> whether they were invalidated meanwhile
+        self._invalidated: Dict[Hashable, bool] = {}
+        
+        labels = {"cache": name}
+        self._hits = metrics.counter("cache_hits_total", "Cache hits", labels=labels)
+        self._misses = metrics.counter("cache_misses_total", "Cache misses", labels=labels)
+        self._coalesced = metrics.counter(
+            "cache_coalesced_total",
+            "Cache misses served by another caller's in-flight load",
+            labels=labels
+        )
+        self._evictions = metrics.counter(
+            "cache_evictions_total", "Cache evictions", labels=labels
+        )
+        self._size = metrics.gauge("cache_bytes", "Cache size in bytes", labels=labels)
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh cached value, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, _, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any, size: int) -> None:
+        """Store a value, evicting least recently used entries as needed."""
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (value, size, time.monotonic() + self.ttl_seconds)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions.inc()
+        self._size.set(self.current_bytes)
+    
+    async def get_or_load(self, key: Hashable, loader: Loader) -> Any:
+        """
+        Return the cached value or load it, merging concurrent misses.
+        
+        Args:
+            key: Cache key
+            loader: Coroutine factory returning ``(value, size_in_bytes)``
+            
+        Returns:
+            Cached or freshly loaded value
+        """
+        value = self.get(key)
+        if value is not None:
+            self._hits.inc()
+            return value
+        
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._coalesced.inc()
+            return await asyncio.shield(inflight)
+        
+        self._misses.inc()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._invalidated[key] = False
+        try:
+            value, size = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure isn't logged as lost
+            future.exception()
+            raise
+        else:
+            if not self._invalidated[key]:
+                self.set(key, value, size)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+            self._invalidated.pop(key, None)
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a key and prevent in-flight loads from repopulating it."""
+        if key in self._invalidated:
+            self._invalidated[key] = True
+        self._remove(key)
+        self._size.set(self.current_bytes)
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        for key in list(self._entries):
+            self.invalidate(key)
+    
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry and release its bytes."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
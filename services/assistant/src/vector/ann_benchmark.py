@@ -0,0 +1,180 @@
+"""
+Recall@k and QPS report for the local IVF index against exact search.
+
+Usage:
+    python -m src.vector.ann_benchmark --vectors 200000 --lists 512 --probes 4,8,16,32
+    python -m src.vector.ann_benchmark --store .cache/vectors --json report.json
+    python -m src.vector.ann_benchmark --quantization int8 --oversampling 4
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.vector.ivf_index import IVFFlatIndex
+from src.vector.numpy_store import NumpyVectorStore
+
+
+def synthetic_corpus(
+    count: int,
+    dim: int,
+    clusters: int,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Generate clustered unit vectors resembling embedding distributions.
+    
+    Args:
+        count: Number of vectors
+        dim: Vector dimension
+        clusters: Number of topic centres
+        seed: Random seed
+        
+    Returns:
+        ``(count, dim)`` float32 matrix
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    vectors = centres[labels] + 2.0 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+async def load_store(args: argparse.Namespace) -> NumpyVectorStore:
+    """Open a persisted store or fill an in-memory one with synthetic vectors."""
+    if args.store:
+        store = NumpyVectorStore(
+            path=args.store, persist_every=0, index="flat", quantization=args.quantization
+        )
+        await store.initialize()
+    else:
+        store = NumpyVectorStore(
+            path="", persist_every=0, index="flat", quantization=args.quantization
+        )
+        corpus = synthetic_corpus(args.vectors, args.dim, args.clusters, args.seed)
+        for start in range(0, corpus.shape[0], 10000):
+            block = corpus[start:start + 10000]
+            await store.index_batch([
+                (str(start + i), vector, {}) for i, vector in enumerate(block)
+            ])
+    return store
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Measure exact search, then the IVF index at each probe count.
+    
+    Returns:
+        Machine-readable report
+    """
+    store = await load_store(args)
+    store.oversampling = args.oversampling
+    if store.size == 0:
+        raise SystemExit("Vector store is empty")
+    
+    rng = np.random.default_rng(args.seed + 1)
+    # Queries are perturbed corpus vectors, so each has realistic neighbours
+    picks = rng.choice(store.size, min(args.queries, store.size), replace=False)
+    queries = np.asarray(store._vectors[picks], dtype=np.float32)
+    queries += 0.3 * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(queries.shape[1])
+    queries = NumpyVectorStore._normalize(queries)
+    
+    started = time.perf_counter()
+    truth = [
+        {result.id for result in store.search_exact(query, args.top_k)}
+        for query in queries
+    ]
+    exact_seconds = time.perf_counter() - started
+    
+    store.ann = IVFFlatIndex(n_lists=args.lists, min_train_size=1, seed=args.seed)
+    started = time.perf_counter()
+    store.ann.train(store._vectors[:store.size])
+    train_seconds = time.perf_counter() - started
+    
+    report: Dict[str, Any] = {
+        "vectors": store.size,
+        "dim": store.dim,
+        "queries": len(queries),
+        "top_k": args.top_k,
+        "lists": args.lists,
+        "quantization": args.quantization,
+        "train_seconds": round(train_seconds, 3),
+        "exact": {"qps": round(len(queries) / exact_seconds, 1), "recall": 1.0},
+        "ivf": []
+    }
+    
+    for probe in args.probes:
+        store.ann.n_probe = probe
+        hits = 0
+        started = time.perf_counter()
+        for query, expected in zip(queries, truth):
+            results = await store.search(query, args.top_k)
+            hits += len(expected & {result.id for result in results})
+        seconds = time.perf_counter() - started
+        report["ivf"].append({
+            "probe": probe,
+            "qps": round(len(queries) / seconds, 1),
+            "recall": round(hits / sum(len(expected) for expected in truth), 4)
+        })
+    
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a human-readable summary table."""
+    print(
+        f"{report['vectors']} vectors x {report['dim']} dims, "
+        f"{report['queries']} queries, recall@{report['top_k']}, "
+        f"{report['lists']} lists (trained in {report['train_seconds']}s), "
+        f"quantization: {report['quantization']}"
+    )
+    print(f"{'index':>10} {'probe':>6} {'recall':>8} {'qps':>10}")
+    print(f"{'exact':>10} {'-':>6} {1.0:>8.4f} {report['exact']['qps']:>10.1f}")
+    for row in report["ivf"]:
+        print(f"{'ivf':>10} {row['probe']:>6} {row['recall']:>8.4f} {row['qps']:>10.1f}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", help="Persisted local vector store directory to benchmark")
+    parser.add_argument("--vectors", type=int, default=100000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="Synthetic vector dimension")
+    parser.add_argument("--clusters", type=int, default=1000, help="Synthetic topic count")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--lists", type=int, default=256, help="IVF partitions")
+    parser.add_argument(
+        "--probes",
+        type=lambda value: [int(p) for p in value.split(",")],
+        default=[1, 4, 8, 16, 32, 64],
+        help="Comma-separated probe counts to evaluate"
+    )
+    parser.add_argument(
+        "--quantization",
+        choices=["none", "int8", "binary"],
+        default="none",
+        help="Score IVF candidates on quantized codes before rescoring"
+    )
+    parser.add_argument("--oversampling", type=float, default=3.0, help="Rescoring oversampling factor")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--json", help="Also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the benchmark and print or save the report."""
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
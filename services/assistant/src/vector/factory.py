@@ -0,0 +1,37 @@
+"""
+Factory for the configured vector store backend.
+"""
+
+from typing import Optional
+
+from src.vector.vector_store import VectorStore
+from src.config.settings import settings
+
+# The in-process backend must be shared so the indexing worker and the API
+# read and write the same vectors
+_local_store: Optional[VectorStore] = None
+
+
+def create_vector_store(write_wait: Optional[bool] = None) -> VectorStore:
+    """
+    Build the vector store selected by ``settings.vector_store_backend``.
+    
+    Args:
+        write_wait: Make Qdrant bulk writes return only once applied
+            (defaults to settings; in-process writes always are)
+            
+    Returns:
+        Vector store instance
+    """
+    global _local_store
+    
+    if settings.vector_store_backend == "numpy":
+        if _local_store is None:
+            from src.vector.hybrid import lexical_index
+            from src.vector.numpy_store import NumpyVectorStore
+            # Saved and loaded with the vectors so lexical search survives restarts
+            _local_store = NumpyVectorStore(lexical_index=lexical_index)
+        return _local_store
+    
+    from src.vector.qdrant_adapter import QdrantAdapter
+    return QdrantAdapter(write_wait=write_wait)
@@ -0,0 +1,192 @@
+"""
+Hybrid lexical and vector retrieval fused with reciprocal rank fusion.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Literal, Optional
+
+from src.config.settings import settings
+from src.utils.metrics import metrics
+from src.vector.lexical_index import BM25Index
+from src.vector.vector_store import SearchResult, VectorStore
+
+logger = logging.getLogger(__name__)
+
+RetrievalMode = Literal["vector", "lexical", "hybrid"]
+RETRIEVAL_LEGS = ("vector", "lexical")
+
+# Shared so the indexing worker can keep it in sync with the vector store
+lexical_index: Optional[BM25Index] = (
+    BM25Index(k1=settings.bm25_k1, b=settings.bm25_b)
+    if settings.lexical_index_enabled else None
+)
+
+
+def reciprocal_rank_fusion(rankings: List[List[SearchResult]], k: int = 60) -> List[SearchResult]:
+    """
+    Merge rankings by summing ``1 / (k + rank)`` over the rankings of each ID.
+    
+    The first ranking's result object (with its metadata) is kept for IDs
+    found by several. Scores are divided by the best achievable sum, so a
+    result ranked first everywhere scores 1.0.
+    
+    Args:
+        rankings: Result lists, each ordered best first
+        k: Rank damping constant (higher flattens the contribution of top ranks)
+        
+    Returns:
+        Fused results, best first
+    """
+    fused: Dict[str, float] = {}
+    results: Dict[str, SearchResult] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            fused[result.id] = fused.get(result.id, 0.0) + 1.0 / (k + rank)
+            results.setdefault(result.id, result)
+    
+    best = len(rankings) / (k + 1)
+    ordered = sorted(fused, key=lambda id: fused[id], reverse=True)
+    return [
+        SearchResult(id=id, score=round(fused[id] / best, 4), metadata=results[id].metadata)
+        for id in ordered
+    ]
+
+
+class HybridRetriever:
+    """
+    Thread retrieval by vector similarity, BM25, or both fused.
+    
+    In hybrid mode both legs run concurrently (BM25 in a worker thread)
+    and each contributes ``candidate_multiplier * top_k`` candidates to the
+    fusion. Hybrid and lexical scores are normalized fused ranks rather
+    than cosine similarities.
+    
+    Until the BM25 index is complete (loaded from disk or backfilled), the
+    lexical leg is unavailable: lexical and hybrid requests fall back to
+    vector search, with a warning, rather than returning partial fusions.
+    """
+    
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        index: Optional[BM25Index] = lexical_index,
+        rrf_k: int = settings.hybrid_rrf_k,
+        candidate_multiplier: int = settings.hybrid_candidate_multiplier
+    ):
+        """
+        Initialize retriever.
+        
+        Args:
+            vector_store: Vector database
+            index: BM25 index (None falls back to vector search for every mode)
+            rrf_k: Reciprocal rank fusion constant
+            candidate_multiplier: Candidates per leg as a multiple of top_k
+        """
+        self.vector_store = vector_store
+        self.index = index
+        self.rrf_k = rrf_k
+        self.candidate_multiplier = candidate_multiplier
+        
+        self._leg_duration = {
+            leg: metrics.histogram(
+                "retrieval_leg_duration_seconds",
+                "Time spent in each retrieval leg",
+                labels={"leg": leg}
+            )
+            for leg in RETRIEVAL_LEGS
+        }
+        self._lexical_unavailable = metrics.counter(
+            "retrieval_lexical_unavailable_total",
+            "Lexical or hybrid requests served by vector search while the BM25 index is incomplete"
+        )
+    
+    def resolve_mode(self, mode: Optional[RetrievalMode]) -> RetrievalMode:
+        """The mode a request will actually use."""
+        mode = mode or settings.retrieval_mode_default
+        if self.index is None:
+            return "vector"
+        if mode != "vector" and not self.index.complete:
+            return "vector"
+        return mode
+    
+    async def search(
+        self,
+        query: str,
+        query_vector: Optional[List[float]],
+        top_k: int,
+        mode: Optional[RetrievalMode] = None,
+        group_size: int = 1,
+        filter_conditions: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]:
+        """
+        Retrieve threads for a query.
+        
+        Args:
+            query: Query text (for the lexical leg)
+            query_vector: Query embedding (for the vector leg; unused in lexical mode)
+            top_k: Number of threads to return
+            mode: Retrieval mode (defaults to ``RETRIEVAL_MODE_DEFAULT``)
+            group_size: Max matched chunks per thread from the vector leg
+            filter_conditions: Metadata conditions applied by both legs
+            
+        Returns:
+            Thread results, best first
+        """
+        requested = mode or settings.retrieval_mode_default
+        mode = self.resolve_mode(mode)
+        if mode != requested and self.index is not None:
+            self._lexical_unavailable.inc()
+            logger.warning(
+                f"Lexical index is still being rebuilt ({len(self.index)} threads so far), "
+                f"serving {requested} retrieval with vector search only"
+            )
+        if mode == "vector":
+            return await self._vector(query_vector, top_k, group_size, filter_conditions)
+        if mode == "lexical":
+            # Raw BM25 scores are unbounded; report ranks like hybrid mode does
+            lexical_results = await self._lexical(query, top_k, filter_conditions)
+            return reciprocal_rank_fusion([lexical_results], k=self.rrf_k)
+        
+        candidates = top_k * self.candidate_multiplier
+        vector_results, lexical_results = await asyncio.gather(
+            self._vector(query_vector, candidates, group_size, filter_conditions),
+            self._lexical(query, candidates, filter_conditions)
+        )
+        return reciprocal_rank_fusion([vector_results, lexical_results], k=self.rrf_k)[:top_k]
+    
+    async def _vector(
+        self,
+        query_vector: List[float],
+        top_k: int,
+        group_size: int,
+        filter_conditions: Optional[Dict[str, Any]]
+    ) -> List[SearchResult]:
+        """Vector leg, grouped by thread."""
+        started = time.perf_counter()
+        results = await self.vector_store.search_threads(
+            query_vector=query_vector,
+            top_k=top_k,
+            filter_conditions=filter_conditions,
+            group_size=group_size
+        )
+        self._observe("vector", started, len(results))
+        return results
+    
+    async def _lexical(
+        self,
+        query: str,
+        top_k: int,
+        filter_conditions: Optional[Dict[str, Any]]
+    ) -> List[SearchResult]:
+        """Lexical leg, off the event loop so it overlaps the vector leg."""
+        started = time.perf_counter()
+        results = await asyncio.to_thread(self.index.search, query, top_k, filter_conditions)
+        self._observe("lexical", started, len(results))
+        return results
+    
+    def _observe(self, leg: str, started: float, count: int) -> None:
+        elapsed = time.perf_counter() - started
+        self._leg_duration[leg].observe(elapsed)
+        logger.info(f"{leg.capitalize()} retrieval returned {count} threads in {elapsed * 1000:.1f}ms")
@@ -0,0 +1,212 @@
+"""
+IVF-flat approximate nearest-neighbour index for the in-process vector store.
+"""
+
+import logging
+from typing import BinaryIO, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class IVFFlatIndex:
+    """
+    Inverted-file index over normalized vectors.
+    
+    Vectors are partitioned into ``n_lists`` clusters with spherical
+    k-means. A query scores only the rows assigned to its ``n_probe``
+    nearest centroids, trading recall for latency. The index stores one
+    list assignment per matrix row, so it follows the owning store's
+    inserts, updates and swap-deletes without rebuilding.
+    """
+    
+    def __init__(
+        self,
+        n_lists: int = 256,
+        n_probe: int = 16,
+        min_train_size: Optional[int] = None,
+        kmeans_iterations: int = 20,
+        seed: int = 0
+    ):
+        """
+        Initialize untrained index.
+        
+        Args:
+            n_lists: Number of k-means partitions
+            n_probe: Partitions scanned per query (higher is more accurate)
+            min_train_size: Rows required before training (defaults to 39 per list)
+            kmeans_iterations: Lloyd iterations when training
+            seed: Random seed for centroid initialization
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size or n_lists * 39
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        # List ID for every row of the owning matrix (-1 when unassigned)
+        self.assignments = np.zeros(0, dtype=np.int32)
+    
+    @property
+    def is_trained(self) -> bool:
+        """Whether centroids exist."""
+        return self.centroids is not None
+    
+    def needs_training(self, size: int) -> bool:
+        """
+        Whether the index should be (re)trained at the given row count.
+        
+        Centroids are refit once the corpus doubles so partitions keep
+        tracking the data distribution as it grows.
+        """
+        if not self.is_trained:
+            return size >= self.min_train_size
+        return size >= self.trained_size * 2
+    
+    def train(self, vectors: np.ndarray) -> None:
+        """
+        Fit centroids with spherical k-means and assign every row.
+        
+        Args:
+            vectors: Normalized ``(rows, dim)`` matrix of live vectors
+        """
+        centroids, assignments = self.fit(vectors)
+        self.install(centroids, assignments, vectors.shape[0])
+    
+    def fit(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute centroids and row assignments without changing the index.
+        
+        Safe to run in a worker thread while the index keeps serving.
+        
+        Args:
+            vectors: Normalized ``(rows, dim)`` matrix of live vectors
+            
+        Returns:
+            Tuple of (centroids, list ID of every row)
+        """
+        rng = np.random.default_rng(self.seed)
+        n_lists = min(self.n_lists, vectors.shape[0])
+        sample_size = min(vectors.shape[0], n_lists * 256)
+        sample = vectors[rng.choice(vectors.shape[0], sample_size, replace=False)]
+        sample = np.asarray(sample, dtype=np.float32)
+        
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            labels = self._nearest(sample, centroids)
+            counts = np.bincount(labels, minlength=n_lists)
+            
+            # Sum members per list by sorting once and reducing contiguous runs
+            order = np.argsort(labels, kind="stable")
+            starts = np.cumsum(counts) - counts
+            sums = np.zeros_like(centroids)
+            nonempty = counts > 0
+            sums[nonempty] = np.add.reduceat(sample[order], starts[nonempty], axis=0)
+            
+            # Re-seed empty lists from random sample points
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = sums / norms
+        
+        centroids = centroids.astype(np.float32)
+        assignments = self._nearest(vectors, centroids).astype(np.int32)
+        logger.info(f"Trained IVF index with {n_lists} lists on {sample_size} vectors")
+        return centroids, assignments
+    
+    def install(
+        self,
+        centroids: np.ndarray,
+        assignments: np.ndarray,
+        trained_size: int,
+        capacity: int = 0
+    ) -> None:
+        """
+        Replace the index with the result of ``fit``.
+        
+        Args:
+            centroids: Fitted centroids
+            assignments: List ID of every row the centroids were fitted on
+            trained_size: Number of rows they were fitted on
+            capacity: Row capacity of the owning matrix, if larger
+        """
+        grown = np.full(max(capacity, assignments.shape[0]), -1, dtype=np.int32)
+        grown[:assignments.shape[0]] = assignments
+        self.centroids = centroids
+        self.assignments = grown
+        self.trained_size = trained_size
+    
+    def assign(self, rows: np.ndarray, vectors: np.ndarray, capacity: int) -> None:
+        """
+        Assign new or updated rows to their nearest list.
+        
+        Args:
+            rows: Row numbers in the owning matrix
+            vectors: Normalized vectors for those rows
+            capacity: Current row capacity of the owning matrix
+        """
+        if self.assignments.shape[0] < capacity:
+            grown = np.full(capacity, -1, dtype=np.int32)
+            grown[:self.assignments.shape[0]] = self.assignments
+            self.assignments = grown
+        if self.is_trained:
+            self.assignments[rows] = self._nearest(vectors, self.centroids)
+    
+    def move(self, source: int, target: int) -> None:
+        """Mirror the owning store moving ``source`` row into ``target``."""
+        if not self.is_trained:
+            return
+        self.assignments[target] = self.assignments[source]
+        self.assignments[source] = -1
+    
+    def candidates(self, query: np.ndarray, size: int, n_probe: Optional[int] = None) -> np.ndarray:
+        """
+        Rows in the partitions nearest to the query.
+        
+        Args:
+            query: Normalized query vector
+            size: Number of live rows in the owning matrix
+            n_probe: Override the configured probe count
+            
+        Returns:
+            Candidate row numbers
+        """
+        probe = min(n_probe or self.n_probe, self.centroids.shape[0])
+        centroid_scores = self.centroids @ query
+        lists = np.argpartition(-centroid_scores, probe - 1)[:probe]
+        return np.flatnonzero(np.isin(self.assignments[:size], lists))
+    
+    def save(self, file: BinaryIO, size: int) -> None:
+        """Serialize centroids and live-row assignments in ``.npz`` format."""
+        np.savez(
+            file,
+            centroids=self.centroids,
+            assignments=self.assignments[:size],
+            trained_size=np.array(self.trained_size)
+        )
+    
+    def load(self, path: str, size: int) -> None:
+        """Restore an index written by ``save``."""
+        with np.load(path) as data:
+            assignments = data["assignments"]
+            if assignments.shape[0] != size:
+                raise ValueError(
+                    f"IVF index covers {assignments.shape[0]} rows, store has {size}"
+                )
+            self.centroids = data["centroids"]
+            self.assignments = assignments.copy()
+            self.trained_size = int(data["trained_size"])
+    
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        """Index of the most similar centroid for each vector, in chunks."""
+        labels = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], chunk):
+            block = np.asarray(vectors[start:start + chunk])
+            labels[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+        return labels
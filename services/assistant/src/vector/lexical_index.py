@@ -0,0 +1,268 @@
+"""
+BM25 inverted index over thread titles and bodies for lexical search.
+"""
+
+import heapq
+import json
+import math
+import re
+from array import array
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.metrics import metrics
+from src.vector.vector_store import SearchResult, matches_filter
+
+# Words, plus identifiers joined by dots, dashes or underscores such as
+# error codes, package names and dotted paths from stack traces
+TOKEN_RE = re.compile(r"\w+(?:[.\-]\w+)*")
+COMPOUND_SPLIT_RE = re.compile(r"[.\-_]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms.
+    
+    Compound identifiers are kept whole and also indexed by their parts,
+    so ``requests.exceptions.ConnectionError`` matches both the full path
+    and ``connectionerror``.
+    
+    Args:
+        text: Text to tokenize
+        
+    Returns:
+        Terms in order of appearance
+    """
+    terms: List[str] = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        terms.append(token)
+        parts = [part for part in COMPOUND_SPLIT_RE.split(token) if part]
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+class BM25Index:
+    """
+    In-process Okapi BM25 index with one document per thread.
+    
+    Each term's posting list is a pair of compact arrays of document
+    numbers and term frequencies. Re-indexing a thread appends it under a
+    new document number and leaves the old postings as tombstones, which
+    are dropped by compacting once they make up ``compact_ratio`` of the
+    documents. Searches only read the shared structures, and compaction
+    swaps in new ones, so a search may run in a thread while the event
+    loop updates the index.
+    
+    The index starts empty. ``complete`` is set once it is loaded from a
+    persisted copy or backfilled from the Community Service; until then
+    retrieval doesn't trust it to cover every thread.
+    """
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75, compact_ratio: float = 0.25):
+        """
+        Initialize empty index.
+        
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization (0 to disable)
+            compact_ratio: Fraction of dead documents that triggers compaction
+        """
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        
+        # term -> (document numbers, term frequencies)
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_lengths = array("I")
+        # Live document number -> (thread ID, stored metadata)
+        self._docs: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        self._doc_by_thread: Dict[str, int] = {}
+        self._total_length = 0
+        self.complete = False
+        
+        self._size = metrics.gauge("lexical_index_documents", "Threads in the BM25 index")
+        self._terms = metrics.gauge("lexical_index_terms", "Distinct terms in the BM25 index")
+    
+    def add(self, thread_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        """
+        Index or re-index a thread.
+        
+        Args:
+            thread_id: Thread ID
+            text: Title and body to index
+            metadata: Payload returned with search results
+        """
+        self.remove(thread_id)
+        
+        frequencies: Dict[str, int] = {}
+        terms = tokenize(text)
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        
+        doc = len(self._doc_lengths)
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("I"))
+            postings[0].append(doc)
+            postings[1].append(frequency)
+        self._doc_lengths.append(len(terms))
+        self._docs[doc] = (thread_id, metadata)
+        self._doc_by_thread[thread_id] = doc
+        self._total_length += len(terms)
+        self._update_gauges()
+    
+    def remove(self, thread_id: str) -> bool:
+        """
+        Remove a thread from search results.
+        
+        Args:
+            thread_id: Thread ID
+            
+        Returns:
+            True if the thread was indexed
+        """
+        doc = self._doc_by_thread.pop(thread_id, None)
+        if doc is None:
+            return False
+        del self._docs[doc]
+        self._total_length -= self._doc_lengths[doc]
+        
+        dead = len(self._doc_lengths) - len(self._docs)
+        if dead > self.compact_ratio * len(self._doc_lengths):
+            self._compact()
+        self._update_gauges()
+        return True
+    
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        filter_conditions: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]:
+        """
+        Rank threads by BM25 score.
+        
+        Args:
+            query: Query text
+            top_k: Number of results
+            filter_conditions: Conditions on the stored metadata, see ``matches_filter``
+            
+        Returns:
+            Results with the stored metadata, best first
+        """
+        postings_by_term = self._postings
+        docs = self._docs
+        doc_lengths = self._doc_lengths
+        live = len(docs)
+        if not live:
+            return []
+        average_length = max(self._total_length / live, 1.0)
+        
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = postings_by_term.get(term)
+            if postings is None:
+                continue
+            matches = [(doc, tf) for doc, tf in zip(*postings) if doc in docs]
+            if not matches:
+                continue
+            idf = math.log(1 + (live - len(matches) + 0.5) / (len(matches) + 0.5))
+            for doc, tf in matches:
+                norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc] / average_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        
+        if filter_conditions:
+            scores = {
+                doc: score for doc, score in scores.items()
+                if doc in docs and all(
+                    matches_filter(docs[doc][1].get(key), expected)
+                    for key, expected in filter_conditions.items()
+                )
+            }
+        
+        results = []
+        for doc, score in heapq.nlargest(top_k, scores.items(), key=lambda item: item[1]):
+            entry = docs.get(doc)
+            if entry is not None:
+                results.append(SearchResult(id=entry[0], score=score, metadata=entry[1]))
+        return results
+    
+    def __len__(self) -> int:
+        return len(self._docs)
+    
+    def __contains__(self, thread_id: str) -> bool:
+        return thread_id in self._doc_by_thread
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy the index state for ``save``, so it can be written while updates continue."""
+        return {
+            "postings": {term: (docs[:], tfs[:]) for term, (docs, tfs) in self._postings.items()},
+            "doc_lengths": self._doc_lengths[:],
+            "docs": dict(self._docs)
+        }
+    
+    @staticmethod
+    def save(file: BinaryIO, snapshot: Dict[str, Any]) -> None:
+        """Serialize a ``snapshot`` in ``.npz`` format, posting lists concatenated."""
+        terms = list(snapshot["postings"])
+        doc_numbers, frequencies = array("I"), array("I")
+        offsets = [0]
+        for term in terms:
+            docs, tfs = snapshot["postings"][term]
+            doc_numbers.extend(docs)
+            frequencies.extend(tfs)
+            offsets.append(len(doc_numbers))
+        np.savez(
+            file,
+            terms=np.array(terms, dtype=str),
+            offsets=np.array(offsets, dtype=np.int64),
+            doc_numbers=np.frombuffer(doc_numbers, dtype=np.uint32),
+            frequencies=np.frombuffer(frequencies, dtype=np.uint32),
+            doc_lengths=np.frombuffer(snapshot["doc_lengths"], dtype=np.uint32),
+            docs=np.array(json.dumps([[doc, *entry] for doc, entry in snapshot["docs"].items()]))
+        )
+    
+    def load(self, path: str) -> None:
+        """Replace the index with one written by ``save``."""
+        with np.load(path) as data:
+            terms = data["terms"].tolist()
+            offsets = data["offsets"]
+            doc_numbers = data["doc_numbers"]
+            frequencies = data["frequencies"]
+            doc_lengths = array("I", data["doc_lengths"].tolist())
+            docs = {doc: (thread_id, metadata) for doc, thread_id, metadata in json.loads(str(data["docs"]))}
+        
+        self._postings = {
+            term: (
+                array("I", doc_numbers[offsets[i]:offsets[i + 1]].tolist()),
+                array("I", frequencies[offsets[i]:offsets[i + 1]].tolist())
+            )
+            for i, term in enumerate(terms)
+        }
+        self._doc_lengths = doc_lengths
+        self._docs = docs
+        self._doc_by_thread = {thread_id: doc for doc, (thread_id, _) in docs.items()}
+        self._total_length = sum(doc_lengths[doc] for doc in docs)
+        self._update_gauges()
+    
+    def _compact(self) -> None:
+        """Renumber live documents and rebuild posting lists without tombstones."""
+        renumber = {doc: new for new, doc in enumerate(sorted(self._docs))}
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (doc_numbers, frequencies) in self._postings.items():
+            kept = [(renumber[doc], tf) for doc, tf in zip(doc_numbers, frequencies) if doc in renumber]
+            if kept:
+                postings[term] = (array("I", (doc for doc, _ in kept)), array("I", (tf for _, tf in kept)))
+        
+        self._doc_lengths = array("I", (self._doc_lengths[doc] for doc in sorted(self._docs)))
+        self._docs = {renumber[doc]: entry for doc, entry in self._docs.items()}
+        self._doc_by_thread = {thread_id: renumber[doc] for thread_id, doc in self._doc_by_thread.items()}
+        self._postings = postings
+    
+    def _update_gauges(self) -> None:
+        self._size.set(len(self._docs))
+        self._terms.set(len(self._postings))
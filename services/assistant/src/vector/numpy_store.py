@@ -0,0 +1,577 @@
+"""
+In-process vector store backed by a contiguous NumPy matrix.
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from src.vector.ivf_index import IVFFlatIndex
+from src.vector.lexical_index import BM25Index
+from src.vector.quantization import QuantizedVectors, create_quantized_vectors
+from src.vector.vector_store import SearchResult, VectorPoint, VectorStore, matches_filter
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+PAYLOADS_FILE = "payloads.json"
+INDEX_FILE = "ivf.npz"
+LEXICAL_FILE = "bm25.npz"
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Vector store keeping normalized float32 vectors in memory.
+    
+    Vectors live in one contiguous matrix (rows ``[0, size)`` are live) and
+    payload fields are stored column-wise. Deletes move the last row into
+    the freed slot so the matrix never has holes. The store persists to a
+    directory and reopens the matrix memory-mapped for fast cold starts.
+    
+    With the ``ivf`` index, searches scan only the partitions nearest to
+    the query once enough vectors exist to train it; until then, and when
+    filters leave too few candidates, search falls back to an exact scan.
+    The index is trained in a worker thread and swapped in when done;
+    rows written meanwhile are reassigned at the swap.
+    
+    With quantization, candidates are first scored on int8 or binary codes
+    and only the best ``top_k * oversampling`` are rescored with the
+    original vectors. ``originals_on_disk`` keeps the float32 matrix in a
+    writable memory-mapped file, so only the codes need to stay resident;
+    rows are written in place and the file is flushed on persist.
+    
+    Files are written from a worker thread so searches keep being served
+    while the store persists; writes wait until persisting finishes. An
+    attached BM25 index is saved and loaded with the vectors.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        persist_every: Optional[int] = None,
+        index: Optional[str] = None,
+        quantization: Optional[str] = None,
+        originals_on_disk: Optional[bool] = None,
+        lexical_index: Optional[BM25Index] = None
+    ):
+        """
+        Initialize local vector store.
+        
+        Args:
+            path: Directory to persist to (empty for memory only)
+            persist_every: Persist after this many writes (0 to only persist on close)
+            index: ``flat`` for exact search or ``ivf`` for approximate search
+            quantization: ``none``, ``int8`` or ``binary`` first-pass codes
+            originals_on_disk: Keep full-precision vectors memory-mapped on disk
+            lexical_index: BM25 index to persist alongside the vectors
+        """
+        self.path = settings.local_vector_store_path if path is None else path
+        self.persist_every = (
+            settings.local_vector_store_persist_every
+            if persist_every is None else persist_every
+        )
+        
+        self.dim: Optional[int] = None
+        self.size = 0
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._columns: Dict[str, List[Any]] = {}
+        self._writes_since_persist = 0
+        self._initialized = False
+        self._write_lock = asyncio.Lock()
+        
+        index = settings.local_vector_index if index is None else index
+        self.ann: Optional[IVFFlatIndex] = None
+        self._training: Optional[asyncio.Task] = None
+        # Rows written or moved since the running training took its snapshot
+        self._rows_changed_in_training: Set[int] = set()
+        if index == "ivf":
+            self.ann = IVFFlatIndex(
+                n_lists=settings.local_ivf_lists,
+                n_probe=settings.local_ivf_probe,
+                min_train_size=settings.local_ivf_min_train_size
+            )
+        elif index != "flat":
+            raise ValueError(f"Unknown local vector index: {index}")
+        
+        self.quantization = settings.vector_quantization if quantization is None else quantization
+        self.oversampling = settings.vector_quantization_oversampling
+        self.originals_on_disk = (
+            settings.vector_originals_on_disk
+            if originals_on_disk is None else originals_on_disk
+        )
+        if self.originals_on_disk and not self.path:
+            logger.warning("Local vector store has no path, keeping original vectors in memory")
+            self.originals_on_disk = False
+        self._quantized: Optional[QuantizedVectors] = None
+        self.lexical_index = lexical_index
+    
+    async def initialize(self) -> None:
+        """Load persisted vectors, if any."""
+        if self._initialized:
+            return
+        self._initialized = True
+        if not self.path:
+            return
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        payloads_path = os.path.join(self.path, PAYLOADS_FILE)
+        if not (os.path.exists(vectors_path) and os.path.exists(payloads_path)):
+            logger.info(f"No local vector store at {self.path}, starting empty")
+            return
+        
+        try:
+            with open(payloads_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            # Memory-mapped; read-only until the first write unless kept on disk
+            vectors = np.load(vectors_path, mmap_mode="r+" if self.originals_on_disk else "r")
+            self._ids = state["ids"]
+            self._columns = state["columns"]
+            self._rows = {id: row for row, id in enumerate(self._ids)}
+            self.size = len(self._ids)
+            self.dim = int(vectors.shape[1]) if vectors.ndim == 2 else None
+            self._vectors = vectors
+            logger.info(f"Loaded {self.size} vectors from {self.path}")
+            
+            index_path = os.path.join(self.path, INDEX_FILE)
+            if self.ann is not None and os.path.exists(index_path):
+                self.ann.load(index_path, self.size)
+            if self.dim is not None:
+                self._build_quantized()
+            
+            lexical_path = os.path.join(self.path, LEXICAL_FILE)
+            if self.lexical_index is not None and os.path.exists(lexical_path):
+                await asyncio.to_thread(self.lexical_index.load, lexical_path)
+                self.lexical_index.complete = True
+                logger.info(f"Loaded BM25 index of {len(self.lexical_index)} threads from {self.path}")
+        except Exception as e:
+            logger.error(f"Error loading local vector store: {e}")
+            raise
+    
+    async def index(
+        self,
+        id: str,
+        vector: List[float],
+        metadata: Dict[str, Any]
+    ) -> None:
+        """Insert or replace a single vector."""
+        await self.index_batch([(id, vector, metadata)])
+    
+    async def index_batch(self, points: List[VectorPoint]) -> None:
+        """Insert or replace many vectors."""
+        if not points:
+            return
+        async with self._write_lock:
+            self._index_batch(points)
+            await self._after_write(len(points))
+    
+    def _index_batch(self, points: List[VectorPoint]) -> None:
+        """Apply an insert or replace of many vectors."""
+        matrix = np.asarray([vector for _, vector, _ in points], dtype=np.float32)
+        if matrix.ndim != 2:
+            raise ValueError("All vectors in a batch must have the same dimension")
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of size {self.dim}, got {matrix.shape[1]}")
+        matrix = self._normalize(matrix)
+        
+        new_ids = [id for id, _, _ in points if id not in self._rows]
+        self._ensure_capacity(self.size + len(set(new_ids)))
+        
+        rows = np.empty(len(points), dtype=np.int64)
+        for i, ((id, _, metadata), vector) in enumerate(zip(points, matrix)):
+            row = self._rows.get(id)
+            if row is None:
+                row = self.size
+                self.size += 1
+                self._rows[id] = row
+                self._ids.append(id)
+                for column in self._columns.values():
+                    column.append(None)
+            self._vectors[row] = vector
+            self._set_payload(row, metadata)
+            rows[i] = row
+        
+        if self._quantized is not None:
+            self._quantized.set(rows, matrix)
+        if self.ann is not None:
+            self.ann.assign(rows, matrix, self._vectors.shape[0])
+            if self._training is not None:
+                self._rows_changed_in_training.update(rows.tolist())
+            elif self.ann.needs_training(self.size):
+                self._training = asyncio.create_task(self._train_ann())
+    
+    async def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter_conditions: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]:
+        """Cosine top-k search using the IVF index and quantized codes when enabled."""
+        if self.size == 0 or top_k <= 0:
+            return []
+        
+        query = self._normalize(np.asarray(query_vector, dtype=np.float32)[None, :])[0]
+        mask = self._filter_mask(filter_conditions) if filter_conditions else None
+        
+        rows = None
+        if self.ann is not None and self.ann.is_trained:
+            rows = self.ann.candidates(query, self.size)
+            if mask is not None:
+                rows = rows[mask[rows]]
+            if rows.shape[0] < top_k:
+                # Too few candidates near the query, scan everything instead
+                rows = None
+        if rows is None and mask is not None:
+            rows = np.flatnonzero(mask)
+        if rows is not None and rows.shape[0] == 0:
+            return []
+        
+        if self._quantized is not None:
+            rows = self._shortlist(query, top_k, rows)
+        return self._top_k(self._matrix(rows) @ query, top_k, rows)
+    
+    def search_exact(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        filter_conditions: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]:
+        """Brute-force full-precision cosine top-k over every live row."""
+        rows = None
+        if filter_conditions:
+            rows = np.flatnonzero(self._filter_mask(filter_conditions))
+            if rows.shape[0] == 0:
+                return []
+        return self._top_k(self._matrix(rows) @ query, top_k, rows)
+    
+    def _shortlist(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        rows: Optional[np.ndarray]
+    ) -> np.ndarray:
+        """
+        Pick the rows worth rescoring from their quantized scores.
+        
+        Args:
+            query: Normalized query vector
+            top_k: Number of final results
+            rows: Candidate rows (defaults to all live rows)
+            
+        Returns:
+            Sorted rows, at most ``top_k * oversampling`` of them
+        """
+        approx = self._quantized.scores(query, self.size, rows)
+        keep = min(approx.shape[0], math.ceil(top_k * self.oversampling))
+        best = np.argpartition(-approx, keep - 1)[:keep]
+        # Sorted rows read the original matrix sequentially
+        return np.sort(best if rows is None else rows[best])
+    
+    def _matrix(self, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Original vectors for the given rows (defaults to all live rows)."""
+        if rows is None:
+            return self._vectors[:self.size]
+        return self._vectors[rows]
+    
+    async def get_metadata(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return stored payloads for the given IDs."""
+        return {
+            id: self._payload(self._rows[id])
+            for id in ids
+            if id in self._rows
+        }
+    
+    async def list_ids(self, filter_conditions: Dict[str, Any]) -> List[str]:
+        """Return the IDs of rows matching every condition."""
+        if self.size == 0:
+            return []
+        return [self._ids[row] for row in np.flatnonzero(self._filter_mask(filter_conditions))]
+    
+    async def delete(self, id: str) -> None:
+        """Delete a single vector."""
+        await self.delete_batch([id])
+    
+    async def delete_batch(self, ids: List[str]) -> None:
+        """Delete many vectors, keeping the matrix contiguous."""
+        async with self._write_lock:
+            deleted = self._delete_batch(ids)
+            if deleted:
+                await self._after_write(deleted)
+    
+    def _delete_batch(self, ids: List[str]) -> int:
+        """Apply a delete of many vectors and return how many existed."""
+        deleted = 0
+        for id in ids:
+            row = self._rows.pop(id, None)
+            if row is None:
+                continue
+            self._make_writable()
+            last = self.size - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._vectors[row] = self._vectors[last]
+                if self._quantized is not None:
+                    self._quantized.move(last, row)
+                if self.ann is not None:
+                    self.ann.move(last, row)
+                    if self._training is not None:
+                        self._rows_changed_in_training.add(row)
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+                for column in self._columns.values():
+                    column[row] = column[last]
+            self._ids.pop()
+            for column in self._columns.values():
+                column.pop()
+            self.size -= 1
+            deleted += 1
+        return deleted
+    
+    async def _train_ann(self) -> None:
+        """
+        Train the IVF index in a worker thread and swap it in.
+        
+        Training reads the matrix as it was when it started; rows written
+        or moved since are assigned to the new partitions on the event
+        loop before the swap.
+        """
+        vectors, trained_size = self._vectors, self.size
+        self._rows_changed_in_training = set()
+        try:
+            centroids, assignments = await asyncio.to_thread(self.ann.fit, vectors[:trained_size])
+        except Exception as e:
+            logger.error(f"Error training IVF index: {e}", exc_info=True)
+            return
+        finally:
+            self._training = None
+        
+        changed = self._rows_changed_in_training
+        self._rows_changed_in_training = set()
+        self.ann.install(centroids, assignments, trained_size, self._vectors.shape[0])
+        stale = np.array(
+            sorted({row for row in changed if row < self.size} | set(range(trained_size, self.size))),
+            dtype=np.int64
+        )
+        if stale.shape[0]:
+            self.ann.assign(stale, np.asarray(self._vectors[stale]), self._vectors.shape[0])
+    
+    async def wait_for_index(self) -> None:
+        """Wait for a running IVF training to be swapped in."""
+        while self._training is not None:
+            await asyncio.shield(self._training)
+    
+    async def close(self) -> None:
+        """Persist outstanding writes, abandoning an unfinished IVF training."""
+        if self._training is not None:
+            self._training.cancel()
+            self._training = None
+        if self._writes_since_persist:
+            await self.persist()
+    
+    async def persist(self) -> None:
+        """Write vectors and payloads to ``path`` atomically."""
+        async with self._write_lock:
+            await self._persist()
+    
+    async def _persist(self) -> None:
+        """
+        Persist a snapshot of the store from a worker thread.
+        
+        The caller holds the write lock, so the matrix and payloads can't
+        change until the files are written; the snapshot only copies the
+        containers, not the vectors.
+        """
+        if not self.path:
+            return
+        ann = None
+        if self.ann is not None and self.ann.is_trained:
+            ann = copy.copy(self.ann)
+            ann.assignments = self.ann.assignments[:self.size].copy()
+        snapshot = {
+            "size": self.size,
+            "ids": list(self._ids),
+            "columns": {key: list(column) for key, column in self._columns.items()},
+            "vectors": self._vectors,
+            "ann": ann,
+            "lexical": self.lexical_index.snapshot() if self.lexical_index is not None else None
+        }
+        await asyncio.to_thread(self._write_files, snapshot)
+        self._writes_since_persist = 0
+        logger.debug(f"Persisted {snapshot['size']} vectors to {self.path}")
+    
+    def _write_files(self, snapshot: Dict[str, Any]) -> None:
+        """Write a snapshot taken by ``_persist``, replacing files atomically."""
+        os.makedirs(self.path, exist_ok=True)
+        size, vectors, ann = snapshot["size"], snapshot["vectors"], snapshot["ann"]
+        
+        payloads_tmp = os.path.join(self.path, PAYLOADS_FILE + ".tmp")
+        with open(payloads_tmp, "w", encoding="utf-8") as f:
+            json.dump({"ids": snapshot["ids"], "columns": snapshot["columns"]}, f)
+        if self.originals_on_disk and isinstance(vectors, np.memmap):
+            # The matrix file is updated in place, rows past ``size`` are ignored
+            vectors.flush()
+        else:
+            vectors_tmp = os.path.join(self.path, VECTORS_FILE + ".tmp")
+            with open(vectors_tmp, "wb") as f:
+                np.save(f, np.ascontiguousarray(vectors[:size]))
+            os.replace(vectors_tmp, os.path.join(self.path, VECTORS_FILE))
+        os.replace(payloads_tmp, os.path.join(self.path, PAYLOADS_FILE))
+        
+        if ann is not None:
+            index_tmp = os.path.join(self.path, INDEX_FILE + ".tmp")
+            with open(index_tmp, "wb") as f:
+                ann.save(f, size)
+            os.replace(index_tmp, os.path.join(self.path, INDEX_FILE))
+        
+        if snapshot["lexical"] is not None:
+            lexical_tmp = os.path.join(self.path, LEXICAL_FILE + ".tmp")
+            with open(lexical_tmp, "wb") as f:
+                BM25Index.save(f, snapshot["lexical"])
+            os.replace(lexical_tmp, os.path.join(self.path, LEXICAL_FILE))
+    
+    def _filter_mask(self, filter_conditions: Dict[str, Any]) -> np.ndarray:
+        """Boolean mask of live rows matching every condition."""
+        mask = np.ones(self.size, dtype=bool)
+        for key, expected in filter_conditions.items():
+            column = self._columns.get(key)
+            if column is None:
+                return np.zeros(self.size, dtype=bool)
+            mask &= np.fromiter(
+                (matches_filter(value, expected) for value in column),
+                dtype=bool,
+                count=self.size
+            )
+        return mask
+    
+    def _top_k(
+        self,
+        scores: np.ndarray,
+        top_k: int,
+        rows: Optional[np.ndarray] = None
+    ) -> List[SearchResult]:
+        """
+        Select the highest scores with argpartition.
+        
+        Args:
+            scores: Candidate scores
+            top_k: Number of results
+            rows: Matrix row of each score (defaults to the score position)
+        """
+        top_k = min(top_k, scores.shape[0])
+        if top_k < scores.shape[0]:
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(scores.shape[0])
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+        matrix_rows = ordered if rows is None else rows[ordered]
+        return [
+            SearchResult(
+                id=self._ids[row],
+                score=float(score),
+                metadata=self._payload(row)
+            )
+            for row, score in zip(matrix_rows, scores[ordered])
+            if np.isfinite(score)
+        ]
+    
+    def _payload(self, row: int) -> Dict[str, Any]:
+        """Rebuild a payload dict from the column store."""
+        return {
+            key: column[row]
+            for key, column in self._columns.items()
+            if column[row] is not None
+        }
+    
+    def _set_payload(self, row: int, metadata: Dict[str, Any]) -> None:
+        """Write a payload into the column store."""
+        for key, column in self._columns.items():
+            column[row] = metadata.get(key)
+        for key in metadata.keys() - self._columns.keys():
+            column = [None] * self.size
+            column[row] = metadata[key]
+            self._columns[key] = column
+    
+    def _ensure_capacity(self, rows: int) -> None:
+        """Grow the matrix geometrically so inserts are amortized O(1)."""
+        capacity = self._vectors.shape[0]
+        if rows <= capacity and self._vectors.shape[1] == self.dim:
+            self._make_writable()
+            return
+        new_capacity = max(rows, capacity * 2, 64)
+        if self.originals_on_disk:
+            self._vectors = self._disk_matrix(new_capacity)
+        else:
+            grown = np.zeros((new_capacity, self.dim), dtype=np.float32)
+            if self.size:
+                grown[:self.size] = self._vectors[:self.size]
+            self._vectors = grown
+        
+        if self._quantized is None:
+            self._quantized = create_quantized_vectors(self.quantization, self.dim)
+        if self._quantized is not None:
+            self._quantized.resize(new_capacity)
+    
+    def _make_writable(self) -> None:
+        """Copy a read-only memory-mapped matrix before mutating it."""
+        if self._vectors.flags.writeable:
+            return
+        if self.originals_on_disk:
+            self._vectors = self._disk_matrix(self._vectors.shape[0])
+        else:
+            self._vectors = np.array(self._vectors, dtype=np.float32)
+    
+    def _disk_matrix(self, capacity: int) -> np.memmap:
+        """
+        Copy live rows into a new writable memory-mapped matrix file.
+        
+        Args:
+            capacity: Rows to allocate
+            
+        Returns:
+            Matrix mapped from ``vectors.npy`` in read-write mode
+        """
+        os.makedirs(self.path, exist_ok=True)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        vectors_tmp = vectors_path + ".tmp"
+        grown = np.lib.format.open_memmap(
+            vectors_tmp, mode="w+", dtype=np.float32, shape=(capacity, self.dim)
+        )
+        if self.size:
+            grown[:self.size] = self._vectors[:self.size]
+        grown.flush()
+        del grown
+        os.replace(vectors_tmp, vectors_path)
+        return np.load(vectors_path, mmap_mode="r+")
+    
+    def _build_quantized(self) -> None:
+        """Encode every loaded vector, reading the matrix in chunks."""
+        self._quantized = create_quantized_vectors(self.quantization, self.dim)
+        if self._quantized is None:
+            return
+        self._quantized.resize(self._vectors.shape[0])
+        for start in range(0, self.size, 8192):
+            end = min(start + 8192, self.size)
+            block = np.asarray(self._vectors[start:end], dtype=np.float32)
+            self._quantized.set(np.arange(start, end), block)
+    
+    async def _after_write(self, count: int) -> None:
+        """Persist once enough writes have accumulated (write lock held)."""
+        self._writes_since_persist += count
+        if self.persist_every and self._writes_since_persist >= self.persist_every:
+            await self._persist()
+    
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize rows so dot products are cosine similarities."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
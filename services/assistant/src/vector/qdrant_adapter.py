@@ -2,26 +2,72 @@
 Qdrant adapter implementation for vector storage.
 """
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from qdrant_client import AsyncQdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams, Filter, FieldCondition, MatchValue
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    PointStruct,
+    PointIdsList,
+    VectorParams,
+    Filter,
+    FieldCondition,
+    MatchAny,
+    MatchValue,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    Range as PayloadRange,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    WriteOrdering,
+)
 
-from src.vector.vector_store import SearchResult, VectorStore
+from src.vector.vector_store import Range, SearchResult, VectorPoint, VectorStore, group_by_thread
 from src.config.settings import settings
+from src.utils.http_pools import http_pools
 
 logger = logging.getLogger(__name__)
 
+# Payload fields searches filter on, indexed so filtered searches don't scan
+PAYLOAD_INDEXES = {
+    "thread_id": PayloadSchemaType.KEYWORD,
+    "tags": PayloadSchemaType.KEYWORD,
+    "status": PayloadSchemaType.KEYWORD,
+    "created_at_ts": PayloadSchemaType.FLOAT,
+}
+
 
 class QdrantAdapter(VectorStore):
     """Qdrant vector database adapter."""
     
-    def __init__(self):
-        """Initialize Qdrant client."""
-        self.client = AsyncQdrantClient(url=settings.qdrant_url)
+    def __init__(self, write_wait: Optional[bool] = None):
+        """
+        Initialize Qdrant client.
+        
+        Args:
+            write_wait: Wait for bulk writes to be applied (defaults to settings)
+        """
+        # Qdrant owns its HTTP client; size it like the shared pools
+        self.client = AsyncQdrantClient(
+            url=settings.qdrant_url,
+            limits=http_pools.limits("qdrant"),
+            http2=http_pools.http2
+        )
         self.collection_name = settings.qdrant_collection_name
         self.vector_size = 1536  # OpenAI text-embedding-3-small dimension
+        self.write_batch_size = settings.qdrant_write_batch_size
+        self.write_parallelism = settings.qdrant_write_parallelism
+        self.write_wait = settings.qdrant_write_wait if write_wait is None else write_wait
+        self.write_ordering = WriteOrdering(settings.qdrant_write_ordering)
+        self.quantization = settings.vector_quantization
+        self.oversampling = settings.vector_quantization_oversampling
+        self.originals_on_disk = settings.vector_originals_on_disk
     
     async def initialize(self) -> None:
         """Initialize Qdrant collection if it doesn't exist."""
@@ -34,12 +80,25 @@ class QdrantAdapter(VectorStore):
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=self.vector_size,
-                        distance=Distance.COSINE
-                    )
+                        distance=Distance.COSINE,
+                        on_disk=self.originals_on_disk
+                    ),
+                    quantization_config=self._quantization_config()
+                )
+                logger.info(
+                    f"Created Qdrant collection: {self.collection_name} "
+                    f"(quantization: {self.quantization})"
                 )
-                logger.info(f"Created Qdrant collection: {self.collection_name}")
             else:
                 logger.info(f"Qdrant collection already exists: {self.collection_name}")
+            
+            # Idempotent, so collections created before an index was added get it too
+            for field_name, field_schema in PAYLOAD_INDEXES.items():
+                await self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema
+                )
         except Exception as e:
             logger.error(f"Error initializing Qdrant collection: {e}")
             raise
@@ -67,6 +126,46 @@ class QdrantAdapter(VectorStore):
             logger.error(f"Error indexing vector {id}: {e}")
             raise
     
+    async def index_batch(
+        self,
+        points: List[VectorPoint],
+        wait: Optional[bool] = None,
+        ordering: Optional[WriteOrdering] = None
+    ) -> None:
+        """
+        Index many vectors in Qdrant using chunked upserts.
+        
+        Chunks of ``write_batch_size`` points are sent with up to
+        ``write_parallelism`` requests in flight.
+        
+        Args:
+            points: ``(id, vector, metadata)`` tuples
+            wait: Wait until the write is applied (defaults to settings)
+            ordering: Write ordering guarantee (defaults to settings)
+        """
+        if not points:
+            return
+        
+        structs = [
+            PointStruct(id=id, vector=vector, payload=metadata)
+            for id, vector, metadata in points
+        ]
+        
+        async def upsert(chunk: List[PointStruct]) -> None:
+            await self.client.upsert(
+                collection_name=self.collection_name,
+                points=chunk,
+                wait=self.write_wait if wait is None else wait,
+                ordering=ordering or self.write_ordering
+            )
+        
+        try:
+            await self._run_chunked(structs, upsert)
+            logger.debug(f"Indexed {len(points)} vectors")
+        except Exception as e:
+            logger.error(f"Error indexing {len(points)} vectors: {e}")
+            raise
+    
     async def search(
         self,
         query_vector: List[float],
@@ -75,21 +174,13 @@ class QdrantAdapter(VectorStore):
     ) -> List[SearchResult]:
         """Search for similar vectors in Qdrant."""
         try:
-            # Build filter if provided
-            query_filter = None
-            if filter_conditions:
-                conditions = [
-                    FieldCondition(key=key, match=MatchValue(value=value))
-                    for key, value in filter_conditions.items()
-                ]
-                query_filter = Filter(must=conditions)
-            
             # Perform search
             results = await self.client.search(
                 collection_name=self.collection_name,
                 query_vector=query_vector,
                 limit=top_k,
-                query_filter=query_filter
+                query_filter=self._build_filter(filter_conditions),
+                search_params=self._search_params()
             )
             
             # Convert to SearchResult objects
@@ -108,6 +199,116 @@ class QdrantAdapter(VectorStore):
             logger.error(f"Error searching vectors: {e}")
             return []
     
+    async def search_threads(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        group_size: int = 3
+    ) -> List[SearchResult]:
+        """Search chunk vectors grouped server-side by their ``thread_id`` payload."""
+        try:
+            response = await self.client.search_groups(
+                collection_name=self.collection_name,
+                query_vector=query_vector,
+                group_by="thread_id",
+                query_filter=self._build_filter(filter_conditions),
+                search_params=self._search_params(),
+                limit=top_k,
+                group_size=max(group_size, 1),
+                with_payload=True
+            )
+            
+            results = [
+                SearchResult(id=str(point.id), score=point.score, metadata=point.payload or {})
+                for group in response.groups
+                for point in group.hits
+            ]
+            search_results = group_by_thread(results, group_size)
+            logger.debug(f"Found {len(search_results)} similar threads")
+            return search_results
+        except Exception as e:
+            logger.error(f"Error searching grouped vectors: {e}")
+            return []
+    
+    @staticmethod
+    def _build_filter(filter_conditions: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        """
+        Payload filter requiring every condition, or None when there are none.
+        
+        Scalars become ``MatchValue``, lists ``MatchAny`` and ``Range``
+        values a numeric range condition.
+        """
+        if not filter_conditions:
+            return None
+        conditions = []
+        for key, value in filter_conditions.items():
+            if isinstance(value, Range):
+                conditions.append(FieldCondition(key=key, range=PayloadRange(gte=value.gte, lte=value.lte)))
+            elif isinstance(value, (list, tuple, set)):
+                conditions.append(FieldCondition(key=key, match=MatchAny(any=list(value))))
+            else:
+                conditions.append(FieldCondition(key=key, match=MatchValue(value=value)))
+        return Filter(must=conditions)
+    
+    def _quantization_config(self) -> Optional[Union[ScalarQuantization, BinaryQuantization]]:
+        """Quantization config for new collections, or None for raw vectors."""
+        if self.quantization == "int8":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True
+                )
+            )
+        if self.quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return None
+    
+    def _search_params(self) -> Optional[SearchParams]:
+        """Search on quantized vectors, rescoring oversampled candidates."""
+        if self.quantization == "none":
+            return None
+        return SearchParams(
+            quantization=QuantizationSearchParams(
+                rescore=True,
+                oversampling=self.oversampling
+            )
+        )
+    
+    async def get_metadata(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch stored payloads from Qdrant without vectors."""
+        if not ids:
+            return {}
+        try:
+            records = await self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=ids,
+                with_payload=True,
+                with_vectors=False
+            )
+            return {str(record.id): record.payload or {} for record in records}
+        except Exception as e:
+            logger.error(f"Error retrieving payloads for {len(ids)} vectors: {e}")
+            return {}
+    
+    async def list_ids(self, filter_conditions: Dict[str, Any]) -> List[str]:
+        """List matching point IDs by scrolling through the collection."""
+        ids: List[str] = []
+        offset = None
+        while True:
+            records, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._build_filter(filter_conditions),
+                limit=self.write_batch_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            ids.extend(str(record.id) for record in records)
+            if offset is None:
+                return ids
+    
     async def delete(self, id: str) -> None:
         """Delete a vector from Qdrant."""
         try:
@@ -119,3 +320,58 @@ class QdrantAdapter(VectorStore):
         except Exception as e:
             logger.error(f"Error deleting vector {id}: {e}")
             raise
+    
+    async def delete_batch(
+        self,
+        ids: List[str],
+        wait: Optional[bool] = None,
+        ordering: Optional[WriteOrdering] = None
+    ) -> None:
+        """
+        Delete many vectors from Qdrant using chunked requests.
+        
+        Args:
+            ids: Point IDs to delete
+            wait: Wait until the delete is applied (defaults to settings)
+            ordering: Write ordering guarantee (defaults to settings)
+        """
+        if not ids:
+            return
+        
+        async def delete(chunk: List[str]) -> None:
+            await self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=chunk),
+                wait=self.write_wait if wait is None else wait,
+                ordering=ordering or self.write_ordering
+            )
+        
+        try:
+            await self._run_chunked(ids, delete)
+            logger.debug(f"Deleted {len(ids)} vectors")
+        except Exception as e:
+            logger.error(f"Error deleting {len(ids)} vectors: {e}")
+            raise
+    
+    async def close(self) -> None:
+        """Close the Qdrant client."""
+        await self.client.close()
+    
+    async def _run_chunked(self, items: List[Any], operation) -> None:
+        """Apply an async operation to fixed-size chunks with bounded parallelism."""
+        chunks = [
+            items[start:start + self.write_batch_size]
+            for start in range(0, len(items), self.write_batch_size)
+        ]
+        if len(chunks) == 1 or self.write_parallelism == 1:
+            for chunk in chunks:
+                await operation(chunk)
+            return
+        
+        semaphore = asyncio.Semaphore(self.write_parallelism)
+        
+        async def run(chunk: List[Any]) -> None:
+            async with semaphore:
+                await operation(chunk)
+        
+        await asyncio.gather(*(run(chunk) for chunk in chunks))
@@ -4,7 +4,12 @@ Abstract vector store interface for semantic search.
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+# (id, vector, metadata) tuple used for bulk writes
+VectorPoint = Tuple[str, List[float], Dict[str, Any]]
 
 
 @dataclass
@@ -16,6 +21,86 @@ class SearchResult:
     metadata: Dict[str, Any]
 
 
+@dataclass(frozen=True)
+class Range:
+    """Inclusive numeric bounds for a ``filter_conditions`` value."""
+    
+    gte: Optional[float] = None
+    lte: Optional[float] = None
+
+
+def payload_timestamp(value: Union[str, datetime, None]) -> Optional[float]:
+    """
+    Convert a datetime or ISO 8601 string to epoch seconds for range filters.
+    
+    Naive datetimes are taken as UTC. Returns None for missing or
+    unparseable values.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def matches_filter(payload_value: Any, expected: Any) -> bool:
+    """
+    Match a payload value against one filter condition the way Qdrant does.
+    
+    Scalars must be equal, a list matches any of its values and a ``Range``
+    bounds a number. Array payloads match if any element matches.
+    """
+    if isinstance(payload_value, list):
+        return any(matches_filter(value, expected) for value in payload_value)
+    if isinstance(expected, Range):
+        if not isinstance(payload_value, (int, float)) or isinstance(payload_value, bool):
+            return False
+        return (
+            (expected.gte is None or payload_value >= expected.gte)
+            and (expected.lte is None or payload_value <= expected.lte)
+        )
+    if isinstance(expected, (list, tuple, set)):
+        return payload_value in expected
+    return payload_value == expected
+
+
+def group_by_thread(results: List[SearchResult], group_size: int) -> List[SearchResult]:
+    """
+    Collapse score-ordered chunk results into one result per thread.
+    
+    Args:
+        results: Search results ordered by descending score
+        group_size: Max chunks kept per thread
+        
+    Returns:
+        Thread results in order of their best chunk
+    """
+    groups: Dict[str, SearchResult] = {}
+    for result in results:
+        thread_id = str(result.metadata.get("thread_id") or result.id)
+        chunk = {
+            "text": result.metadata.get("text"),
+            "score": result.score,
+            "source": result.metadata.get("source", "thread"),
+            "post_id": result.metadata.get("post_id")
+        }
+        group = groups.get(thread_id)
+        if group is None:
+            groups[thread_id] = SearchResult(
+                id=thread_id,
+                score=result.score,
+                metadata={**result.metadata, "chunks": [chunk]}
+            )
+        elif len(group.metadata["chunks"]) < group_size:
+            group.metadata["chunks"].append(chunk)
+    return list(groups.values())
+
+
 class VectorStore(ABC):
     """Abstract base class for vector database operations."""
     
@@ -34,6 +119,11 @@ class VectorStore(ABC):
         """Index a vector with metadata."""
         pass
     
+    @abstractmethod
+    async def index_batch(self, points: List[VectorPoint]) -> None:
+        """Index many vectors with metadata in bulk."""
+        pass
+    
     @abstractmethod
     async def search(
         self,
@@ -44,7 +134,59 @@ class VectorStore(ABC):
         """Search for similar vectors."""
         pass
     
+    @abstractmethod
+    async def get_metadata(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch stored metadata for the given IDs (missing IDs are omitted)."""
+        pass
+    
+    @abstractmethod
+    async def list_ids(self, filter_conditions: Dict[str, Any]) -> List[str]:
+        """List the IDs of all vectors whose metadata matches the conditions."""
+        pass
+    
     @abstractmethod
     async def delete(self, id: str) -> None:
         """Delete a vector by ID."""
         pass
+    
+    @abstractmethod
+    async def delete_batch(self, ids: List[str]) -> None:
+        """Delete many vectors by ID in bulk."""
+        pass
+    
+    async def search_threads(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        group_size: int = 3
+    ) -> List[SearchResult]:
+        """
+        Search chunk vectors and group the matches by parent thread.
+        
+        Each result's ID is the thread ID and its score the best chunk
+        score. Metadata is the best chunk's payload plus ``chunks``: up to
+        ``group_size`` matched chunks with their text and score. Stores
+        holding one vector per thread return one chunk per result.
+        
+        Args:
+            query_vector: Query embedding
+            top_k: Number of threads to return
+            filter_conditions: Metadata conditions, see ``matches_filter``
+            group_size: Max chunks kept per thread
+            
+        Returns:
+            Threads ordered by best chunk score
+        """
+        limit = top_k * max(group_size, 1) * 2
+        while True:
+            results = await self.search(query_vector, limit, filter_conditions)
+            groups = group_by_thread(results, group_size)
+            # Popular threads can crowd the hits, widen the search until enough threads match
+            if len(groups) >= top_k or len(results) < limit or limit >= top_k * 64:
+                return groups[:top_k]
+            limit *= 4
+    
+    async def close(self) -> None:
+        """Release resources held by the vector store."""
+        pass
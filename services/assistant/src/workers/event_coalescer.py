@@ -0,0 +1,95 @@
+"""
+Per-thread debouncing of indexing events.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+# Called with the thread ID and every message received for it in the window
+FlushHandler = Callable[[str, List[Any]], Awaitable[None]]
+
+
+class ThreadEventCoalescer:
+    """
+    Groups indexing messages by thread ID over a debounce window.
+    
+    Each new message for a thread restarts its timer, so a burst of replies
+    results in a single flush once the thread goes quiet. ``max_wait``
+    bounds how long a continuously busy thread can be deferred.
+    """
+    
+    def __init__(self, window: float, max_wait: float, on_flush: FlushHandler):
+        """
+        Initialize coalescer.
+        
+        Args:
+            window: Quiet period in seconds before a thread is flushed
+            max_wait: Max seconds between a thread's first event and its flush
+            on_flush: Coroutine receiving (thread_id, messages)
+        """
+        self.window = window
+        self.max_wait = max(max_wait, window)
+        self.on_flush = on_flush
+        
+        self._messages: Dict[str, List[Any]] = {}
+        self._first_seen: Dict[str, float] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def add(self, thread_id: str, message: Any) -> None:
+        """Record a message and (re)schedule the thread's flush."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        
+        self._messages.setdefault(thread_id, []).append(message)
+        first_seen = self._first_seen.setdefault(thread_id, now)
+        
+        timer = self._timers.pop(thread_id, None)
+        if timer is not None:
+            timer.cancel()
+        
+        delay = min(self.window, first_seen + self.max_wait - now)
+        self._timers[thread_id] = loop.call_later(
+            max(delay, 0.0), self._flush, thread_id
+        )
+    
+    def pending(self) -> int:
+        """Number of threads waiting to be flushed."""
+        return len(self._messages)
+    
+    def _flush(self, thread_id: str) -> None:
+        """Hand a thread's accumulated messages to the flush handler."""
+        self._timers.pop(thread_id, None)
+        self._first_seen.pop(thread_id, None)
+        messages = self._messages.pop(thread_id, [])
+        if not messages:
+            return
+        
+        task = asyncio.ensure_future(self._run(thread_id, messages))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, thread_id: str, messages: List[Any]) -> None:
+        """Run the flush handler, logging failures."""
+        try:
+            await self.on_flush(thread_id, messages)
+        except Exception as e:
+            logger.error(f"Error flushing events for thread {thread_id}: {e}", exc_info=True)
+    
+    async def close(self) -> None:
+        """
+        Cancel pending timers and wait for running flushes.
+        
+        Messages still waiting are left unacknowledged so the broker
+        redelivers them.
+        """
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._messages.clear()
+        self._first_seen.clear()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -3,19 +3,36 @@ RabbitMQ consumer worker for indexing threads into vector database.
 """
 
 import asyncio
+import hashlib
 import json
 import logging
-from typing import Optional
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import aio_pika
+import httpx
 
 from src.config.settings import settings
-from src.vector.qdrant_adapter import QdrantAdapter
-from src.embeddings.openai_embeddings import OpenAIEmbeddings
+from src.vector.factory import create_vector_store
+from src.embeddings.factory import create_embedding_service
+from src.services.expert_service import expert_index
+from src.services.rag_service import answer_cache
+from src.services.summarization_service import summary_cache
+from src.utils.chunking import chunk_text
 from src.utils.community_client import CommunityClient
+from src.utils.metrics import metrics
+from src.utils.tokens import get_tokenizer
+from src.utils.tracing import Tracer
+from src.vector.hybrid import lexical_index
+from src.vector.vector_store import payload_timestamp
+from src.workers.event_coalescer import ThreadEventCoalescer
 
 logger = logging.getLogger(__name__)
 
+# (point ID, content to embed, metadata)
+Document = Tuple[str, str, Dict[str, Any]]
+
 
 class IndexingWorker:
     """Worker for consuming thread indexing messages from RabbitMQ."""
@@ -27,10 +44,70 @@ class IndexingWorker:
         self.queue: Optional[aio_pika.Queue] = None
         self.running = False
         
-        # Initialize components
-        self.vector_store = QdrantAdapter()
-        self.embeddings = OpenAIEmbeddings()
+        # Batched consumption
+        self.batch_enabled = settings.indexing_batch_enabled
+        self.batch_size = settings.indexing_batch_size
+        self.batch_timeout = settings.indexing_batch_timeout_ms / 1000.0
+        self._pending: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        
+        # Delayed requeueing of threads that failed to index
+        self.retry_backoff = settings.indexing_retry_backoff_ms / 1000.0
+        self.retry_max_backoff = settings.indexing_retry_max_backoff_ms / 1000.0
+        self.max_retries = settings.indexing_max_retries
+        self._attempts: Dict[str, int] = {}
+        self._retry_tasks: Set[asyncio.Task] = set()
+        self._backfill_task: Optional[asyncio.Task] = None
+        
+        # Per-thread debouncing of bursts of events
+        self.coalescer: Optional[ThreadEventCoalescer] = None
+        if settings.indexing_coalesce_window_ms > 0:
+            self.coalescer = ThreadEventCoalescer(
+                window=settings.indexing_coalesce_window_ms / 1000.0,
+                max_wait=settings.indexing_coalesce_max_wait_ms / 1000.0,
+                on_flush=self._flush_coalesced
+            )
+        
+        # Initialize components; batches are acked once written, so writes must be applied
+        self.vector_store = create_vector_store(write_wait=True if self.batch_enabled else None)
+        self.embeddings = create_embedding_service(batching=False)
         self.community_client = CommunityClient()
+        self.answer_cache = answer_cache
+        self.summary_cache = summary_cache
+        self.expert_index = expert_index
+        self.lexical_index = lexical_index
+        
+        # Multi-vector indexing of thread and post chunks
+        self.chunking_enabled = settings.chunk_indexing_enabled
+        self.chunk_max_tokens = settings.chunk_max_tokens
+        self.chunk_overlap_tokens = settings.chunk_overlap_tokens
+        
+        self._messages_total = metrics.counter(
+            "indexing_messages_total",
+            "Indexing messages processed"
+        )
+        self._throughput = metrics.gauge(
+            "indexing_throughput_messages_per_second",
+            "Messages per second over the most recent indexing batch"
+        )
+        self._batch_duration = metrics.histogram(
+            "indexing_batch_duration_seconds",
+            "Time to fetch, embed and write one indexing batch"
+        )
+        self._unchanged_skipped = metrics.counter(
+            "indexing_unchanged_skipped_total",
+            "Threads or chunks not re-embedded because their content fingerprint matched"
+        )
+        self._embeddings_saved = metrics.counter(
+            "indexing_embeddings_saved_total",
+            "Re-index operations skipped by coalescing events for the same thread"
+        )
+        self._queue_lag = metrics.histogram(
+            "indexing_queue_lag_seconds",
+            "Time from publishing an indexing event to the worker receiving it",
+            buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+        )
+        self.tracer = Tracer("indexing", "Time spent in each stage of indexing")
     
     async def start(self) -> None:
         """Start the indexing worker."""
@@ -40,11 +117,16 @@ class IndexingWorker:
             # Initialize vector store
             await self.vector_store.initialize()
             
+            # Indexes not loaded from disk start empty; rebuild them alongside live events
+            if self._incomplete_indexes():
+                self._backfill_task = asyncio.create_task(self.backfill_indexes())
+            
             # Connect to RabbitMQ
             self.connection = await aio_pika.connect_robust(
                 settings.rabbitmq_url
             )
             self.channel = await self.connection.channel()
+            await self.channel.set_qos(prefetch_count=settings.indexing_prefetch_count)
             
             # Declare queue
             self.queue = await self.channel.declare_queue(
@@ -53,7 +135,16 @@ class IndexingWorker:
             )
             
             # Start consuming
-            await self.queue.consume(self.process_message)
+            if self.batch_enabled:
+                self._pending = asyncio.Queue()
+                self._batch_task = asyncio.create_task(self._batch_loop())
+            
+            if self.coalescer:
+                await self.queue.consume(self._coalesce_message)
+            elif self.batch_enabled:
+                await self.queue.consume(self._pending.put)
+            else:
+                await self.queue.consume(self.process_message)
             
             self.running = True
             logger.info("Worker started, waiting for messages...")
@@ -77,16 +168,511 @@ class IndexingWorker:
                 data = json.loads(message.body.decode())
                 message_type = data.get("type")
                 thread_id = data.get("threadId")
+                if not self.coalescer:
+                    self._observe_queue_lag(data)
                 
                 logger.info(f"Received message: type={message_type}, thread_id={thread_id}")
                 
                 if message_type == "thread" or message_type == "post":
+                    # Drop cached copies so the API and re-index see fresh data
+                    self._invalidate_thread(thread_id)
+                    
                     # Index or re-index thread
                     await self.index_thread(thread_id)
                 else:
                     logger.warning(f"Unknown message type: {message_type}")
             except Exception as e:
                 logger.error(f"Error processing message: {e}", exc_info=True)
+            self._messages_total.inc()
+    
+    def _invalidate_thread(self, thread_id: str) -> None:
+        """Drop cached threads and answers that cite a changed thread, and mark its summary stale."""
+        self.community_client.invalidate_thread(thread_id)
+        if self.answer_cache is not None:
+            dropped = self.answer_cache.invalidate_thread(thread_id)
+            if dropped:
+                logger.info(f"Dropped {dropped} cached answers citing thread {thread_id}")
+        if self.summary_cache is not None and self.summary_cache.mark_stale(thread_id):
+            logger.info(f"Marked summary of thread {thread_id} stale")
+    
+    def _observe_queue_lag(self, data: Dict[str, Any]) -> None:
+        """Record how long a message waited, from its publish ``timestamp``."""
+        published = payload_timestamp(data.get("timestamp"))
+        if published is not None:
+            self._queue_lag.observe(max(time.time() - published, 0.0))
+    
+    async def _coalesce_message(
+        self,
+        message: aio_pika.IncomingMessage
+    ) -> None:
+        """
+        Hold thread/post messages until their thread stops receiving events.
+        
+        Args:
+            message: RabbitMQ message
+        """
+        try:
+            data = json.loads(message.body.decode())
+        except Exception:
+            data = {}
+        
+        # Measured on arrival, not after the coalescing window
+        self._observe_queue_lag(data)
+        thread_id = data.get("threadId")
+        if data.get("type") in ("thread", "post") and thread_id:
+            self.coalescer.add(thread_id, message)
+        elif self.batch_enabled:
+            await self._pending.put(message)
+        else:
+            await self.process_message(message)
+    
+    async def _flush_coalesced(
+        self,
+        thread_id: str,
+        messages: List[aio_pika.IncomingMessage]
+    ) -> None:
+        """
+        Index the latest state of a thread once for all of its messages.
+        
+        Args:
+            thread_id: Thread ID
+            messages: Messages received for the thread during the window
+        """
+        if self.batch_enabled:
+            # The batch pipeline groups these by thread and acks them together
+            for message in messages:
+                await self._pending.put(message)
+            return
+        
+        logger.info(f"Re-indexing thread {thread_id} for {len(messages)} coalesced messages")
+        self._invalidate_thread(thread_id)
+        await self.index_thread(thread_id)
+        
+        for message in messages:
+            await message.ack()
+        self._messages_total.inc(len(messages))
+        self._embeddings_saved.inc(len(messages) - 1)
+    
+    async def _batch_loop(self) -> None:
+        """Collect messages into batches of up to N messages or T seconds."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._pending.get()]
+            deadline = loop.time() + self.batch_timeout
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._pending.get(), timeout=remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self.process_batch(batch)
+            except Exception as e:
+                logger.error(f"Error processing indexing batch: {e}", exc_info=True)
+    
+    async def process_batch(
+        self,
+        messages: List[aio_pika.IncomingMessage]
+    ) -> None:
+        """
+        Index a batch of messages with one embedding call and one upsert.
+        
+        Messages are acked only after the vector store confirms the write.
+        Messages of threads that could not be fetched or written are
+        requeued after a backoff (see ``_retry_later``); those of deleted
+        threads are rejected.
+        
+        Args:
+            messages: RabbitMQ messages
+        """
+        started = time.perf_counter()
+        
+        # Parse messages and group them by thread
+        by_thread: Dict[str, List[aio_pika.IncomingMessage]] = {}
+        for message in messages:
+            try:
+                data = json.loads(message.body.decode())
+            except Exception as e:
+                logger.error(f"Discarding malformed indexing message: {e}")
+                await message.reject(requeue=False)
+                continue
+            
+            message_type = data.get("type")
+            thread_id = data.get("threadId")
+            if not self.coalescer:
+                self._observe_queue_lag(data)
+            if message_type not in ("thread", "post") or not thread_id:
+                logger.warning(f"Unknown message type: {message_type}")
+                await message.ack()
+                continue
+            
+            self._invalidate_thread(thread_id)
+            by_thread.setdefault(thread_id, []).append(message)
+        
+        if not by_thread:
+            return
+        
+        # Fetch threads concurrently
+        thread_ids = list(by_thread)
+        semaphore = asyncio.Semaphore(settings.community_max_concurrency)
+        
+        async def load(thread_id: str) -> Tuple[List[Document], List[str]]:
+            async with semaphore:
+                return await self._load_documents(thread_id)
+        
+        with self.tracer.span("fetch"):
+            results = await asyncio.gather(
+                *(load(thread_id) for thread_id in thread_ids),
+                return_exceptions=True
+            )
+        
+        documents: List[Document] = []
+        stale_ids: List[str] = []
+        for thread_id, result in zip(thread_ids, results):
+            if isinstance(result, Exception):
+                thread_messages = by_thread.pop(thread_id)
+                if isinstance(result, httpx.HTTPStatusError) and result.response.status_code == 404:
+                    logger.warning(f"Thread {thread_id} no longer exists, discarding its messages")
+                    for message in thread_messages:
+                        await message.reject(requeue=False)
+                else:
+                    logger.error(f"Error fetching thread {thread_id} for indexing: {result}")
+                    await self._retry_later(thread_id, thread_messages)
+                continue
+            thread_documents, thread_stale_ids = result
+            documents.extend(thread_documents)
+            stale_ids.extend(thread_stale_ids)
+        
+        try:
+            documents = await self._drop_unchanged(documents)
+            if documents:
+                logger.info(f"Generating {len(documents)} embeddings for indexing batch")
+                await self._write_documents(documents)
+            if stale_ids:
+                with self.tracer.span("delete"):
+                    await self.vector_store.delete_batch(stale_ids)
+        except Exception as e:
+            logger.error(f"Error writing indexing batch, requeueing: {e}", exc_info=True)
+            for thread_id, thread_messages in by_thread.items():
+                await self._retry_later(thread_id, thread_messages)
+            return
+        
+        for thread_id, thread_messages in by_thread.items():
+            self._attempts.pop(thread_id, None)
+            for message in thread_messages:
+                await message.ack()
+            self._embeddings_saved.inc(len(thread_messages) - 1)
+        
+        elapsed = time.perf_counter() - started
+        self._messages_total.inc(len(messages))
+        self._batch_duration.observe(elapsed)
+        if elapsed > 0:
+            self._throughput.set(len(messages) / elapsed)
+        logger.info(
+            f"Indexed {len(documents)} changed documents from {len(messages)} messages "
+            f"in {elapsed:.2f}s ({len(messages) / max(elapsed, 1e-9):.1f} msg/s)"
+        )
+    
+    def _incomplete_indexes(self) -> List[Any]:
+        """In-process indexes that don't yet cover every thread."""
+        return [
+            index for index in (self.expert_index, self.lexical_index)
+            if index is not None and not index.complete
+        ]
+    
+    async def backfill_indexes(self) -> None:
+        """
+        Record every existing thread in the incomplete indexes, then mark them complete.
+        
+        Threads are listed page by page and up to ``community_max_concurrency``
+        are recorded at once; posts are only fetched for the expert index.
+        Events processed meanwhile replace a thread's contributions as
+        usual, and threads they already put in the lexical index are not
+        overwritten with the listing. If the backfill fails, the indexes
+        stay incomplete: expert lookups keep asking the Community Service
+        and lexical retrieval keeps falling back to vector search.
+        """
+        started = time.perf_counter()
+        indexes = self._incomplete_indexes()
+        experts = self.expert_index if self.expert_index in indexes else None
+        lexical = self.lexical_index if self.lexical_index in indexes else None
+        
+        async def record(thread: Dict[str, Any]) -> None:
+            thread_id = str(thread.get("id", ""))
+            if lexical is not None and thread_id not in lexical:
+                self._record_lexical(thread_id, thread)
+            if experts is not None:
+                posts = await self.community_client.get_thread_posts(thread_id, strict=True)
+                experts.update_thread(thread_id, thread, posts)
+        
+        count = 0
+        try:
+            page: List[Dict[str, Any]] = []
+            async for thread in self.community_client.iter_threads():
+                page.append(thread)
+                if len(page) >= settings.community_max_concurrency:
+                    await asyncio.gather(*(record(t) for t in page))
+                    count += len(page)
+                    page = []
+            await asyncio.gather(*(record(t) for t in page))
+            count += len(page)
+        except Exception as e:
+            logger.error(f"Index backfill failed after {count} threads: {e}", exc_info=True)
+            return
+        
+        for index in indexes:
+            index.complete = True
+        elapsed = time.perf_counter() - started
+        logger.info(f"Backfilled {len(indexes)} indexes with {count} threads in {elapsed:.2f}s")
+    
+    async def _retry_later(
+        self,
+        thread_id: str,
+        messages: List[aio_pika.IncomingMessage]
+    ) -> None:
+        """
+        Requeue a failed thread's messages after an exponential backoff.
+        
+        The messages stay unacked while waiting, so they count against the
+        prefetch limit and a failing upstream slows consumption instead of
+        being retried in a tight loop. After ``max_retries`` failed
+        attempts they are rejected, which dead-letters them if the queue
+        has a dead-letter exchange.
+        
+        Args:
+            thread_id: Thread ID
+            messages: Unacked messages of the thread
+        """
+        attempts = self._attempts.get(thread_id, 0) + 1
+        if attempts > self.max_retries:
+            self._attempts.pop(thread_id, None)
+            logger.error(f"Giving up on thread {thread_id} after {attempts - 1} retries")
+            for message in messages:
+                await message.reject(requeue=False)
+            return
+        
+        self._attempts[thread_id] = attempts
+        delay = min(self.retry_backoff * 2 ** (attempts - 1), self.retry_max_backoff)
+        logger.info(f"Requeueing thread {thread_id} in {delay:.1f}s (attempt {attempts})")
+        
+        async def requeue() -> None:
+            await asyncio.sleep(delay)
+            for message in messages:
+                await message.nack(requeue=True)
+        
+        task = asyncio.create_task(requeue())
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+    
+    async def _load_documents(self, thread_id: str) -> Tuple[List[Document], List[str]]:
+        """
+        Fetch a thread and build the documents that represent it.
+        
+        The thread is also recorded in the expert and lexical indexes.
+        
+        With chunk indexing the thread body and each post are split into
+        chunks, and the IDs of stored points no longer produced (removed
+        posts, shrunk text, or a thread-level point) are returned as stale.
+        
+        Args:
+            thread_id: Thread ID
+            
+        Returns:
+            Tuple of (documents, IDs of stale points to delete)
+        """
+        if not self.chunking_enabled:
+            thread = await self.community_client.get_thread(thread_id)
+            self._record_thread(thread_id, thread)
+            content, metadata = self._build_document(thread_id, thread)
+            return [(thread_id, content, metadata)], []
+        
+        # Fail rather than treat a fetch error as "all posts deleted"
+        thread, posts = await asyncio.gather(
+            self.community_client.get_thread(thread_id),
+            self.community_client.get_thread_posts(thread_id, strict=True)
+        )
+        self._record_thread(thread_id, thread, posts)
+        documents = self._build_chunks(thread_id, thread, posts)
+        current_ids = {point_id for point_id, _, _ in documents}
+        stored_ids = await self.vector_store.list_ids({"thread_id": thread_id})
+        return documents, [point_id for point_id in stored_ids if point_id not in current_ids]
+    
+    def _record_thread(
+        self,
+        thread_id: str,
+        thread: Dict[str, Any],
+        posts: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Update the in-process indexes kept beside the vector store.
+        
+        Args:
+            thread_id: Thread ID
+            thread: Thread data from the Community Service
+            posts: Thread posts, if fetched separately
+        """
+        if self.expert_index is not None:
+            self.expert_index.update_thread(thread_id, thread, posts)
+        if self.lexical_index is not None:
+            self._record_lexical(thread_id, thread)
+    
+    def _record_lexical(self, thread_id: str, thread: Dict[str, Any]) -> None:
+        """Index a thread's title and body in the BM25 index."""
+        payload = self._thread_payload(thread_id, thread)
+        body = thread.get("content", "")
+        payload["excerpt"] = body[:200]
+        self.lexical_index.add(thread_id, f"{payload['title']}\n\n{body}", payload)
+    
+    @staticmethod
+    def _thread_payload(thread_id: str, thread: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Thread fields stored with every point, including those searches filter on.
+        
+        Args:
+            thread_id: Thread ID
+            thread: Thread data from the Community Service
+            
+        Returns:
+            Payload fields
+        """
+        created_at = thread.get("createdAt") or thread.get("created_at") or ""
+        return {
+            "thread_id": thread_id,
+            "title": thread.get("title", ""),
+            "tags": thread.get("tags", []),
+            "status": thread.get("status"),
+            "created_at": created_at,
+            "created_at_ts": payload_timestamp(created_at)
+        }
+    
+    def _build_document(
+        self,
+        thread_id: str,
+        thread: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the text to embed and the payload to store for a thread.
+        
+        Args:
+            thread_id: Thread ID
+            thread: Thread data from the Community Service
+            
+        Returns:
+            Tuple of (content to embed, metadata)
+        """
+        metadata = self._thread_payload(thread_id, thread)
+        body = thread.get("content", "")
+        content = f"{metadata['title']}\n\n{body}"
+        metadata["excerpt"] = body[:200]
+        metadata["content_hash"] = self._fingerprint(content, metadata)
+        metadata["embedding_model"] = settings.openai_embedding_model
+        return content, metadata
+    
+    def _build_chunks(
+        self,
+        thread_id: str,
+        thread: Dict[str, Any],
+        posts: List[Dict[str, Any]]
+    ) -> List[Document]:
+        """
+        Split a thread body and its posts into chunk documents.
+        
+        Chunk IDs are derived from the thread, post and chunk position, so
+        new posts don't change the IDs (or fingerprints) of earlier chunks.
+        The title is prepended to every chunk before embedding.
+        
+        Args:
+            thread_id: Thread ID
+            thread: Thread data from the Community Service
+            posts: Posts of the thread
+            
+        Returns:
+            Documents, one per chunk
+        """
+        tokenizer = get_tokenizer(settings.openai_embedding_model)
+        shared = self._thread_payload(thread_id, thread)
+        title = shared["title"]
+        
+        sources = [("thread", None, thread.get("content", ""), False)]
+        sources.extend(
+            ("post", str(post.get("id", "")), post.get("content", ""), bool(post.get("isAcceptedAnswer")))
+            for post in posts
+        )
+        
+        documents: List[Document] = []
+        for source, post_id, text, accepted in sources:
+            chunks = chunk_text(text or "", self.chunk_max_tokens, self.chunk_overlap_tokens, tokenizer)
+            if source == "thread" and not chunks:
+                # Keep threads without a body searchable by title
+                chunks = [""]
+            for index, chunk in enumerate(chunks):
+                key = f"{thread_id}/{source}/{post_id or ''}/{index}"
+                metadata = {
+                    **shared,
+                    "source": source,
+                    "post_id": post_id,
+                    "accepted_answer": accepted,
+                    "chunk_index": index,
+                    "text": chunk,
+                    "excerpt": chunk[:200]
+                }
+                content = f"{title}\n\n{chunk}"
+                metadata["content_hash"] = self._fingerprint(content, metadata)
+                metadata["embedding_model"] = settings.openai_embedding_model
+                documents.append((str(uuid.uuid5(uuid.NAMESPACE_URL, key)), content, metadata))
+        return documents
+    
+    @staticmethod
+    def _fingerprint(content: str, metadata: Dict[str, Any]) -> str:
+        """Hash everything that determines a stored point's vector and payload."""
+        digest = hashlib.sha256(content.encode("utf-8"))
+        digest.update(json.dumps(metadata, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+    
+    async def _drop_unchanged(self, documents: List[Document]) -> List[Document]:
+        """
+        Remove documents whose stored fingerprint and model already match.
+        
+        Args:
+            documents: ``(point_id, content, metadata)`` tuples
+            
+        Returns:
+            Documents that need to be embedded and written
+        """
+        if not documents:
+            return documents
+        
+        stored = await self.vector_store.get_metadata([doc[0] for doc in documents])
+        changed = []
+        for document in documents:
+            point_id, _, metadata = document
+            previous = stored.get(point_id, {})
+            if (
+                previous.get("content_hash") == metadata["content_hash"]
+                and previous.get("embedding_model") == metadata["embedding_model"]
+            ):
+                logger.debug(f"Document {point_id} unchanged, skipping re-index")
+                self._unchanged_skipped.inc()
+                continue
+            changed.append(document)
+        return changed
+    
+    async def _write_documents(self, documents: List[Document]) -> None:
+        """Embed documents with one call and write them in bulk."""
+        with self.tracer.span("embed"):
+            vectors = await self.embeddings.embed_batch(
+                [content for _, content, _ in documents]
+            )
+        with self.tracer.span("write"):
+            await self.vector_store.index_batch([
+                (point_id, vector, metadata)
+                for (point_id, _, metadata), vector in zip(documents, vectors)
+            ])
     
     async def index_thread(self, thread_id: str) -> None:
         """
@@ -96,34 +682,24 @@ class IndexingWorker:
             thread_id: ID of thread to index
         """
         try:
-            # Fetch thread from Community Service
-            thread = await self.community_client.get_thread(thread_id)
+            # Fetch thread from Community Service and build its documents
+            with self.tracer.span("fetch"):
+                documents, stale_ids = await self._load_documents(thread_id)
             
-            # Build content for embedding
-            title = thread.get("title", "")
-            body = thread.get("content", "")
-            content = f"{title}\n\n{body}"
-            
-            # Generate embedding
-            logger.info(f"Generating embedding for thread {thread_id}")
-            embedding = await self.embeddings.embed_text(content)
-            
-            # Prepare metadata
-            metadata = {
-                "thread_id": thread_id,
-                "title": title,
-                "excerpt": body[:200],
-                "tags": thread.get("tags", []),
-                "created_at": thread.get("created_at", "")
-            }
-            
-            # Index in vector store
-            logger.info(f"Indexing thread {thread_id} in vector store")
-            await self.vector_store.index(
-                id=thread_id,
-                vector=embedding,
-                metadata=metadata
-            )
+            # Skip the embedding call and upsert if nothing changed
+            documents = await self._drop_unchanged(documents)
+            if not documents and not stale_ids:
+                logger.info(f"Thread {thread_id} unchanged since last index")
+                return
+            
+            # Generate embeddings and index in vector store
+            if documents:
+                logger.info(f"Indexing {len(documents)} documents for thread {thread_id}")
+                await self._write_documents(documents)
+            if stale_ids:
+                logger.info(f"Deleting {len(stale_ids)} stale chunks of thread {thread_id}")
+                with self.tracer.span("delete"):
+                    await self.vector_store.delete_batch(stale_ids)
             
             logger.info(f"Successfully indexed thread {thread_id}")
         except Exception as e:
@@ -136,14 +712,31 @@ class IndexingWorker:
             
             self.running = False
             
+            # Unacked messages are redelivered once the channel closes
+            if self.coalescer:
+                await self.coalescer.close()
+            for task in list(self._retry_tasks):
+                task.cancel()
+            if self._backfill_task:
+                self._backfill_task.cancel()
+            if self._batch_task:
+                self._batch_task.cancel()
+                try:
+                    await self._batch_task
+                except asyncio.CancelledError:
+                    pass
+            
             # Close RabbitMQ connection
             if self.channel:
                 await self.channel.close()
             if self.connection:
                 await self.connection.close()
             
-            # Close community client
+            # Stop summary refreshes, close community client and flush the vector store
+            if self.summary_cache is not None:
+                await self.summary_cache.close()
             await self.community_client.close()
+            await self.vector_store.close()
             
             logger.info("Worker stopped successfully")
         except Exception as e:
@@ -0,0 +1,10 @@
+"""
+Shared pytest configuration for the Assistant Service tests.
+"""
+
+import os
+
+# Settings require an API key at import time; tests never call OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+# Keep the persistent embedding cache out of the working tree
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
@@ -0,0 +1,84 @@
+"""
+Tests for the benchmark stand-ins and report helpers.
+"""
+
+import httpx
+import numpy as np
+import pytest
+
+from src.benchmark.fake_services import FakeCommunity, FakeOpenAI, LocalServer, synthetic_threads
+from src.benchmark.run import compare, drive, latency_stats
+from src.config.settings import settings
+from src.embeddings.openai_embeddings import OpenAIEmbeddings
+
+
+@pytest.mark.asyncio
+async def test_fake_openai_serves_the_real_client(monkeypatch):
+    """Vectors are deterministic and texts sharing words are closer."""
+    fake = FakeOpenAI(dim=64)
+    server = LocalServer(fake.app())
+    await server.start()
+    try:
+        monkeypatch.setattr(settings, "openai_base_url", f"{server.url}/v1")
+        embeddings = OpenAIEmbeddings()
+        first, related, unrelated = await embeddings.embed_batch([
+            "postgres vacuum is slow",
+            "why is postgres vacuum slow",
+            "react router hook"
+        ])
+        again = await embeddings.embed_text("postgres vacuum is slow")
+    finally:
+        await server.stop()
+
+    assert len(first) == 64
+    assert np.allclose(first, again)
+    assert np.dot(first, related) > np.dot(first, unrelated)
+    assert fake.requests["embeddings"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fake_community_paginates_posts():
+    threads = synthetic_threads(3, posts_per_thread=5)
+    server = LocalServer(FakeCommunity(threads).app())
+    await server.start()
+    try:
+        async with httpx.AsyncClient(base_url=server.url) as client:
+            thread = (await client.get("/api/threads/thread-1")).json()
+            page = (await client.get(
+                "/api/threads/thread-1/posts", params={"limit": 2, "offset": 4}
+            )).json()
+            missing = await client.get("/api/threads/unknown")
+    finally:
+        await server.stop()
+
+    assert thread["id"] == "thread-1" and "posts" not in thread
+    assert [post["id"] for post in page["data"]] == ["thread-1-post-4"]
+    assert page["meta"]["pagination"]["total"] == 5
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_drive_counts_errors_and_reports_percentiles():
+    async def send(index: int) -> None:
+        if index % 10 == 0:
+            raise RuntimeError("failed")
+
+    stats = await drive(send, total=100, concurrency=8)
+
+    assert stats["requests"] == 100
+    assert stats["errors"] == 10
+    assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+
+
+def test_latency_stats_and_baseline_comparison():
+    stats = latency_stats([i / 1000 for i in range(1, 101)], errors=0, elapsed=2.0)
+
+    assert stats["rps"] == 50.0
+    assert stats["p50_ms"] == pytest.approx(50.5)
+    assert stats["p99_ms"] == pytest.approx(99.01)
+
+    change = compare(
+        {"scenarios": {"ask": {"rps": 60.0, "p95_ms": 90.0, "p99_ms": 100.0}}},
+        {"scenarios": {"ask": {"rps": 50.0, "p95_ms": 100.0, "p99_ms": 100.0}, "similar": {}}}
+    )
+    assert change == {"ask": {"rps": 0.2, "p95_ms": -0.1, "p99_ms": 0.0}}
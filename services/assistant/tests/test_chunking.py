@@ -0,0 +1,31 @@
+"""
+Tests for token-bounded text chunking.
+"""
+
+from src.utils.chunking import chunk_text
+from src.utils.tokens import ApproximateTokenizer
+
+TOKENIZER = ApproximateTokenizer()
+
+
+def test_chunks_respect_budget_and_overlap():
+    """Chunks stay within the token budget and repeat trailing sentences."""
+    text = " ".join(f"Sentence number {i} is here." for i in range(40))
+
+    chunks = chunk_text(text, max_tokens=40, overlap_tokens=10, tokenizer=TOKENIZER)
+
+    assert len(chunks) > 1
+    assert all(TOKENIZER.count(chunk) <= 40 for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        last_sentence = previous.split(". ")[-1]
+        assert current.startswith(last_sentence)
+    assert "Sentence number 39 is here." in chunks[-1]
+
+
+def test_long_sentences_are_split_and_blank_text_has_no_chunks():
+    """A sentence over the budget is split on words; blank text yields nothing."""
+    chunks = chunk_text("word " * 200, max_tokens=20, overlap_tokens=0, tokenizer=TOKENIZER)
+
+    assert all(TOKENIZER.count(chunk) <= 20 for chunk in chunks)
+    assert " ".join(chunks).split() == ["word"] * 200
+    assert chunk_text("  \n\n ", max_tokens=20, overlap_tokens=5, tokenizer=TOKENIZER) == []
@@ -0,0 +1,166 @@
+"""
+Tests for the Community Service HTTP client.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.utils.community_client import CommunityClient
+from src.utils.ttl_cache import TTLCache
+
+
+def make_client(handler, cache=None) -> CommunityClient:
+    """Build a CommunityClient whose requests are served by ``handler``."""
+    client = CommunityClient(cache=cache)
+    client.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        base_url="http://community"
+    )
+    return client
+
+
+@pytest.mark.asyncio
+async def test_threads_batch_fans_out_concurrently_in_order():
+    """Without a bulk endpoint, threads are fetched in parallel and kept in order."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        if request.url.path == "/api/threads/batch":
+            return httpx.Response(404)
+        thread_id = request.url.path.rsplit("/", 1)[-1]
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later IDs finish first to prove ordering is preserved
+        await asyncio.sleep(0.01 * (5 - int(thread_id)))
+        in_flight -= 1
+        if thread_id == "3":
+            return httpx.Response(500)
+        return httpx.Response(200, json={"id": thread_id})
+
+    client = make_client(handler)
+    client.max_concurrency = 3
+
+    threads = await client.get_threads_batch(["1", "2", "3", "4"])
+
+    assert [thread["id"] for thread in threads] == ["1", "2", "4"]
+    assert 1 < peak <= 3
+    assert client._bulk_supported is False
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_threads_batch_uses_bulk_endpoint():
+    """A supported bulk endpoint replaces per-thread requests."""
+    paths = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        return httpx.Response(200, json={"data": [{"id": "b"}, {"id": "a"}]})
+
+    client = make_client(handler)
+
+    threads = await client.get_threads_batch(["a", "b", "c"])
+
+    assert [thread["id"] for thread in threads] == ["a", "b"]
+    assert paths == ["/api/threads/batch"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_thread_posts_are_streamed_page_by_page():
+    """Posts are requested in pages until a short or repeated page, in either response shape."""
+    requests = []
+    posts = [{"id": f"p{i}"} for i in range(7)]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        limit = int(request.url.params["limit"])
+        offset = int(request.url.params["offset"])
+        requests.append(offset)
+        page = posts[offset:offset + limit]
+        if offset == 0:
+            return httpx.Response(200, json=page)
+        return httpx.Response(200, json={"data": page, "meta": {"pagination": {"total": 7}}})
+
+    client = make_client(handler)
+
+    streamed = [post["id"] async for post in client.iter_thread_posts("t1", page_size=3)]
+
+    assert streamed == [post["id"] for post in posts]
+    assert requests == [0, 3, 6]
+    await client.close()
+
+    # A server ignoring limit and offset returns the same full page every time
+    requests.clear()
+
+    async def unpaginated(request: httpx.Request) -> httpx.Response:
+        requests.append(int(request.url.params["offset"]))
+        return httpx.Response(200, json=posts[:3])
+
+    client = make_client(unpaginated)
+
+    streamed = [post["id"] async for post in client.iter_thread_posts("t1", page_size=3)]
+
+    assert streamed == ["p0", "p1", "p2"]
+    assert requests == [0, 3]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_threads_are_listed_until_a_short_page():
+    """The listing's total is its page length, so paging continues past it."""
+    threads = [{"id": f"t{i}"} for i in range(5)]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        limit = int(request.url.params["limit"])
+        offset = int(request.url.params["offset"])
+        page = threads[offset:offset + limit]
+        return httpx.Response(200, json={"data": page, "meta": {"pagination": {"total": len(page)}}})
+
+    client = make_client(handler)
+
+    listed = [thread["id"] async for thread in client.iter_threads(page_size=2)]
+
+    assert listed == [thread["id"] for thread in threads]
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_thread_cache_coalesces_misses_and_invalidates():
+    """Concurrent misses share one request and invalidation forces a refetch."""
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"id": "t1", "version": calls})
+
+    cache = TTLCache("test_threads", ttl_seconds=60, max_bytes=1024)
+    client = make_client(handler, cache=cache)
+
+    results = await asyncio.gather(*(client.get_thread("t1") for _ in range(5)))
+    assert calls == 1
+    assert all(thread["version"] == 1 for thread in results)
+
+    assert (await client.get_thread("t1"))["version"] == 1
+    client.invalidate_thread("t1")
+    assert (await client.get_thread("t1"))["version"] == 2
+    assert calls == 2
+    await client.close()
+
+
+def test_ttl_cache_evicts_by_size():
+    """Entries are evicted least recently used first once over budget."""
+    cache = TTLCache("test_size", ttl_seconds=60, max_bytes=10)
+    cache.set("a", 1, 4)
+    cache.set("b", 2, 4)
+    cache.get("a")
+    cache.set("c", 3, 4)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.current_bytes == 8
@@ -0,0 +1,83 @@
+"""
+Tests for token-budgeted context assembly.
+"""
+
+from src.core.context_builder import ContextBuilder
+from src.utils.tokens import ApproximateTokenizer
+
+
+def make_builder(max_tokens: int) -> ContextBuilder:
+    """Build a context builder with deterministic token counts."""
+    builder = ContextBuilder(model="gpt-4", max_tokens=max_tokens, min_source_tokens=8)
+    builder.tokenizer = ApproximateTokenizer()
+    return builder
+
+
+def test_small_context_is_kept_verbatim():
+    """Sources within budget are numbered and included in full."""
+    builder = make_builder(1000)
+    docs = [
+        {"title": "Deploying", "content": "Use the deploy script.", "score": 0.9},
+        {"title": "Rollbacks", "content": "Revert the release tag.", "score": 0.8},
+    ]
+
+    context = builder.build(docs, "How do I deploy?")
+
+    assert context == (
+        "[1] Deploying\nUse the deploy script.\n\n"
+        "[2] Rollbacks\nRevert the release tag.\n"
+    )
+
+
+def test_near_duplicate_sources_are_dropped_and_keep_their_numbers():
+    """A copy of a higher-ranked source is left out without renumbering the rest."""
+    builder = make_builder(1000)
+    body = "Reset your password from the account settings page and confirm by email."
+    docs = [
+        {"title": "Password reset", "content": body, "score": 0.9},
+        {"title": "Password reset", "content": body + " Thanks!", "score": 0.85},
+        {"title": "Two factor", "content": "Enable 2FA under security.", "score": 0.5},
+    ]
+
+    context = builder.build(docs, "reset password")
+
+    assert context.count("Password reset") == 1
+    # Citations must match the response sources, which still list the duplicate
+    assert "[3] Two factor" in context
+    assert "[2]" not in context
+
+
+def test_given_ranks_are_used_as_source_numbers():
+    """Documents cite the rank of their search result, not their position."""
+    builder = make_builder(1000)
+    docs = [
+        {"title": "First", "content": "Loaded thread.", "rank": 1},
+        {"title": "Third", "content": "The second thread failed to load.", "rank": 3},
+    ]
+
+    context = builder.build(docs)
+
+    assert context.startswith("[1] First\n")
+    assert "[3] Third\n" in context
+
+
+def test_long_source_is_cut_to_relevant_passages_within_budget():
+    """Over-budget content keeps the passages matching the question."""
+    builder = make_builder(120)
+    filler = " ".join(f"Unrelated remark number {i}." for i in range(40))
+    docs = [
+        {"title": "Short", "content": "Brief answer about caching.", "score": 0.9},
+        {
+            "title": "Long",
+            "content": f"Intro to the thread.\n\n{filler}\n\nSet REDIS_URL to enable the cache backend.",
+            "score": 0.7
+        },
+    ]
+
+    context = builder.build(docs, "How do I enable the cache backend?")
+
+    assert builder.tokenizer.count(context) <= 120
+    assert "Brief answer about caching." in context
+    assert "Set REDIS_URL to enable the cache backend." in context
+    assert "Unrelated remark number 39." not in context
+    assert "…" in context
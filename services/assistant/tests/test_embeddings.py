@@ -0,0 +1,151 @@
+"""
+Tests for embedding service wrappers.
+"""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from src.embeddings.embedding_service import EmbeddingService
+from src.embeddings.batching_embeddings import BatchingEmbeddings
+from src.embeddings.cached_embeddings import CachedEmbeddings, SQLiteEmbeddingStore
+
+
+class FakeEmbeddings(EmbeddingService):
+    """Deterministic embedding service that records its calls."""
+
+    def __init__(self, fail_on: str = ""):
+        self.fail_on = fail_on
+        self.batch_calls: List[List[str]] = []
+        self.single_calls: List[str] = []
+
+    async def embed_text(self, text: str) -> List[float]:
+        self.single_calls.append(text)
+        if text == self.fail_on:
+            raise ValueError(f"bad input: {text}")
+        return [float(len(text)), 1.0]
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self.batch_calls.append(list(texts))
+        if self.fail_on in texts:
+            raise ValueError("batch rejected")
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_batching_coalesces_concurrent_calls():
+    """Concurrent embed_text calls are sent as one embed_batch request."""
+    inner = FakeEmbeddings()
+    batching = BatchingEmbeddings(inner, window_ms=10, max_batch_size=100)
+
+    texts = ["a", "bb", "ccc", "bb"]
+    vectors = await asyncio.gather(*(batching.embed_text(t) for t in texts))
+
+    assert vectors == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0], [2.0, 1.0]]
+    assert inner.batch_calls == [["a", "bb", "ccc"]]
+
+
+@pytest.mark.asyncio
+async def test_batching_flushes_at_max_size():
+    """A full batch is sent without waiting for the window."""
+    inner = FakeEmbeddings()
+    batching = BatchingEmbeddings(inner, window_ms=10_000, max_batch_size=2)
+
+    vectors = await asyncio.wait_for(
+        asyncio.gather(batching.embed_text("a"), batching.embed_text("bb")),
+        timeout=1.0
+    )
+
+    assert vectors == [[1.0, 1.0], [2.0, 1.0]]
+
+
+@pytest.mark.asyncio
+async def test_batching_isolates_errors_to_caller():
+    """A failing input only fails the caller that submitted it."""
+    inner = FakeEmbeddings(fail_on="boom")
+    batching = BatchingEmbeddings(inner, window_ms=10, max_batch_size=100)
+
+    results = await asyncio.gather(
+        batching.embed_text("ok"),
+        batching.embed_text("boom"),
+        batching.embed_text("fine"),
+        return_exceptions=True
+    )
+
+    assert results[0] == [2.0, 1.0]
+    assert isinstance(results[1], ValueError)
+    assert results[2] == [4.0, 1.0]
+
+
+@pytest.mark.asyncio
+async def test_cache_serves_repeated_texts_from_memory():
+    """Repeated texts are only embedded once."""
+    inner = FakeEmbeddings()
+    cache = CachedEmbeddings(inner, model="m1", max_memory_items=10)
+
+    assert await cache.embed_text("hello") == [5.0, 1.0]
+    assert await cache.embed_batch(["hello", "hi", "hi"]) == [
+        [5.0, 1.0], [2.0, 1.0], [2.0, 1.0]
+    ]
+
+    assert inner.single_calls == ["hello", "hi"]
+    assert inner.batch_calls == []
+
+
+@pytest.mark.asyncio
+async def test_cache_misses_are_coalesced_by_batching():
+    """With the factory's cache-over-batching stack, concurrent misses share one batch."""
+    inner = FakeEmbeddings()
+    stack = CachedEmbeddings(
+        BatchingEmbeddings(inner, window_ms=10, max_batch_size=100),
+        model="m1",
+        max_memory_items=100
+    )
+
+    texts = [f"text {i}" for i in range(8)]
+    vectors = await asyncio.gather(*(stack.embed_text(text) for text in texts))
+
+    assert vectors == [[6.0, 1.0]] * 8
+    assert inner.batch_calls == [texts]
+    assert inner.single_calls == []
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    """The memory tier stays within its capacity."""
+    inner = FakeEmbeddings()
+    cache = CachedEmbeddings(inner, model="m1", max_memory_items=2)
+
+    await cache.embed_batch(["a", "bb", "ccc"])
+
+    assert len(cache._memory) == 2
+    await cache.embed_text("a")
+    assert inner.single_calls == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_cache_persists_and_invalidates_on_model_change(tmp_path):
+    """Vectors survive a restart but not a model change."""
+    path = str(tmp_path / "embeddings.sqlite3")
+
+    first = CachedEmbeddings(
+        FakeEmbeddings(), model="m1", store=SQLiteEmbeddingStore(path, "m1")
+    )
+    await first.embed_text("persisted")
+    first.close()
+
+    inner = FakeEmbeddings()
+    restarted = CachedEmbeddings(
+        inner, model="m1", store=SQLiteEmbeddingStore(path, "m1")
+    )
+    assert await restarted.embed_text("persisted") == [9.0, 1.0]
+    assert inner.batch_calls == [] and inner.single_calls == []
+    restarted.close()
+
+    store = SQLiteEmbeddingStore(path, "m2")
+    assert store._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone() == (0,)
+    changed = CachedEmbeddings(FakeEmbeddings(), model="m2", store=store)
+    await changed.embed_text("persisted")
+    assert changed.inner.single_calls == ["persisted"]
+    changed.close()
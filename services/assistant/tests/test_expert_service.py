@@ -0,0 +1,123 @@
+"""
+Tests for the local expert index and its remote fallback.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from src.api.schemas import ExpertRequest
+from src.services.expert_service import ExpertService
+from src.utils.expert_index import ExpertIndex, weighted_scorer
+
+
+class FakeCommunityClient:
+    """Returns canned experts and records calls."""
+
+    def __init__(self, experts: Optional[List[Dict[str, Any]]] = None):
+        self.calls: List[List[str]] = []
+        self.experts = experts or [{"id": "remote", "name": "Remote User"}]
+
+    async def get_experts_by_tags(self, tags: List[str], top_k: int = 5) -> List[Dict[str, Any]]:
+        self.calls.append(tags)
+        return self.experts[:top_k]
+
+
+def post(user_id: str, upvotes: int = 0, accepted: bool = False) -> Dict[str, Any]:
+    return {
+        "authorId": user_id,
+        "author": {"id": user_id, "name": user_id.title()},
+        "upvotes": upvotes,
+        "isAcceptedAnswer": accepted,
+    }
+
+
+def make_index() -> ExpertIndex:
+    return ExpertIndex(
+        scorer=weighted_scorer({"threads": 1.0, "posts": 1.0, "accepted_answers": 5.0, "upvotes": 0.5}),
+        saturation=10.0
+    )
+
+
+def test_index_ranks_by_weighted_contributions():
+    """Accepted answers and upvotes outweigh a larger number of plain replies."""
+    index = make_index()
+    index.update_thread("t1", {"authorId": "ann", "tags": ["Python", "async"], "posts": [
+        post("bob"), post("bob"), post("bob"), post("cat", upvotes=4, accepted=True),
+    ]})
+    index.update_thread("t2", {"authorId": "ann", "tags": ["python"], "posts": [post("cat")]})
+
+    experts = index.top_experts(["python", "async"], top_k=2)
+
+    assert [e["user_id"] for e in experts] == ["cat", "bob"]
+    # Scores sum over tags, but contributions to a thread count once
+    assert experts[0]["relevant_contributions"] == 2
+    assert experts[1]["relevant_contributions"] == 3
+    assert 0 < experts[1]["expertise_score"] < experts[0]["expertise_score"] < 1
+    assert index.top_experts(["rust"], top_k=2) == []
+
+
+def test_removing_or_retagging_a_thread_subtracts_its_contributions():
+    """Stats of a thread are removed from every tag it was indexed under."""
+    index = make_index()
+    index.update_thread("t1", {"authorId": "ann", "tags": ["a", "b"], "posts": [post("bob")]})
+
+    index.update_thread("t1", {"authorId": "ann", "tags": ["b"], "posts": []})
+    assert index.top_experts(["a"], top_k=5) == []
+    assert [e["user_id"] for e in index.top_experts(["b"], top_k=5)] == ["ann"]
+
+    index.remove_thread("t1")
+    assert index.top_experts(["b"], top_k=5) == []
+    assert len(index) == 0
+
+
+@pytest.mark.asyncio
+async def test_service_falls_back_to_community_service():
+    """Tags the local index knows nothing about are looked up remotely."""
+    index = make_index()
+    index.update_thread("t1", {"authorId": "ann", "tags": ["python"], "posts": []})
+    index.complete = True
+    client = FakeCommunityClient()
+    service = ExpertService(community_client=client, index=index)
+
+    local = await service.find_experts(ExpertRequest(tags=["python"], top_k=3))
+    remote = await service.find_experts(ExpertRequest(tags=["go"], top_k=3))
+
+    assert [e.user_id for e in local.experts] == ["ann"]
+    assert client.calls == [["go"]]
+    assert [(e.user_id, e.username) for e in remote.experts] == [("remote", "Remote User")]
+
+
+@pytest.mark.asyncio
+async def test_service_asks_remotely_only_for_uncovered_tags():
+    """With some tags indexed, the others are looked up remotely and merged."""
+    index = make_index()
+    index.update_thread("t1", {"authorId": "ann", "tags": ["python"], "posts": []})
+    index.complete = True
+    client = FakeCommunityClient()
+    service = ExpertService(community_client=client, index=index)
+
+    response = await service.find_experts(ExpertRequest(tags=["python", "rust"], top_k=3))
+
+    assert client.calls == [["rust"]]
+    assert [e.user_id for e in response.experts] == ["ann", "remote"]
+
+
+@pytest.mark.asyncio
+async def test_service_asks_remotely_until_the_index_is_backfilled():
+    """After a restart a few indexed threads don't hide the remote history."""
+    index = make_index()
+    index.update_thread("t1", {"authorId": "newcomer", "tags": ["react"], "posts": []})
+    client = FakeCommunityClient([
+        {"id": "veteran", "name": "Veteran"},
+        {"id": "regular", "name": "Regular"},
+        {"id": "newcomer", "name": "Newcomer"},
+    ])
+    service = ExpertService(community_client=client, index=index)
+
+    response = await service.find_experts(ExpertRequest(tags=["react"], top_k=3))
+
+    assert client.calls == [["react"]]
+    assert [e.user_id for e in response.experts] == ["veteran", "regular", "newcomer"]
+    # Local contributions still count for users the Community Service returned
+    assert response.experts[2].expertise_score > 0
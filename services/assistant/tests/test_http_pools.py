@@ -0,0 +1,141 @@
+"""
+Tests for the shared HTTP connection pools.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+
+from src.benchmark.fake_services import FakeOpenAI, LocalServer
+from src.config.settings import settings
+from src.core.langchain_adapter import LangChainAdapter
+from src.embeddings.openai_embeddings import OpenAIEmbeddings
+from src.utils.community_client import CommunityClient
+from src.utils.http_pools import HTTPPools
+from src.utils.metrics import metrics
+
+
+def slow_app(delay: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(delay)
+        return {"ok": True}
+
+    return app
+
+
+def pool_metrics(pool: str):
+    labels = {"pool": pool}
+    return (
+        metrics.counter("http_connections_opened_total", labels=labels),
+        metrics.histogram("http_pool_wait_seconds", labels=labels),
+        metrics.histogram("http_connect_duration_seconds", labels=labels),
+    )
+
+
+def test_clients_are_shared_per_pool_with_per_pool_limits():
+    pools = HTTPPools(max_connections=50, max_keepalive_connections=10, pool_max_connections={"small": 4})
+
+    assert pools.client("a") is pools.client("a")
+    assert pools.client("a") is not pools.client("b")
+    assert pools.limits("a").max_connections == 50
+    assert pools.limits("small").max_connections == 4
+    assert pools.limits("small").max_keepalive_connections == 4
+
+
+@pytest.mark.asyncio
+async def test_closed_pools_are_recreated_on_next_use():
+    pools = HTTPPools()
+    client = pools.client("a")
+
+    await pools.close()
+
+    assert client.is_closed
+    assert not pools.client("a").is_closed
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused_and_pool_waits_are_measured():
+    server = LocalServer(slow_app(0.05))
+    await server.start()
+    pools = HTTPPools(pool_max_connections={"test_reuse": 1})
+    opened, wait, connect = pool_metrics("test_reuse")
+    try:
+        client = pools.client("test_reuse", base_url=server.url)
+        for _ in range(3):
+            (await client.get("/slow")).raise_for_status()
+        assert opened.value == 1
+        assert connect.count == 1
+        assert wait.count == 3
+
+        # With one connection, the second concurrent request queues for it
+        wait_before = wait.sum
+        await asyncio.gather(client.get("/slow"), client.get("/slow"))
+        assert wait.sum - wait_before >= 0.04
+        assert opened.value == 1
+    finally:
+        await pools.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_connections_ahead_of_requests():
+    server = LocalServer(slow_app(0.01))
+    await server.start()
+    pools = HTTPPools()
+    opened, _, _ = pool_metrics("test_warm")
+    try:
+        client = pools.client("test_warm", base_url=server.url)
+        await pools.warm_up({"test_warm": f"{server.url}/health", "missing": "http://unused"}, connections=2)
+        assert opened.value == 2
+
+        await asyncio.gather(client.get("/slow"), client.get("/slow"))
+        assert opened.value == 2
+    finally:
+        await pools.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_community_clients_share_the_pool_and_leave_it_open():
+    pools = HTTPPools()
+    api_client = CommunityClient(cache=None, pools=pools)
+    worker_client = CommunityClient(cache=None, pools=pools)
+
+    assert api_client.client is worker_client.client
+
+    await worker_client.close()
+    assert not api_client.client.is_closed
+
+    await pools.close()
+    assert api_client._get_client() is pools.client("community")
+    await pools.close()
+
+
+@pytest.mark.asyncio
+async def test_openai_clients_reopen_the_pool_after_close(monkeypatch):
+    """Embeddings and chat keep working across a pool close, e.g. a second app lifespan."""
+    fake = FakeOpenAI(dim=8, completion_words=3)
+    server = LocalServer(fake.app())
+    await server.start()
+    monkeypatch.setattr(settings, "openai_base_url", f"{server.url}/v1")
+    pools = HTTPPools()
+    try:
+        embeddings = OpenAIEmbeddings(pools=pools)
+        adapter = LangChainAdapter(pools=pools)
+        first_client = embeddings.client
+        await embeddings.embed_text("before close")
+
+        await pools.close()
+
+        assert len(await embeddings.embed_text("after close")) == 8
+        assert embeddings.client is not first_client
+        answer = await adapter.answer_question("after close?", [])
+        assert answer["answer"].startswith("Synthetic answer")
+        assert fake.requests == {"embeddings": 2, "chat": 1}
+    finally:
+        await pools.close()
+        await server.stop()
@@ -0,0 +1,359 @@
+"""
+Tests for the RabbitMQ indexing worker.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+
+from src.config.settings import settings
+from src.embeddings.embedding_service import EmbeddingService
+from src.utils.expert_index import ExpertIndex, weighted_scorer
+from src.utils.metrics import metrics
+from src.vector.lexical_index import BM25Index
+from src.vector.vector_store import SearchResult, VectorStore
+from src.workers.event_coalescer import ThreadEventCoalescer
+from src.workers.indexing_worker import IndexingWorker
+
+
+class FakeMessage:
+    """Minimal stand-in for aio_pika.IncomingMessage."""
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.body = json.dumps(payload).encode()
+        self.state = "pending"
+
+    async def ack(self):
+        self.state = "acked"
+
+    async def nack(self, requeue: bool = True):
+        self.state = "requeued" if requeue else "dropped"
+
+    async def reject(self, requeue: bool = False):
+        self.state = "requeued" if requeue else "dropped"
+
+
+class FakeCommunityClient:
+    """Serves threads from a dict, raising stored exceptions and failing for unknown IDs."""
+
+    def __init__(self, threads: Dict[str, Dict[str, Any]], posts=None):
+        self.threads = threads
+        self.posts: Dict[str, List[Dict[str, Any]]] = posts or {}
+        self.fetched: List[str] = []
+
+    def invalidate_thread(self, thread_id: str) -> None:
+        pass
+
+    async def get_thread(self, thread_id: str) -> Dict[str, Any]:
+        self.fetched.append(thread_id)
+        if thread_id not in self.threads:
+            raise LookupError(thread_id)
+        if isinstance(self.threads[thread_id], Exception):
+            raise self.threads[thread_id]
+        return self.threads[thread_id]
+
+    async def get_thread_posts(self, thread_id: str, strict: bool = False) -> List[Dict[str, Any]]:
+        return self.posts.get(thread_id, [])
+
+    async def iter_threads(self):
+        for thread_id, thread in self.threads.items():
+            await asyncio.sleep(0)
+            yield {"id": thread_id, **thread}
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeEmbeddings(EmbeddingService):
+    """Counts batch calls and returns a fixed vector."""
+
+    def __init__(self):
+        self.batch_calls: List[List[str]] = []
+
+    async def embed_text(self, text: str) -> List[float]:
+        return (await self.embed_batch([text]))[0]
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self.batch_calls.append(list(texts))
+        return [[1.0, 0.0] for _ in texts]
+
+
+class FakeVectorStore(VectorStore):
+    """In-memory vector store recording writes."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.points: Dict[str, Dict[str, Any]] = {}
+        self.batch_writes = 0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def index(self, id, vector, metadata) -> None:
+        self.points[id] = metadata
+
+    async def index_batch(self, points) -> None:
+        if self.fail:
+            raise ConnectionError("vector store down")
+        self.batch_writes += 1
+        for id, _, metadata in points:
+            self.points[id] = metadata
+
+    async def search(self, query_vector, top_k=5, filter_conditions=None) -> List[SearchResult]:
+        return []
+
+    async def get_metadata(self, ids) -> Dict[str, Dict[str, Any]]:
+        return {id: self.points[id] for id in ids if id in self.points}
+
+    async def list_ids(self, filter_conditions) -> List[str]:
+        return [
+            id for id, metadata in self.points.items()
+            if all(metadata.get(key) == value for key, value in filter_conditions.items())
+        ]
+
+    async def delete(self, id) -> None:
+        self.points.pop(id, None)
+
+    async def delete_batch(self, ids) -> None:
+        for id in ids:
+            self.points.pop(id, None)
+
+
+def make_worker(threads, fail_writes: bool = False) -> IndexingWorker:
+    """Build an IndexingWorker wired to in-memory fakes."""
+    worker = IndexingWorker()
+    worker.community_client = FakeCommunityClient(threads)
+    worker.embeddings = FakeEmbeddings()
+    worker.vector_store = FakeVectorStore(fail=fail_writes)
+    worker.expert_index = ExpertIndex(scorer=weighted_scorer({"posts": 1.0}), saturation=1.0)
+    worker.lexical_index = BM25Index()
+    return worker
+
+
+THREADS = {
+    "t1": {"title": "First", "content": "Body one", "tags": ["a"]},
+    "t2": {"title": "Second", "content": "Body two", "tags": ["b"]},
+}
+
+
+@pytest.mark.asyncio
+async def test_process_batch_embeds_and_writes_once():
+    """A batch is embedded with one call and written with one upsert."""
+    deleted = httpx.HTTPStatusError(
+        "Not Found",
+        request=httpx.Request("GET", "http://community/api/threads/deleted"),
+        response=httpx.Response(404)
+    )
+    worker = make_worker({**THREADS, "deleted": deleted})
+    worker.retry_backoff = 0.01
+    messages = [
+        FakeMessage({"type": "thread", "threadId": "t1"}),
+        FakeMessage({"type": "post", "threadId": "t2"}),
+        FakeMessage({"type": "post", "threadId": "missing"}),
+        FakeMessage({"type": "post", "threadId": "deleted"}),
+        FakeMessage({"type": "unknown"}),
+    ]
+
+    await worker.process_batch(messages)
+
+    assert len(worker.embeddings.batch_calls) == 1
+    assert worker.vector_store.batch_writes == 1
+    assert set(worker.vector_store.points) == {"t1", "t2"}
+    # Fetch errors are retried after a backoff; deleted threads are discarded
+    assert [m.state for m in messages] == ["acked", "acked", "pending", "dropped", "acked"]
+    await asyncio.sleep(0.02)
+    assert messages[2].state == "requeued"
+
+
+@pytest.mark.asyncio
+async def test_process_batch_requeues_with_backoff_when_write_fails():
+    """Messages are not acked unless written, and are requeued after growing delays."""
+    worker = make_worker(THREADS, fail_writes=True)
+    worker.retry_backoff = 0.05
+    worker.max_retries = 2
+
+    async def attempt() -> List[FakeMessage]:
+        messages = [
+            FakeMessage({"type": "thread", "threadId": "t1"}),
+            FakeMessage({"type": "thread", "threadId": "t2"}),
+        ]
+        await worker.process_batch(messages)
+        return messages
+
+    first = await attempt()
+    assert [m.state for m in first] == ["pending", "pending"]
+    await asyncio.sleep(0.075)
+    assert [m.state for m in first] == ["requeued", "requeued"]
+
+    # The second delay is twice as long
+    second = await attempt()
+    await asyncio.sleep(0.075)
+    assert [m.state for m in second] == ["pending", "pending"]
+    await asyncio.sleep(0.05)
+    assert [m.state for m in second] == ["requeued", "requeued"]
+
+    # Out of retries: rejected so a dead-letter queue can take them
+    assert [m.state for m in await attempt()] == ["dropped", "dropped"]
+
+    worker.vector_store.fail = False
+    assert [m.state for m in await attempt()] == ["acked", "acked"]
+    assert worker._attempts == {}
+
+
+@pytest.mark.asyncio
+async def test_process_batch_records_queue_lag_and_stages():
+    """Publish timestamps feed the queue lag histogram; stages are timed."""
+    worker = make_worker(THREADS)
+    published = (datetime.now(timezone.utc) - timedelta(seconds=30)).isoformat()
+    lag_before = (worker._queue_lag.count, worker._queue_lag.sum)
+    write_stage = metrics.histogram("indexing_stage_duration_seconds", labels={"stage": "write"})
+    writes_before = write_stage.count
+
+    await worker.process_batch([
+        FakeMessage({"type": "thread", "threadId": "t1", "timestamp": published}),
+        FakeMessage({"type": "thread", "threadId": "t2"}),
+    ])
+
+    assert worker._queue_lag.count == lag_before[0] + 1
+    assert 30 <= worker._queue_lag.sum - lag_before[1] < 60
+    assert write_stage.count == writes_before + 1
+
+
+@pytest.mark.asyncio
+async def test_coalesced_events_index_each_thread_once():
+    """A burst of events for one thread triggers a single re-index."""
+    worker = make_worker(THREADS)
+    worker.coalescer = ThreadEventCoalescer(
+        window=0.02, max_wait=1.0, on_flush=worker._flush_coalesced
+    )
+    messages = [
+        FakeMessage({"type": "post", "threadId": "t1"}),
+        FakeMessage({"type": "post", "threadId": "t1"}),
+        FakeMessage({"type": "thread", "threadId": "t2"}),
+        FakeMessage({"type": "post", "threadId": "t1"}),
+    ]
+
+    saved_before = worker._embeddings_saved.value
+    for message in messages:
+        await worker._coalesce_message(message)
+    await asyncio.sleep(0.1)
+
+    assert sorted(worker.community_client.fetched) == ["t1", "t2"]
+    assert all(m.state == "acked" for m in messages)
+    assert worker._embeddings_saved.value - saved_before == 2
+
+
+@pytest.mark.asyncio
+async def test_unchanged_threads_are_not_reembedded():
+    """Re-indexing identical content skips the embedding call and the write."""
+    threads = {thread_id: dict(thread) for thread_id, thread in THREADS.items()}
+    worker = make_worker(threads)
+
+    await worker.process_batch([FakeMessage({"type": "thread", "threadId": "t1"})])
+    message = FakeMessage({"type": "post", "threadId": "t1"})
+    await worker.process_batch([message])
+
+    assert len(worker.embeddings.batch_calls) == 1
+    assert worker.vector_store.batch_writes == 1
+    assert message.state == "acked"
+
+    threads["t1"]["content"] = "Edited body"
+    await worker.index_thread("t1")
+    assert worker.vector_store.points["t1"]["excerpt"] == "Edited body"
+    assert [r.id for r in worker.lexical_index.search("edited", top_k=5)] == ["t1"]
+    assert worker.lexical_index.search("one", top_k=5) == []
+
+
+@pytest.mark.asyncio
+async def test_chunk_indexing_writes_thread_and_post_chunks():
+    """Body and posts become chunk points; removed posts' chunks are deleted."""
+    threads = {"t1": {"title": "Login", "content": "Cannot log in after the update. " * 20}}
+    posts = {"t1": [
+        {"id": "p1", "content": "Clear the cookies and retry.", "isAcceptedAnswer": True},
+        {"id": "p2", "content": "Same problem here."},
+    ]}
+    worker = make_worker(threads)
+    worker.community_client.posts = posts
+    worker.chunking_enabled = True
+    worker.chunk_max_tokens = 64
+    worker.chunk_overlap_tokens = 16
+    # A thread-level point left over from before chunking was enabled
+    worker.vector_store.points["t1"] = {"thread_id": "t1"}
+
+    await worker.index_thread("t1")
+
+    points = worker.vector_store.points
+    assert "t1" not in points
+    assert all(metadata["thread_id"] == "t1" for metadata in points.values())
+    body_chunks = [m for m in points.values() if m["source"] == "thread"]
+    assert len(body_chunks) > 1
+    accepted = [m for m in points.values() if m["post_id"] == "p1"]
+    assert accepted[0]["text"] == "Clear the cookies and retry."
+    assert accepted[0]["accepted_answer"] is True
+    ids_before = set(points)
+
+    posts["t1"].pop()
+    worker.embeddings.batch_calls.clear()
+    await worker.index_thread("t1")
+
+    assert not [m for m in points.values() if m["post_id"] == "p2"]
+    assert set(points) < ids_before
+    assert worker.embeddings.batch_calls == []
+
+
+@pytest.mark.asyncio
+async def test_reindexing_replaces_expert_contributions():
+    """Indexed threads feed the expert index; a re-index replaces their counts."""
+    threads = {"t1": {
+        "title": "Login", "content": "Cannot log in.", "tags": ["Auth"],
+        "author": {"id": "u1", "name": "Ada"},
+        "posts": [{"id": "p1", "authorId": "u2", "author": {"id": "u2", "name": "Bob"}}],
+    }}
+    worker = make_worker(threads)
+
+    await worker.index_thread("t1")
+    assert [e["user_id"] for e in worker.expert_index.top_experts(["auth"], 5)] == ["u2"]
+
+    threads["t1"]["posts"] = [{"id": "p2", "authorId": "u1", "author": {"id": "u1", "name": "Ada"}}]
+    await worker.index_thread("t1")
+
+    experts = worker.expert_index.top_experts(["auth"], 5)
+    assert [(e["user_id"], e["username"], e["relevant_contributions"]) for e in experts] == [("u1", "Ada", 2)]
+
+
+@pytest.mark.asyncio
+async def test_backfill_records_every_thread_and_completes_the_indexes():
+    """Existing threads and all their posts are recorded before the indexes are trusted."""
+    threads = {
+        f"t{i}": {"title": f"Thread {i}", "authorId": "ann", "tags": ["react"], "posts": []}
+        for i in range(5)
+    }
+    worker = make_worker(threads)
+    worker.community_client.posts = {
+        "t3": [{"id": "p1", "authorId": "bob"}, {"id": "p2", "authorId": "bob"}]
+    }
+    # Indexed by an event before the backfill reached it
+    worker.lexical_index.add("t2", "Thread 2 edited", {"thread_id": "t2"})
+
+    assert not worker.expert_index.complete and not worker.lexical_index.complete
+    await worker.backfill_indexes()
+
+    assert worker.expert_index.complete and worker.lexical_index.complete
+    assert len(worker.expert_index) == 5
+    experts = worker.expert_index.top_experts(["react"], 5)
+    assert [(e["user_id"], e["relevant_contributions"]) for e in experts] == [("bob", 2)]
+    assert len(worker.lexical_index) == 5
+    assert [r.id for r in worker.lexical_index.search("edited", top_k=5)] == ["t2"]
+
+
+def test_batched_worker_waits_for_qdrant_writes(monkeypatch):
+    """Acking after the write requires it to be applied, whatever QDRANT_WRITE_WAIT says."""
+    monkeypatch.setattr(settings, "vector_store_backend", "qdrant")
+    monkeypatch.setattr(settings, "qdrant_write_wait", False)
+    monkeypatch.setattr(settings, "indexing_batch_enabled", True)
+
+    assert IndexingWorker().vector_store.write_wait is True
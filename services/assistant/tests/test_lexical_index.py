@@ -0,0 +1,131 @@
+"""
+Tests for the BM25 index and hybrid retrieval.
+"""
+
+from typing import List
+
+import pytest
+
+from src.vector.hybrid import HybridRetriever, reciprocal_rank_fusion
+from src.vector.lexical_index import BM25Index, tokenize
+from src.vector.vector_store import SearchResult
+
+
+def make_index() -> BM25Index:
+    index = BM25Index()
+    index.add("t1", "Install fails with ERR_SSL_PROTOCOL behind a proxy", {"title": "SSL"})
+    index.add("t2", "How to configure the proxy for pip install", {"title": "Proxy"})
+    index.add("t3", "requests.exceptions.ConnectionError when calling the API", {"title": "Conn"})
+    return index
+
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    """Dotted and underscored identifiers match whole and by part."""
+    terms = tokenize("Got requests.exceptions.ConnectionError (ERR_SSL)")
+
+    assert "requests.exceptions.connectionerror" in terms
+    assert {"connectionerror", "err_ssl", "ssl"} <= set(terms)
+
+
+def test_bm25_ranks_exact_identifier_matches_first():
+    """Rare exact terms outrank common ones."""
+    index = make_index()
+
+    assert [r.id for r in index.search("err_ssl_protocol proxy", top_k=3)] == ["t1", "t2"]
+    assert [r.id for r in index.search("ConnectionError", top_k=3)] == ["t3"]
+    assert index.search("ConnectionError", top_k=3)[0].metadata == {"title": "Conn"}
+
+
+def test_bm25_applies_filter_conditions():
+    """Only threads whose stored metadata matches are returned."""
+    index = BM25Index()
+    index.add("t1", "proxy settings", {"tags": ["network"], "status": "OPEN"})
+    index.add("t2", "proxy errors", {"tags": ["pip"], "status": "CLOSED"})
+
+    results = index.search("proxy", top_k=5, filter_conditions={"tags": ["pip", "conda"]})
+
+    assert [r.id for r in results] == ["t2"]
+    assert index.search("proxy", top_k=5, filter_conditions={"status": "ANSWERED"}) == []
+
+
+def test_reindex_and_remove_compact_posting_lists():
+    """Re-indexed and removed threads stop matching their old text."""
+    index = make_index()
+    index.add("t1", "Upgrade to v3 fixed it", {"title": "SSL"})
+    index.remove("t2")
+
+    assert index.search("proxy", top_k=3) == []
+    assert [r.id for r in index.search("upgrade", top_k=3)] == ["t1"]
+    assert len(index) == 2
+    # Enough tombstones were dropped to renumber the live documents
+    assert len(index._doc_lengths) == 2
+
+
+def test_saved_index_loads_without_tombstones_leaking(tmp_path):
+    """A saved index reloads with the same live threads and scores."""
+    index = make_index()
+    index.add("t1", "Install fails with ERR_SSL_PROTOCOL again", {"title": "SSL"})
+    path = tmp_path / "bm25.npz"
+    with open(path, "wb") as f:
+        BM25Index.save(f, index.snapshot())
+
+    loaded = BM25Index()
+    loaded.load(str(path))
+
+    assert len(loaded) == 3 and "t1" in loaded
+    assert loaded.search("proxy err_ssl_protocol", top_k=3) == index.search("proxy err_ssl_protocol", top_k=3)
+    assert loaded.search("ConnectionError", top_k=3)[0].metadata == {"title": "Conn"}
+
+
+class FakeVectorStore:
+    """Returns a fixed ranking."""
+
+    def __init__(self, ids: List[str]):
+        self.ids = ids
+
+    async def search_threads(self, query_vector, top_k=5, filter_conditions=None, group_size=3):
+        return [SearchResult(id=id, score=0.8, metadata={"title": id, "chunks": []}) for id in self.ids[:top_k]]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """Results ranked well by both legs come first; scores are normalized."""
+    vector = [SearchResult(id=id, score=0.9, metadata={}) for id in ["a", "b", "c"]]
+    lexical = [SearchResult(id=id, score=7.0, metadata={}) for id in ["b", "d"]]
+
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+
+    assert [r.id for r in fused] == ["b", "a", "d", "c"]
+    assert all(0 < r.score <= 1 for r in fused)
+
+
+@pytest.mark.asyncio
+async def test_retriever_modes():
+    """The mode picks the legs; hybrid surfaces lexical-only exact matches."""
+    index = make_index()
+    index.complete = True
+    retriever = HybridRetriever(FakeVectorStore(["t2", "t9"]), index=index)
+
+    vector = await retriever.search("ERR_SSL_PROTOCOL", [1.0], top_k=2, mode="vector")
+    lexical = await retriever.search("ERR_SSL_PROTOCOL", None, top_k=2, mode="lexical")
+    hybrid = await retriever.search("ERR_SSL_PROTOCOL proxy", [1.0], top_k=3, mode="hybrid")
+
+    assert [r.id for r in vector] == ["t2", "t9"]
+    assert [r.id for r in lexical] == ["t1"] and lexical[0].score == 1.0
+    assert [r.id for r in hybrid][:2] == ["t2", "t1"]
+    assert "t9" in [r.id for r in hybrid]
+    assert HybridRetriever(FakeVectorStore([]), index=None).resolve_mode("hybrid") == "vector"
+
+
+@pytest.mark.asyncio
+async def test_incomplete_index_falls_back_to_vector_search(caplog):
+    """While the index is rebuilt, lexical and hybrid requests say so and use vector search."""
+    retriever = HybridRetriever(FakeVectorStore(["t2", "t9"]), index=make_index())
+
+    assert retriever.resolve_mode("lexical") == "vector"
+    hybrid = await retriever.search("ERR_SSL_PROTOCOL", [1.0], top_k=3, mode="hybrid")
+
+    assert [r.id for r in hybrid] == ["t2", "t9"]
+    assert "Lexical index is still being rebuilt (3 threads so far)" in caplog.text
+
+    retriever.index.complete = True
+    assert retriever.resolve_mode("lexical") == "lexical"
@@ -0,0 +1,229 @@
+"""
+Tests for the RAG service answer cache and streaming.
+"""
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from src.api.schemas import AskRequest
+from src.services.rag_service import RAGService
+from src.utils.semantic_cache import SemanticCache
+from src.vector.vector_store import SearchResult
+
+QUESTIONS = {
+    "How do I reset my password?": [1.0, 0.0, 0.0],
+    "How can I reset my password?": [0.99, 0.05, 0.0],
+    "What is the API rate limit?": [0.0, 1.0, 0.0],
+    "Why does search break?": [0.0, 0.0, 1.0],
+}
+
+
+class FakeEmbeddings:
+    """Embeds known questions to fixed vectors."""
+
+    def __init__(self):
+        self.batch_calls: List[List[str]] = []
+
+    async def embed_text(self, text: str) -> List[float]:
+        return QUESTIONS[text]
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self.batch_calls.append(texts)
+        return [QUESTIONS[text] for text in texts]
+
+
+class FakeVectorStore:
+    """Returns a fixed thread per query direction, optionally with chunk text."""
+
+    def __init__(self, chunk_text=None):
+        self.chunk_text = chunk_text
+
+    async def search_threads(self, query_vector, top_k=5, filter_conditions=None, group_size=3):
+        if query_vector[2] > 0:
+            raise RuntimeError("search failed")
+        thread_id = "t-password" if query_vector[0] > query_vector[1] else "t-limits"
+        chunks = [{"text": self.chunk_text, "score": 0.9, "source": "post", "post_id": "p1"}]
+        return [SearchResult(id=thread_id, score=0.9, metadata={"title": thread_id, "chunks": chunks})]
+
+
+class FakeCommunityClient:
+    """Serves threads by ID."""
+
+    def __init__(self):
+        self.fetched: List[str] = []
+
+    async def get_threads_batch(self, thread_ids: List[str]) -> List[Dict[str, Any]]:
+        self.fetched.extend(thread_ids)
+        return [{"id": id, "title": id, "content": "..."} for id in thread_ids]
+
+
+class FakeOrchestrator:
+    """Counts LLM calls, optionally running a hook mid-generation."""
+
+    def __init__(self):
+        self.calls = 0
+        self.during_call = None
+        self.context_docs: List[Dict[str, Any]] = []
+
+    async def answer_question(self, question: str, context_docs: List[Dict[str, Any]]):
+        self.calls += 1
+        self.context_docs = context_docs
+        if self.during_call:
+            self.during_call()
+        await asyncio.sleep(0)
+        return {"answer": f"answer {self.calls}"}
+
+    async def stream_answer(self, question: str, context_docs: List[Dict[str, Any]]):
+        self.calls += 1
+        for token in ["Use ", "the ", "reset link."]:
+            await asyncio.sleep(0)
+            yield token
+
+
+def make_service(threshold: float = 0.95, chunk_text=None) -> RAGService:
+    """Build a RAGService with a fresh cache and in-memory fakes."""
+    return RAGService(
+        orchestrator=FakeOrchestrator(),
+        vector_store=FakeVectorStore(chunk_text),
+        embeddings=FakeEmbeddings(),
+        community_client=FakeCommunityClient(),
+        cache=SemanticCache("test_answers", threshold, ttl_seconds=60, max_entries=2)
+    )
+
+
+@pytest.mark.asyncio
+async def test_similar_question_is_served_from_cache():
+    """A paraphrase above the threshold reuses the answer; others miss."""
+    service = make_service()
+
+    first, first_similarity = await service.ask_with_cache_status(
+        AskRequest(question="How do I reset my password?")
+    )
+    second, similarity = await service.ask_with_cache_status(
+        AskRequest(question="How can I reset my password?")
+    )
+    other, other_similarity = await service.ask_with_cache_status(
+        AskRequest(question="What is the API rate limit?")
+    )
+    different_top_k, _ = await service.ask_with_cache_status(
+        AskRequest(question="How do I reset my password?", top_k=3)
+    )
+
+    assert first_similarity is None and other_similarity is None
+    assert similarity == pytest.approx(0.9987, abs=1e-3)
+    assert second.answer == first.answer
+    assert other.answer != first.answer
+    assert different_top_k.answer not in (first.answer, other.answer)
+    assert service.orchestrator.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_indexing_event_invalidates_cited_answers():
+    """Invalidating a cited thread forces regeneration."""
+    service = make_service()
+    request = AskRequest(question="How do I reset my password?")
+    await service.ask(request)
+
+    assert service.cache.invalidate_thread("t-other") == 0
+    assert service.cache.invalidate_thread("t-password") == 1
+    await service.ask(request)
+
+    assert service.orchestrator.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_answer_invalidated_while_generating_is_not_cached():
+    """An event for a cited thread during generation prevents caching."""
+    service = make_service()
+    service.orchestrator.during_call = lambda: service.cache.invalidate_thread("t-password")
+    request = AskRequest(question="How do I reset my password?")
+
+    await service.ask(request)
+    service.orchestrator.during_call = None
+    _, similarity = await service.ask_with_cache_status(request)
+
+    assert similarity is None
+    assert service.orchestrator.calls == 2
+
+
+def test_semantic_cache_evicts_least_recently_used():
+    """The least recently matched entry is evicted when full."""
+    cache = SemanticCache("test_lru", threshold=0.99, ttl_seconds=60, max_entries=2)
+    cache.put([1, 0, 0], "a", ["t1"])
+    cache.put([0, 1, 0], "b", ["t2"])
+    assert cache.get([1, 0, 0])[0] == "a"
+
+    cache.put([0, 0, 1], "c", ["t3"])
+
+    assert len(cache) == 2
+    assert cache.get([0, 1, 0]) is None
+    assert cache.get([1, 0, 0])[0] == "a"
+    assert cache.invalidate_thread("t2") == 0
+
+
+@pytest.mark.asyncio
+async def test_ask_stream_sends_sources_tokens_then_done():
+    """Sources come first, then tokens, then a done event; the answer is cached."""
+    service = make_service()
+    request = AskRequest(question="How do I reset my password?")
+
+    events = [event async for event in service.ask_stream(request)]
+    replay = [event async for event in service.ask_stream(request)]
+
+    assert [e["event"] for e in events] == ["sources", "token", "token", "token", "done"]
+    assert events[0]["data"]["sources"][0]["thread_id"] == "t-password"
+    assert "".join(e["data"]["text"] for e in events[1:4]) == "Use the reset link."
+    assert events[-1]["data"]["cached"] is False
+    assert events[-1]["data"]["time_to_first_token_ms"] >= 0
+
+    assert [e["event"] for e in replay] == ["sources", "token", "done"]
+    assert replay[1]["data"]["text"] == "Use the reset link."
+    assert replay[-1]["data"]["cached"] is True
+    assert service.orchestrator.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_context_is_built_from_matched_chunks():
+    """Chunk text from the index is used without fetching threads."""
+    service = make_service(chunk_text="Click 'Forgot password' on the login page.")
+
+    await service.ask(AskRequest(question="How do I reset my password?"))
+
+    assert service.community_client.fetched == []
+    assert service.orchestrator.context_docs[0]["content"] == "Click 'Forgot password' on the login page."
+
+    fallback = make_service()
+    await fallback.ask(AskRequest(question="How do I reset my password?"))
+    assert fallback.community_client.fetched == ["t-password"]
+
+
+@pytest.mark.asyncio
+async def test_batch_embeds_once_and_shares_thread_fetches():
+    """Batched questions share one embedding call and one thread fetch; errors stay per item."""
+    service = make_service(threshold=1.0)
+    await service.ask(AskRequest(question="What is the API rate limit?"))
+    service.community_client.fetched.clear()
+
+    results = await service.ask_batch([
+        AskRequest(question="How do I reset my password?"),
+        AskRequest(question="How can I reset my password?"),
+        AskRequest(question="Why does search break?"),
+        AskRequest(question="What is the API rate limit?"),
+        AskRequest(question="How do I reset my password?"),
+    ])
+
+    assert service.embeddings.batch_calls == [[
+        "How do I reset my password?",
+        "How can I reset my password?",
+        "Why does search break?",
+        "What is the API rate limit?",
+    ]]
+    assert service.community_client.fetched == ["t-password"]
+    assert [r.sources[0].thread_id for r in results if not isinstance(r, Exception)] == [
+        "t-password", "t-password", "t-limits", "t-password"
+    ]
+    assert isinstance(results[2], RuntimeError)
+    # The rate limit answer came from the cache
+    assert service.orchestrator.calls == 1 + 3
@@ -0,0 +1,220 @@
+"""
+Tests for single-call and map-reduce thread summarization.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pytest
+
+from src.api.schemas import SummarizeRequest
+from src.services.summarization_service import SummarizationService
+from src.utils.summary_cache import SummaryCache
+
+
+class FakeCommunityClient:
+    """Serves one thread with a configurable number of replies."""
+
+    def __init__(self, replies: int):
+        self.thread = {
+            "title": "Upgrade failed",
+            "content": "The upgrade to v2 fails.",
+            "updatedAt": "2024-01-01T00:00:00Z"
+        }
+        self.posts = [self.make_post(i) for i in range(replies)]
+        self.yielded = 0
+        self.fail_after: Optional[int] = None
+
+    @staticmethod
+    def make_post(i: int) -> Dict[str, Any]:
+        return {
+            "id": f"p{i}",
+            "author": f"user{i}",
+            "content": f"Reply {i} suggests checking the migration logs.",
+            "createdAt": f"2024-01-02T00:00:{i:02d}Z"
+        }
+
+    async def get_thread(self, thread_id: str) -> Dict[str, Any]:
+        return {"id": thread_id, **self.thread}
+
+    async def iter_thread_posts(self, thread_id: str):
+        for index, post in enumerate(list(self.posts)):
+            if index == self.fail_after:
+                raise httpx.ConnectError("posts unavailable")
+            await asyncio.sleep(0)
+            self.yielded += 1
+            yield post
+
+
+class FakeOrchestrator:
+    """Records calls and the peak number of concurrent segment summaries."""
+
+    def __init__(self):
+        self.summarize_calls: List[str] = []
+        self.updates: List[str] = []
+        self.segments: List[str] = []
+        self.combined: List[str] = []
+        self.active = 0
+        self.peak = 0
+        self.progress = lambda: None
+        self.progress_at_segment: List[Any] = []
+
+    async def summarize(self, thread_content: str) -> Dict[str, Any]:
+        self.summarize_calls.append(thread_content)
+        return {"summary": "single", "key_points": ["a"]}
+
+    async def summarize_segment(self, segment_content: str) -> str:
+        self.segments.append(segment_content)
+        self.progress_at_segment.append(self.progress())
+        notes = f"notes {len(self.segments)}"
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return notes
+
+    async def update_summary(self, previous: Dict[str, Any], new_content: str) -> Dict[str, Any]:
+        self.updates.append(new_content)
+        return {**previous, "summary": f"{previous['summary']} updated"}
+
+    async def combine_summaries(self, title: str, partial_summaries: List[str]) -> Dict[str, Any]:
+        self.combined = partial_summaries
+        return {"summary": "combined", "key_points": ["b"], "consensus": "check logs"}
+
+
+def make_service(replies: int, cache=None) -> SummarizationService:
+    """Build a service with a small threshold so long threads are cheap to fake."""
+    return SummarizationService(
+        orchestrator=FakeOrchestrator(),
+        community_client=FakeCommunityClient(replies),
+        map_reduce_threshold=200,
+        segment_max_tokens=80,
+        max_concurrency=2,
+        cache=cache
+    )
+
+
+@pytest.mark.asyncio
+async def test_short_thread_uses_single_call():
+    """Threads under the threshold are summarized in one call."""
+    service = make_service(replies=2)
+
+    response = await service.summarize(SummarizeRequest(thread_id="t1"))
+
+    assert response.summary == "single"
+    assert len(service.orchestrator.summarize_calls) == 1
+    assert "- user1: Reply 1" in service.orchestrator.summarize_calls[0]
+    assert service.orchestrator.segments == []
+
+
+@pytest.mark.asyncio
+async def test_long_thread_is_summarized_in_concurrent_segments():
+    """Long threads are split, mapped under the concurrency limit, then combined."""
+    service = make_service(replies=40)
+    service.orchestrator.progress = lambda: service.community_client.yielded
+
+    response = await service.summarize(SummarizeRequest(thread_id="t1"))
+
+    orchestrator = service.orchestrator
+    assert response.summary == "combined"
+    assert response.consensus == "check logs"
+    assert orchestrator.summarize_calls == []
+    assert len(orchestrator.segments) > 2
+    assert orchestrator.peak == 2
+    assert all(service.tokenizer.count(s) <= 80 + 20 for s in orchestrator.segments)
+    assert "Original Post" in orchestrator.segments[0]
+    assert "Reply 39" in orchestrator.segments[-1]
+    # Segments are summarized while later posts are still streaming in
+    assert orchestrator.progress_at_segment[0] < 40
+    assert orchestrator.combined == [f"notes {i}" for i in range(1, len(orchestrator.segments) + 1)]
+
+
+@pytest.mark.asyncio
+async def test_cached_summary_is_reused_then_updated_incrementally():
+    """Unchanged threads reuse the summary; new replies alone update it."""
+    service = make_service(replies=2, cache=SummaryCache(ttl_seconds=60, max_entries=10))
+    client, orchestrator = service.community_client, service.orchestrator
+    request = SummarizeRequest(thread_id="t1")
+
+    first = await service.summarize(request)
+    assert (await service.summarize(request)) is first
+
+    # An event without an actual change revalidates without calling the LLM
+    service.cache.mark_stale("t1")
+    assert (await service.summarize(request)) is first
+
+    client.posts.append(client.make_post(2))
+    service.cache.mark_stale("t1")
+    updated = await service.summarize(request)
+
+    assert updated.summary == "single updated"
+    assert len(orchestrator.updates) == 1
+    assert "Reply 2" in orchestrator.updates[0] and "Reply 1" not in orchestrator.updates[0]
+
+    client.thread["content"] = "The upgrade to v2.1 fails."
+    service.cache.mark_stale("t1")
+    await service.summarize(request)
+
+    assert len(orchestrator.summarize_calls) == 2
+    assert len(orchestrator.updates) == 1
+
+
+@pytest.mark.asyncio
+async def test_view_count_bumps_do_not_invalidate_the_cached_summary():
+    """Fetches that differ only in updatedAt and viewCount reuse the summary."""
+    service = make_service(replies=2, cache=SummaryCache(ttl_seconds=60, max_entries=10))
+    client, orchestrator = service.community_client, service.orchestrator
+    request = SummarizeRequest(thread_id="t1")
+    first = await service.summarize(request)
+
+    client.thread.update(updatedAt="2024-02-01T00:00:00Z", viewCount=7)
+    service.cache.mark_stale("t1")
+    assert (await service.summarize(request)) is first
+
+    client.thread.update(updatedAt="2024-02-02T00:00:00Z", viewCount=8)
+    client.posts.append(client.make_post(2))
+    service.cache.mark_stale("t1")
+    updated = await service.summarize(request)
+
+    assert updated.summary == "single updated"
+    assert len(orchestrator.summarize_calls) == 1
+    assert len(orchestrator.updates) == 1
+
+
+@pytest.mark.asyncio
+async def test_hot_stale_summary_is_refreshed_in_background():
+    """A popular thread's summary is updated after a new post without a request."""
+    cache = SummaryCache(ttl_seconds=60, max_entries=10, refresh_min_hits=2, refresh_delay=0)
+    service = make_service(replies=1, cache=cache)
+    request = SummarizeRequest(thread_id="t1")
+    await service.summarize(request)
+    await service.summarize(request)
+
+    service.community_client.posts.append(FakeCommunityClient.make_post(1))
+    assert cache.mark_stale("t1")
+    await asyncio.sleep(0.01)
+
+    entry = cache.get("t1")
+    assert not entry.stale
+    assert entry.value.summary == "single updated"
+    assert len(service.orchestrator.updates) == 1
+
+
+@pytest.mark.asyncio
+async def test_posts_errors_degrade_to_an_uncached_partial_summary():
+    """A failing posts fetch still yields a summary, which isn't cached."""
+    service = make_service(replies=3, cache=SummaryCache(ttl_seconds=60, max_entries=10))
+    service.community_client.fail_after = 1
+    request = SummarizeRequest(thread_id="t1")
+
+    response = await service.summarize(request)
+
+    prompt = service.orchestrator.summarize_calls[0]
+    assert response.summary == "single"
+    assert "Reply 0" in prompt and "Reply 1" not in prompt
+    assert service.cache.get("t1") is None
+
+    service.community_client.fail_after = None
+    await service.summarize(request)
+    assert service.cache.get("t1").post_count == 3
@@ -0,0 +1,90 @@
+"""
+Tests for stage tracing and the Prometheus exposition format.
+"""
+
+import asyncio
+import contextvars
+
+from src.utils.metrics import MetricsRegistry, metrics
+from src.utils.tracing import Tracer, start_request_trace
+
+
+def test_render_prometheus_formats_each_metric_type():
+    """Counters, gauges and histograms render in the text exposition format."""
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests", labels={"route": "/ask"}).inc(3)
+    registry.counter("requests_total", "Requests", labels={"route": "/similar"}).inc()
+    registry.gauge("queue_depth", 'Depth "now"\nin items').set(7)
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(2.0)
+
+    lines = registry.render_prometheus().splitlines()
+
+    # One header per name, series sorted by labels
+    assert lines.count("# TYPE requests_total counter") == 1
+    assert 'requests_total{route="/ask"} 3' in lines
+    assert 'requests_total{route="/similar"} 1' in lines
+    assert "# HELP queue_depth Depth \"now\"\\nin items" in lines
+    assert "queue_depth 7" in lines
+
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 2.55" in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_render_prometheus_escapes_label_values():
+    """Quotes, backslashes and newlines in label values are escaped."""
+    registry = MetricsRegistry()
+    registry.counter("errors_total", labels={"message": 'bad "value"\\'}).inc()
+
+    assert 'errors_total{message="bad \\"value\\"\\\\"} 1' in registry.render_prometheus()
+
+
+def test_tracer_records_histogram_and_request_trace():
+    """Spans feed the stage histogram and the request's Server-Timing header."""
+    tracer = Tracer("test_component")
+
+    async def run():
+        trace = start_request_trace()
+        with tracer.span("embed"):
+            await asyncio.sleep(0)
+        # Spans in child tasks land in the same trace
+        await asyncio.gather(*(segment() for _ in range(2)))
+        return trace
+
+    async def segment():
+        with tracer.span("generate"):
+            await asyncio.sleep(0.01)
+
+    trace = contextvars.copy_context().run(asyncio.run, run())
+
+    assert [name for name, _ in trace.stages] == [
+        "test_component-embed", "test_component-generate", "test_component-generate"
+    ]
+    header = trace.server_timing()
+    entries = dict(entry.split(";dur=") for entry in header.split(", "))
+    assert list(entries) == ["test_component-embed", "test_component-generate", "total"]
+    assert float(entries["test_component-generate"]) >= 20.0
+
+    histogram = metrics.histogram(
+        "test_component_stage_duration_seconds", labels={"stage": "generate"}
+    )
+    assert histogram.count == 2
+
+
+def test_tracer_without_request_trace_only_records_histogram():
+    """Spans outside a request are still measured."""
+    tracer = Tracer("untraced_component")
+
+    with tracer.span("fetch"):
+        pass
+
+    histogram = metrics.histogram(
+        "untraced_component_stage_duration_seconds", labels={"stage": "fetch"}
+    )
+    assert histogram.count == 1
@@ -0,0 +1,319 @@
+"""
+Tests for the in-process vector store backends.
+"""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from src.api.schemas import SearchFilters
+from src.vector.lexical_index import BM25Index
+from src.vector.numpy_store import NumpyVectorStore
+
+
+def unit(*values):
+    """Build a vector from components."""
+    return [float(v) for v in values]
+
+
+async def make_store(path="") -> NumpyVectorStore:
+    """Build a store with a few tagged points."""
+    store = NumpyVectorStore(path=path, persist_every=0)
+    await store.initialize()
+    await store.index_batch([
+        ("a", unit(1, 0, 0), {"title": "A", "tags": ["python"], "status": "open"}),
+        ("b", unit(0.9, 0.1, 0), {"title": "B", "tags": ["python", "api"]}),
+        ("c", unit(0, 1, 0), {"title": "C", "tags": ["rust"], "status": "open"}),
+        ("d", unit(0, 0, 1), {"title": "D", "tags": []}),
+    ])
+    return store
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_by_cosine_similarity():
+    """Results are ordered by cosine similarity and limited to top_k."""
+    store = await make_store()
+
+    results = await store.search(unit(2, 0, 0), top_k=2)
+
+    assert [r.id for r in results] == ["a", "b"]
+    assert results[0].score == pytest.approx(1.0)
+    assert results[0].metadata["title"] == "A"
+
+
+@pytest.mark.asyncio
+async def test_search_filters_like_qdrant_match_value():
+    """Scalar fields match by equality and array fields by membership."""
+    store = await make_store()
+
+    by_tag = await store.search(unit(1, 1, 1), top_k=10, filter_conditions={"tags": "python"})
+    by_status = await store.search(
+        unit(1, 1, 1), top_k=10, filter_conditions={"status": "open", "tags": "rust"}
+    )
+    unknown = await store.search(unit(1, 1, 1), filter_conditions={"missing": 1})
+
+    assert {r.id for r in by_tag} == {"a", "b"}
+    assert [r.id for r in by_status] == ["c"]
+    assert unknown == []
+
+
+@pytest.mark.asyncio
+async def test_request_filters_match_any_tag_status_and_date_range():
+    """Request filters become any-of and numeric range conditions."""
+    store = NumpyVectorStore(path="", persist_every=0)
+    await store.initialize()
+    await store.index_batch([
+        ("a", unit(1, 0, 0), {"tags": ["python"], "status": "OPEN", "created_at_ts": 100.0}),
+        ("b", unit(1, 0, 0), {"tags": ["rust"], "status": "CLOSED", "created_at_ts": 200.0}),
+        ("c", unit(1, 0, 0), {"tags": ["go"], "status": "ANSWERED", "created_at_ts": 300.0}),
+        ("d", unit(1, 0, 0), {"tags": ["python"], "status": "OPEN"}),
+    ])
+    filters = SearchFilters(
+        tags=["python", "rust"],
+        status=["OPEN", "CLOSED"],
+        created_after="1970-01-01T00:01:00Z",
+        created_before="1970-01-01T00:03:20Z"
+    )
+
+    results = await store.search(unit(1, 0, 0), top_k=10, filter_conditions=filters.to_conditions())
+
+    assert {r.id for r in results} == {"a", "b"}
+
+
+@pytest.mark.asyncio
+async def test_delete_keeps_matrix_contiguous():
+    """Deleting a row moves the last row into its slot."""
+    store = await make_store()
+
+    await store.delete_batch(["a", "missing"])
+
+    assert store.size == 3
+    assert set(store._rows) == {"b", "c", "d"}
+    assert (await store.search(unit(0, 0, 1), top_k=1))[0].id == "d"
+    assert (await store.get_metadata(["d"]))["d"] == {"title": "D", "tags": []}
+
+
+@pytest.mark.asyncio
+async def test_search_threads_groups_chunks_by_thread():
+    """Chunks of one thread collapse into a single result scored by the best chunk."""
+    store = NumpyVectorStore(path="", persist_every=0)
+    await store.initialize()
+    await store.index_batch([
+        ("c1", unit(1, 0, 0), {"thread_id": "t1", "text": "best"}),
+        ("c2", unit(0.9, 0.1, 0), {"thread_id": "t1", "text": "second"}),
+        ("c3", unit(0.8, 0.2, 0), {"thread_id": "t1", "text": "third"}),
+        ("c4", unit(0.7, 0.3, 0), {"thread_id": "t2", "text": "other"}),
+        ("c5", unit(0, 0, 1), {"thread_id": "t3", "text": "far"}),
+    ])
+
+    results = await store.search_threads(unit(1, 0, 0), top_k=2, group_size=2)
+
+    assert [r.id for r in results] == ["t1", "t2"]
+    assert results[0].score == pytest.approx(1.0)
+    assert [c["text"] for c in results[0].metadata["chunks"]] == ["best", "second"]
+    assert sorted(await store.list_ids({"thread_id": "t1"})) == ["c1", "c2", "c3"]
+
+
+@pytest.mark.asyncio
+async def test_persist_and_reload_memory_mapped(tmp_path):
+    """A persisted store reopens memory-mapped and accepts further writes."""
+    store = await make_store(str(tmp_path))
+    await store.close()
+
+    reopened = NumpyVectorStore(path=str(tmp_path), persist_every=0)
+    await reopened.initialize()
+
+    assert isinstance(reopened._vectors, np.memmap)
+    assert reopened.size == 4
+    assert (await reopened.search(unit(0, 1, 0), top_k=1))[0].id == "c"
+
+    await reopened.index("e", unit(0, 1, 1), {"title": "E"})
+    assert reopened.size == 5
+    assert not isinstance(reopened._vectors, np.memmap)
+
+
+@pytest.mark.asyncio
+async def test_persist_writes_files_off_the_event_loop(tmp_path, monkeypatch):
+    """Searches are served while files are written; writes wait for them."""
+    store = await make_store(str(tmp_path))
+    write_files = store._write_files
+
+    def slow_write_files(snapshot):
+        time.sleep(0.1)
+        write_files(snapshot)
+
+    monkeypatch.setattr(store, "_write_files", slow_write_files)
+    persisting = asyncio.create_task(store.persist())
+    await asyncio.sleep(0.01)
+
+    assert (await store.search(unit(0, 1, 0), top_k=1))[0].id == "c"
+    assert not persisting.done()
+    await store.index("e", unit(0, 1, 1), {"title": "E"})
+    assert persisting.done()
+
+    reopened = NumpyVectorStore(path=str(tmp_path), persist_every=0)
+    await reopened.initialize()
+    assert reopened.size == 4
+
+
+@pytest.mark.asyncio
+async def test_attached_bm25_index_survives_a_restart(tmp_path):
+    """The BM25 index is persisted with the vectors and reloaded complete."""
+    index = BM25Index()
+    store = NumpyVectorStore(path=str(tmp_path), persist_every=1, lexical_index=index)
+    await store.initialize()
+    index.add("a", "Install fails with ERR_SSL_PROTOCOL", {"title": "A"})
+    await store.index("a", unit(1, 0, 0), {"title": "A"})
+
+    restarted = BM25Index()
+    reopened = NumpyVectorStore(path=str(tmp_path), persist_every=0, lexical_index=restarted)
+    await reopened.initialize()
+
+    assert restarted.complete
+    assert [r.id for r in restarted.search("err_ssl_protocol", top_k=3)] == ["a"]
+
+
+def clustered_points(count=600, dim=16, seed=0):
+    """Points scattered around a handful of well separated centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((6, dim)) * 5
+    vectors = centres[rng.integers(0, 6, count)] + rng.standard_normal((count, dim))
+    return [(str(i), vector.tolist(), {"n": i}) for i, vector in enumerate(vectors)]
+
+
+async def make_ivf_store(path="") -> NumpyVectorStore:
+    """Build an IVF-indexed store that trains on the first batch."""
+    store = NumpyVectorStore(path=path, persist_every=0, index="ivf")
+    store.ann.n_lists = 6
+    store.ann.n_probe = 2
+    store.ann.min_train_size = 100
+    await store.initialize()
+    await store.index_batch(clustered_points())
+    await store.wait_for_index()
+    return store
+
+
+@pytest.mark.asyncio
+async def test_ivf_search_matches_exact_search():
+    """Probing nearby partitions recovers the exact neighbours."""
+    store = await make_ivf_store()
+    points = clustered_points()
+
+    assert store.ann.is_trained
+    hits = 0
+    for _, vector, _ in points[:20]:
+        query = store._normalize(np.asarray([vector], dtype=np.float32))[0]
+        exact = {r.id for r in store.search_exact(query, 10)}
+        approx = {r.id for r in await store.search(vector, top_k=10)}
+        hits += len(exact & approx)
+    assert hits / 200 >= 0.95
+
+
+@pytest.mark.asyncio
+async def test_ivf_follows_incremental_inserts_and_deletes():
+    """New rows are assigned to partitions and deletes move assignments."""
+    store = await make_ivf_store()
+    target = clustered_points()[-1][1]
+
+    await store.delete_batch(["0", "1", "2"])
+    await store.index("new", target, {"n": -1})
+
+    assert store.ann.assignments[store._rows["new"]] >= 0
+    assert all(
+        store.ann.assignments[row] >= 0 for row in range(store.size)
+    )
+    results = await store.search(target, top_k=2)
+    assert {r.id for r in results} == {"new", "599"}
+
+
+@pytest.mark.asyncio
+async def test_ivf_trains_off_the_event_loop(monkeypatch):
+    """Searches stay exact during training; rows written meanwhile are assigned at the swap."""
+    store = NumpyVectorStore(path="", persist_every=0, index="ivf")
+    store.ann.n_lists = 6
+    store.ann.min_train_size = 100
+    fit = store.ann.fit
+
+    def slow_fit(vectors):
+        time.sleep(0.1)
+        return fit(vectors)
+
+    monkeypatch.setattr(store.ann, "fit", slow_fit)
+    points = clustered_points()
+    await store.index_batch(points[:500])
+    await asyncio.sleep(0.01)
+
+    assert not store.ann.is_trained
+    assert (await store.search(points[3][1], top_k=1))[0].id == "3"
+    await store.index_batch(points[500:])
+    await store.delete_batch(["0"])
+
+    await store.wait_for_index()
+
+    assert store.ann.is_trained
+    assert all(store.ann.assignments[row] >= 0 for row in range(store.size))
+    assert (await store.search(points[599][1], top_k=1))[0].id == "599"
+    assert (await store.search(points[499][1], top_k=1))[0].id == "499"
+
+
+@pytest.mark.asyncio
+async def test_ivf_index_persists(tmp_path):
+    """A reopened store loads the trained index instead of retraining."""
+    store = await make_ivf_store(str(tmp_path))
+    await store.close()
+
+    reopened = NumpyVectorStore(path=str(tmp_path), persist_every=0, index="ivf")
+    await reopened.initialize()
+
+    assert reopened.ann.is_trained
+    np.testing.assert_array_equal(reopened.ann.centroids, store.ann.centroids)
+    np.testing.assert_array_equal(
+        reopened.ann.assignments, store.ann.assignments[:store.size]
+    )
+    results = await reopened.search(clustered_points()[5][1], top_k=1)
+    assert results[0].id == "5"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("quantization,min_recall", [("int8", 0.9), ("binary", 0.4)])
+async def test_quantized_search_rescores_with_originals(quantization, min_recall):
+    """Quantized first pass plus rescoring returns exact scores and neighbours."""
+    store = NumpyVectorStore(path="", persist_every=0, quantization=quantization)
+    store.oversampling = 4.0
+    await store.index_batch(clustered_points(dim=512))
+
+    hits = 0
+    for _, vector, _ in clustered_points(dim=512)[:20]:
+        query = store._normalize(np.asarray([vector], dtype=np.float32))[0]
+        exact = store.search_exact(query, 5)
+        approx = await store.search(vector, top_k=5)
+        assert approx[0].id == exact[0].id
+        assert approx[0].score == pytest.approx(exact[0].score)
+        hits += len({r.id for r in exact} & {r.id for r in approx})
+    assert hits / 100 >= min_recall
+    assert store._quantized.nbytes < store._vectors.nbytes / 3
+
+
+@pytest.mark.asyncio
+async def test_originals_on_disk_are_updated_in_place(tmp_path):
+    """On-disk originals stay memory-mapped through writes and reloads."""
+    store = NumpyVectorStore(
+        path=str(tmp_path), persist_every=0, quantization="int8", originals_on_disk=True
+    )
+    await store.initialize()
+    await store.index_batch(clustered_points(count=100))
+    await store.delete_batch(["0"])
+    assert isinstance(store._vectors, np.memmap)
+    await store.close()
+
+    reopened = NumpyVectorStore(
+        path=str(tmp_path), persist_every=0, quantization="int8", originals_on_disk=True
+    )
+    await reopened.initialize()
+    await reopened.index("new", clustered_points(count=100)[0][1], {})
+
+    assert isinstance(reopened._vectors, np.memmap)
+    assert reopened.size == 100
+    assert (await reopened.search(clustered_points(count=100)[7][1], top_k=1))[0].id == "7"
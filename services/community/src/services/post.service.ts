@@ -20,7 +20,7 @@ export class PostService {
     });
 
     // Publish indexing job
-    await queueService.publishPostIndexing(post.id);
+    await queueService.publishPostIndexing(post.id, post.threadId);
 
     return post;
   }
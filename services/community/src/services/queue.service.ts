@@ -48,7 +48,7 @@ class QueueService {
     }
   }
 
-  async publishPostIndexing(postId: string): Promise<void> {
+  async publishPostIndexing(postId: string, threadId: string): Promise<void> {
     if (!this.channel) {
       console.warn('Queue not connected, skipping post indexing job');
       return;
@@ -58,11 +58,13 @@ class QueueService {
       const message = JSON.stringify({
         type: 'post',
         postId,
+        threadId,
         timestamp: new Date().toISOString(),
       });
 
+      // The assistant re-indexes (and refreshes summaries of) the parent thread
       this.channel.sendToQueue(
-        'indexing.posts',
+        'indexing.threads',
         Buffer.from(message),
         { persistent: true }
       );